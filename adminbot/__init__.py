@@ -1,7 +1,18 @@
 """Hanbyeol administration bot package."""
 
 __all__ = [
+    "cache",
     "config",
     "database",
     "embeds",
+    "export",
+    "metrics",
+    "migrate",
+    "outbox",
+    "punishments",
+    "search",
+    "sqlite_storage",
+    "stats",
+    "storage",
+    "views",
 ]
@@ -16,6 +16,11 @@ class BotConfig:
     punishment_role_id: int
     log_role_id: int
     database_path: str
+    fsync_policy: str
+    segment_max_bytes: int
+    outbox_path: str
+    lean_gateway: bool
+    metrics_port: int | None
 
     @classmethod
     def from_env(cls) -> "BotConfig":
@@ -40,6 +45,22 @@ class BotConfig:
             os.environ.get("HANBYEOL_LOG_ROLE", "1434877292546621602")
         )
         database_path = os.environ.get("HANBYEOL_DATABASE", "hanbyeol_logs.txt")
+        fsync_policy = os.environ.get("HANBYEOL_FSYNC", "batch").strip().lower()
+        if fsync_policy not in ("always", "batch", "never"):
+            raise RuntimeError(
+                "HANBYEOL_FSYNC 환경 변수는 always, batch, never 중 하나여야 합니다."
+            )
+        outbox_path = os.environ.get("HANBYEOL_OUTBOX", "hanbyeol_outbox.jsonl")
+        lean_gateway = os.environ.get("HANBYEOL_LEAN_GATEWAY", "").strip().lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+        segment_max_bytes = int(
+            os.environ.get("HANBYEOL_SEGMENT_MAX_BYTES", str(32 * 1024 * 1024))
+        )
+        metrics_port_value = os.environ.get("HANBYEOL_METRICS_PORT", "").strip()
+        metrics_port = int(metrics_port_value) if metrics_port_value else None
 
         return cls(
             token=token,
@@ -48,4 +69,9 @@ class BotConfig:
             punishment_role_id=punishment_role_id,
             log_role_id=log_role_id,
             database_path=database_path,
+            fsync_policy=fsync_policy,
+            segment_max_bytes=segment_max_bytes,
+            outbox_path=outbox_path,
+            lean_gateway=lean_gateway,
+            metrics_port=metrics_port,
         )
@@ -3,156 +3,1551 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
+import gzip
 import json
-from dataclasses import asdict, dataclass
+import os
+import re
+import threading
+from collections import deque
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable
+from functools import partial
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterable, Iterator, Mapping
 
-PunishmentRecord = dict[str, Any]
-ReleaseRecord = dict[str, Any]
+from .metrics import LOG_BYTES, LOG_ENTRIES, MALFORMED_LINES, STORAGE_SECONDS
+from .search import SearchIndex
+from .sqlite_storage import SQLiteDatabase
+from .storage import (
+    FSYNC_POLICIES,
+    LogRecord,
+    PunishmentRecord,
+    ReleaseRecord,
+    Storage,
+    parse_created_at,
+)
 
+# The record types and storage classes are re-exported for code that imported
+# them from here before they moved to ``storage`` and ``sqlite_storage``.
+__all__ = [
+    "Database",
+    "LogRecord",
+    "PunishmentRecord",
+    "ReleaseRecord",
+    "SQLiteDatabase",
+    "Storage",
+    "format_entries",
+    "iter_log_entries",
+    "open_database",
+    "storage_path",
+]
 
-@dataclass(slots=True)
-class _Entry:
-    """Internal representation of a stored log entry."""
+# Size of the blocks read from the end of the log when scanning backwards.
+_READ_CHUNK_SIZE = 64 * 1024
+# Uncompressed bytes per gzip member of a sealed segment.  Every member starts
+# with a checkpoint recorded in the manifest, so time range reads can seek to
+# the member holding their first entry instead of decompressing from the top.
+_CHECKPOINT_BYTES = 256 * 1024
 
-    kind: str
-    user_id: int
-    user_name: str
-    punishment: str
-    reason: str
-    moderator_id: int
-    moderator_name: str
-    created_at: str
-    duration: str | None = None
+# With the ``batch`` policy the writer flushes to disk at most this many
+# seconds after the oldest write that has not been synced, whether or not the
+# queue went idle in between.
+_FSYNC_INTERVAL = 1.0
+# Upper bound on the number of queued entries written by a single ``write``.
+_MAX_WRITE_BATCH = 512
 
-    def as_dict(self) -> dict[str, Any]:
-        data = asdict(self)
-        # Remove ``None`` duration so the consumer can omit the field.
-        if data.get("duration") is None:
-            data.pop("duration", None)
-        return data
+# An entry waiting for the writer task and the future resolved once written.
+_QueuedEntry = tuple[dict[str, Any], "asyncio.Future[None]"]
 
+# Default size at which the active text segment is sealed even before the
+# month is over.  ``0`` disables size based rolling.
+DEFAULT_SEGMENT_MAX_BYTES = 32 * 1024 * 1024
 
-class Database:
-    """Text-file backed storage for punishment data."""
+# File extensions that select the SQLite backend in :func:`open_database`.
+_SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
 
-    def __init__(self, path: str) -> None:
+
+def open_database(
+    location: str,
+    *,
+    fsync: str = "batch",
+    segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+) -> Storage:
+    """Return the storage backend for ``location``.
+
+    ``sqlite:///path/to/file.db`` (or ``sqlite:path``) and paths ending in one
+    of the SQLite extensions select :class:`SQLiteDatabase`; anything else is
+    treated as a JSON-lines text log handled by :class:`Database`.
+    """
+
+    path = storage_path(location)
+    if location.startswith("sqlite:") or path.suffix.lower() in _SQLITE_SUFFIXES:
+        return SQLiteDatabase(str(path), fsync=fsync)
+    return Database(str(path), fsync=fsync, segment_max_bytes=segment_max_bytes)
+
+
+def storage_path(location: str) -> Path:
+    """Return the file behind a ``HANBYEOL_DATABASE`` value.
+
+    Other state kept next to the log (such as the command sync signature)
+    is placed beside this path.
+    """
+
+    if location.startswith("sqlite:"):
+        location = location.removeprefix("sqlite:")
+        if location.startswith("///"):
+            location = location[3:]
+        elif location.startswith("//"):
+            location = location[2:]
+    return Path(location)
+
+
+class Database(Storage):
+    """Text-file backed storage for punishment data.
+
+    The configured path is the active segment that receives new lines.  When
+    a new month starts, or the active segment grows past
+    ``segment_max_bytes``, it is sealed into a gzip file next to it and listed
+    in a manifest (see :class:`_Segments`); queries read sealed segments
+    transparently.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        fsync: str = "batch",
+        segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync!r}")
+        super().__init__()
         self._path = Path(path)
+        self._fsync = fsync
+        self._segment_max_bytes = segment_max_bytes
+        self._segments = _Segments(self._path)
+        # ``YYYY-MM`` of the first line in the active segment, once known.
+        self._active_month: str | None = None
+        # Resident copy of every parsed entry, oldest first.  It is loaded in
+        # ``setup`` and afterwards only extended, so queries never re-read the
+        # file unless it was changed behind our back.  Entries are kept as
+        # compact ``LogRecord`` objects rather than the parsed dicts.
+        self._entries: list[LogRecord] = []
+        self._cache_loaded = False
+        # Serialises file writes and every structure derived from the file.
+        self._lock = threading.Lock()
+        # Number of bytes of the file reflected in ``_entries`` together with
+        # the identity and modification time of the file they were read from.
+        self._cache_offset = 0
+        self._cache_file_id: tuple[int, int] | None = None
+        self._cache_mtime_ns = 0
+        self._user_index = _UserIndex(self._path, self._segments)
+        # Bigram index over the resident cache, persisted as ``<log>.search``.
+        self._search_index = SearchIndex(
+            self._path.with_name(self._path.name + ".search")
+        )
+        # All appends go through a single writer task that owns the file
+        # handle, which keeps lines in submission order and lets bursts share
+        # one ``write`` (and one ``fsync``).
+        self._queue: asyncio.Queue[_QueuedEntry | None] = asyncio.Queue()
+        self._writer_task: asyncio.Task[None] | None = None
+        self._writer_fp: BinaryIO | None = None
+        self._unsynced = False
+        # Loop time of the oldest write not yet flushed to disk.
+        self._unsynced_since: float | None = None
 
     async def setup(self) -> None:
-        """Ensure that the storage file exists."""
+        """Ensure that the storage file exists and load the entry cache."""
 
         await asyncio.to_thread(self._initialise_file)
+        await asyncio.to_thread(self._load_segments)
+        await asyncio.to_thread(self._reload_cache)
+        await asyncio.to_thread(self._sync_user_index)
+        await asyncio.to_thread(self._sync_search_index)
+        self._ensure_writer()
+
+    async def close(self) -> None:
+        """Write out every queued entry and release the log file."""
+
+        if self._writer_task is not None:
+            self._queue.put_nowait(None)
+            await self._writer_task
+            self._writer_task = None
+        await asyncio.to_thread(self._close_writer)
 
     def _initialise_file(self) -> None:
         self._path.parent.mkdir(parents=True, exist_ok=True)
         if not self._path.exists():
             self._path.write_text("", encoding="utf-8")
 
-    async def log_punishment(
+    async def get_recent_entries(
         self,
+        limits: Mapping[str, int],
         *,
-        user_id: int,
-        user_name: str,
-        punishment: str,
-        reason: str,
-        duration: str | None,
-        moderator_id: int,
-        moderator_name: str,
-    ) -> None:
-        """Persist a punishment record to the storage file."""
-
-        entry = _Entry(
-            kind="punishment",
-            user_id=user_id,
-            user_name=user_name,
-            punishment=punishment,
-            reason=reason,
-            duration=duration,
-            moderator_id=moderator_id,
-            moderator_name=moderator_name,
-            created_at=datetime.now().isoformat(timespec="seconds"),
-        )
-        await asyncio.to_thread(self._append_entry, entry.as_dict())
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> dict[str, list[Mapping[str, Any]]]:
+        """Return the newest entries of each kind in ``limits``, newest first.
+
+        All kinds are collected during a single backwards scan which stops as
+        soon as every per-kind quota has been filled.  With ``start`` or
+        ``end`` only entries created in ``[start, end)`` are returned; the
+        scan then starts at the end of that range, located by binary search.
+        """
+
+        if start is not None or end is not None:
+            with STORAGE_SECONDS.time("range"):
+                return await asyncio.to_thread(
+                    self._read_recent_between, dict(limits), start, end
+                )
+
+        with STORAGE_SECONDS.time("recent"):
+            if not self._cache_loaded:
+                return await asyncio.to_thread(self._read_recent_entries, dict(limits))
+
+            await self._refresh_cache()
+            return _collect_recent(reversed(self._entries), dict(limits))
+
+    async def current_version(self) -> int:
+        """Return :attr:`version` after picking up lines appended by others."""
 
-    async def log_release(
+        if self._cache_loaded:
+            await self._refresh_cache()
+        return self.version
+
+    async def get_entries_before(
+        self, cursor: int | None, limit: int
+    ) -> tuple[list[Mapping[str, Any]], int | None]:
+        """Return up to ``limit`` entries older than ``cursor``, newest first.
+
+        The cursor is the sequence number of an entry in the resident cache,
+        so every page is a slice of ``limit`` entries however deep it is.
+        """
+
+        if not self._cache_loaded:
+            await asyncio.to_thread(self._reload_cache)
+        else:
+            await self._refresh_cache()
+
+        entries = self._entries
+        end = len(entries) if cursor is None else min(cursor, len(entries))
+        start = max(0, end - limit)
+        return entries[start:end][::-1], (start or None)
+
+    async def iter_entries_between(
         self,
+        start: datetime | None,
+        end: datetime | None,
         *,
-        user_id: int,
-        user_name: str,
-        punishment: str,
-        reason: str,
-        moderator_id: int,
-        moderator_name: str,
-    ) -> None:
-        """Persist a punishment release record to the storage file."""
-
-        entry = _Entry(
-            kind="release",
-            user_id=user_id,
-            user_name=user_name,
-            punishment=punishment,
-            reason=reason,
-            moderator_id=moderator_id,
-            moderator_name=moderator_name,
-            created_at=datetime.now().isoformat(timespec="seconds"),
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[Mapping[str, Any]]]:
+        """Yield the entries created in ``[start, end)``, oldest first.
+
+        Only the matching slice of the log is read: sealed segments outside
+        the range are skipped using their manifest time range, the first line
+        of the active segment is found by binary search over byte offsets and
+        sealed segments are entered at their nearest checkpoint.  Entries
+        without a ``created_at`` are left out.
+        """
+
+        batches = self._iter_between(start, end, batch_size)
+        try:
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            await asyncio.to_thread(batches.close)
+
+    async def search_entries(
+        self, query: str, limit: int
+    ) -> list[Mapping[str, Any]]:
+        """Return up to ``limit`` entries matching ``query``, best first.
+
+        Matches come from the bigram index over the resident cache; see
+        :meth:`SearchIndex.search` for the ranking.
+        """
+
+        if not self._cache_loaded:
+            await asyncio.to_thread(self._reload_cache)
+        else:
+            await self._refresh_cache()
+
+        with STORAGE_SECONDS.time("search"):
+            return await asyncio.to_thread(self._search, query, limit)
+
+    async def scan_entries(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[Mapping[str, Any]]]:
+        """Yield every entry oldest first, sealed segments included.
+
+        Batches are slices of the resident cache as it was when the scan
+        started; entries appended while scanning are not included.
+        """
+
+        if not self._cache_loaded:
+            await asyncio.to_thread(self._reload_cache)
+        else:
+            await self._refresh_cache()
+
+        entries = self._entries
+        end = len(entries)
+        for start in range(0, end, batch_size):
+            yield entries[start : min(start + batch_size, end)]
+
+    async def get_user_history(
+        self, user_id: int, limit: int | None = None
+    ) -> dict[str, list[Mapping[str, Any]]]:
+        """Return every entry recorded for ``user_id`` partitioned by kind.
+
+        Entries are located through the per-user sidecar index and read with
+        direct seeks, newest first.  ``limit`` caps the entries per kind.
+        """
+
+        with STORAGE_SECONDS.time("user_history"):
+            return await asyncio.to_thread(self._read_user_history, user_id, limit)
+
+    async def _submit_many(self, entries: list[dict[str, Any]]) -> None:
+        """Queue ``entries`` for the writer task and wait until they are written.
+
+        The entries are queued back to back, so the writer picks them up in
+        the same ``write`` call.
+        """
+
+        self._ensure_writer()
+        loop = asyncio.get_running_loop()
+        futures: list[asyncio.Future[None]] = []
+        for entry in entries:
+            future: asyncio.Future[None] = loop.create_future()
+            self._queue.put_nowait((entry, future))
+            futures.append(future)
+        await asyncio.gather(*futures)
+
+    def _ensure_writer(self) -> None:
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._run_writer())
+
+    async def _run_writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._unsynced:
+                self._unsynced_since = None
+            elif self._unsynced_since is None:
+                self._unsynced_since = loop.time()
+
+            if self._unsynced and self._fsync == "batch":
+                # Under sustained load the queue never goes idle, so the
+                # deadline counts from the oldest unsynced write.
+                remaining = self._unsynced_since + _FSYNC_INTERVAL - loop.time()
+                if remaining <= 0:
+                    await asyncio.to_thread(self._fsync_writer)
+                    self._unsynced_since = None
+                    continue
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    await asyncio.to_thread(self._fsync_writer)
+                    self._unsynced_since = None
+                    continue
+            else:
+                item = await self._queue.get()
+
+            batch: list[_QueuedEntry] = []
+            stopping = item is None
+            if item is not None:
+                batch.append(item)
+            while len(batch) < _MAX_WRITE_BATCH and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                try:
+                    await asyncio.to_thread(
+                        self._append_entries, [entry for entry, _ in batch]
+                    )
+                except Exception as exc:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(exc)
+                else:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_result(None)
+
+            if stopping and self._queue.empty():
+                return
+
+    def _append_entries(self, entries: list[dict[str, Any]]) -> None:
+        lines = [
+            (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            for entry in entries
+        ]
+        data = b"".join(lines)
+        with self._lock, STORAGE_SECONDS.time("append"):
+            self._roll_if_needed_locked(entries[0], len(data))
+            fp = self._open_writer_locked()
+            start = fp.seek(0, os.SEEK_END)
+            fp.write(data)
+            fp.flush()
+            if self._fsync == "always":
+                with STORAGE_SECONDS.time("fsync"):
+                    os.fsync(fp.fileno())
+            else:
+                self._unsynced = True
+            stat = os.fstat(fp.fileno())
+
+            records = []
+            offset = start
+            for entry, line in zip(entries, lines):
+                records.append((entry.get("user_id"), offset, len(line)))
+                offset += len(line)
+            self._user_index.add(records, stat)
+
+            if not self._cache_loaded:
+                return
+            if start == self._cache_offset and _file_id(stat) == self._cache_file_id:
+                self._entries.extend(map(LogRecord.from_dict, entries))
+                self._cache_offset = offset
+                self._cache_mtime_ns = stat.st_mtime_ns
+                self._report_size_locked()
+                self._search_index.sync(self._entries)
+            else:
+                # Someone else touched the file since the last sync; pick up
+                # their changes together with the lines we just wrote.
+                self._sync_cache_locked()
+
+    def _load_segments(self) -> None:
+        with self._lock:
+            self._segments.load()
+
+    def _roll_if_needed_locked(self, entry: dict[str, Any], incoming: int) -> None:
+        """Seal the active segment if ``entry`` starts a new month or it is full."""
+
+        try:
+            size = self._path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size == 0:
+            return
+
+        month = str(entry.get("created_at", ""))[:7]
+        if self._active_month is None:
+            self._active_month = self._read_active_month()
+        new_month = bool(month and self._active_month and month != self._active_month)
+        full = bool(
+            self._segment_max_bytes and size + incoming > self._segment_max_bytes
         )
-        await asyncio.to_thread(self._append_entry, entry.as_dict())
+        if new_month or full:
+            self._roll_locked()
 
-    async def get_recent_punishments(self, limit: int) -> list[PunishmentRecord]:
-        """Return the newest punishment entries."""
+    def _read_active_month(self) -> str | None:
+        with self._path.open("rb") as fp:
+            for line in fp:
+                entry = _decode_line(line)
+                if entry is not None and entry.get("created_at"):
+                    return str(entry["created_at"])[:7]
+        return None
 
-        entries = await asyncio.to_thread(self._read_entries)
-        punishments = [entry for entry in entries if entry.get("kind") == "punishment"]
-        return list(reversed(punishments[-limit:]))
+    def _roll_locked(self) -> None:
+        """Seal the active segment and start an empty one in its place."""
 
-    async def get_recent_releases(self, limit: int) -> list[ReleaseRecord]:
-        """Return the newest punishment release entries."""
+        # Make sure nothing written by other processes is missed before the
+        # file is moved away.
+        if self._cache_loaded:
+            self._sync_cache_locked()
+        self._user_index.sync()
 
-        entries = await asyncio.to_thread(self._read_entries)
-        releases = [entry for entry in entries if entry.get("kind") == "release"]
-        return list(reversed(releases[-limit:]))
+        if self._writer_fp is not None:
+            if self._unsynced and self._fsync != "never":
+                os.fsync(self._writer_fp.fileno())
+            self._unsynced = False
+            self._writer_fp.close()
+            self._writer_fp = None
 
-    def _append_entry(self, entry: dict[str, Any]) -> None:
+        self._segments.seal_active()
         self._initialise_file()
-        with self._path.open("a", encoding="utf-8") as fp:
-            fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        stat = self._path.stat()
+        self._active_month = None
+        self._user_index.rolled(stat)
+        if self._cache_loaded:
+            self._cache_offset = 0
+            self._cache_file_id = _file_id(stat)
+            self._cache_mtime_ns = stat.st_mtime_ns
+            self._report_size_locked()
+
+    def _open_writer_locked(self) -> BinaryIO:
+        """Return the long-lived append handle, reopening it after rotation."""
+
+        fp = self._writer_fp
+        if fp is not None:
+            try:
+                current = _file_id(self._path.stat())
+            except FileNotFoundError:
+                current = None
+            if current == _file_id(os.fstat(fp.fileno())):
+                return fp
+            self._writer_fp = None
+            fp.close()
+
+        self._initialise_file()
+        self._writer_fp = self._path.open("ab")
+        return self._writer_fp
+
+    def _fsync_writer(self) -> None:
+        with self._lock:
+            if self._writer_fp is not None and self._unsynced:
+                with STORAGE_SECONDS.time("fsync"):
+                    os.fsync(self._writer_fp.fileno())
+            self._unsynced = False
+
+    def _close_writer(self) -> None:
+        with self._lock:
+            fp, self._writer_fp = self._writer_fp, None
+            if fp is None:
+                return
+            if self._unsynced and self._fsync != "never":
+                os.fsync(fp.fileno())
+            self._unsynced = False
+            fp.close()
+
+    def _sync_user_index(self) -> None:
+        with self._lock:
+            self._user_index.sync()
+
+    def _sync_search_index(self) -> None:
+        with self._lock:
+            self._search_index.sync(self._entries)
+
+    def _search(self, query: str, limit: int) -> list[Mapping[str, Any]]:
+        with self._lock:
+            self._search_index.sync(self._entries)
+            return [
+                self._entries[position]
+                for position in self._search_index.search(query, limit)
+            ]
+
+    def _read_user_history(
+        self, user_id: int, limit: int | None
+    ) -> dict[str, list[dict[str, Any]]]:
+        with self._lock:
+            self._user_index.sync()
+            locations = self._user_index.locations(user_id)
+            active_seq = self._segments.active_seq
+            sealed = {segment["seq"]: segment for segment in self._segments.sealed}
+            # The active segment can be rolled away by the writer, so its
+            # lines are read while holding the lock.
+            recent = _read_user_lines(
+                self._segments,
+                user_id,
+                [location for location in locations if location[0] == active_seq],
+                sealed,
+                active_seq,
+            )
+        # Sealed segments never change, so reading them does not hold up
+        # appends.
+        older = _read_user_lines(
+            self._segments,
+            user_id,
+            [location for location in locations if location[0] != active_seq],
+            sealed,
+            active_seq,
+        )
+
+        if older is None or recent is None:
+            # The index pointed at lines that no longer belong to this user,
+            # so the log was rewritten in place.
+            with self._lock:
+                self._user_index.rebuild()
+                entries = self._user_index.read(user_id) or []
+        else:
+            entries = older + recent
+
+        history: dict[str, list[dict[str, Any]]] = {"punishment": [], "release": []}
+        for entry in reversed(entries):
+            bucket = history.get(entry.get("kind"))
+            if bucket is not None and (limit is None or len(bucket) < limit):
+                bucket.append(entry)
+        return history
+
+    async def _refresh_cache(self) -> None:
+        """Sync the cache if the file changed behind our back.
+
+        Our own appends keep the cache in step with the file, so a stale
+        cache means another process changed the log and :attr:`version` is
+        bumped for anything derived from the old contents.
+        """
+
+        if self._cache_is_stale():
+            await asyncio.to_thread(self._sync_cache)
+            self.version += 1
+
+    def _cache_is_stale(self) -> bool:
+        """Return True if the file no longer matches the cached entries."""
+
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return self._cache_file_id is not None
+        return (
+            _file_id(stat) != self._cache_file_id
+            or stat.st_size != self._cache_offset
+            or stat.st_mtime_ns != self._cache_mtime_ns
+        )
+
+    def _reload_cache(self) -> None:
+        with self._lock:
+            self._reload_cache_locked()
+
+    def _sync_cache(self) -> None:
+        with self._lock:
+            self._sync_cache_locked()
+
+    def _reload_cache_locked(self) -> None:
+        self._entries = []
+        for segment in self._segments.sealed:
+            self._ingest_lines_locked(self._segments.iter_lines(segment["seq"]))
+        self._active_month = None
+        self._cache_offset = 0
+        self._cache_file_id = None
+        self._cache_mtime_ns = 0
+        self._cache_loaded = True
+        self._ingest_tail_locked()
+
+    def _sync_cache_locked(self) -> None:
+        """Bring the cache up to date with the file.
+
+        Growth of the same file is ingested incrementally from the last known
+        offset.  A replaced, truncated or rewritten file triggers a full reload.
+        """
+
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            self._reload_cache_locked()
+            return
+
+        if (
+            _file_id(stat) != self._cache_file_id
+            or stat.st_size < self._cache_offset
+            or (
+                stat.st_size == self._cache_offset
+                and stat.st_mtime_ns != self._cache_mtime_ns
+            )
+        ):
+            self._reload_cache_locked()
+        elif stat.st_size > self._cache_offset:
+            self._ingest_tail_locked()
+
+    def _ingest_tail_locked(self) -> None:
+        """Parse the bytes appended since ``_cache_offset`` into the cache."""
 
-    def _read_entries(self) -> list[dict[str, Any]]:
         if not self._path.exists():
+            return
+
+        with self._path.open("rb") as fp:
+            stat = os.fstat(fp.fileno())
+            if _file_id(stat) != self._cache_file_id:
+                self._cache_offset = 0
+            fp.seek(self._cache_offset)
+            data = fp.read()
+
+        # Leave a trailing partial line for the next sync; its writer has not
+        # finished it yet.
+        end = data.rfind(b"\n") + 1
+        self._ingest_lines_locked(data[:end].split(b"\n"))
+        self._cache_offset += end
+        self._cache_file_id = _file_id(stat)
+        self._cache_mtime_ns = stat.st_mtime_ns
+        self._report_size_locked()
+
+    def _ingest_lines_locked(self, lines: Iterable[bytes]) -> None:
+        """Append the entries parsed from ``lines`` to the cache."""
+
+        malformed = 0
+        for line in lines:
+            entry = _decode_line(line)
+            if entry is not None:
+                self._entries.append(LogRecord.from_dict(entry))
+            elif line.strip():
+                malformed += 1
+        if malformed:
+            MALFORMED_LINES.inc(malformed)
+
+    def _report_size_locked(self) -> None:
+        LOG_BYTES.set(self._cache_offset, "active")
+        LOG_BYTES.set(
+            sum(segment.get("bytes", 0) for segment in self._segments.sealed), "sealed"
+        )
+        LOG_ENTRIES.set(len(self._entries))
+
+    def _read_recent_entries(
+        self, limits: dict[str, int]
+    ) -> dict[str, list[Mapping[str, Any]]]:
+        """Collect the newest entries per kind straight from the files.
+
+        The active segment is scanned backwards first; sealed segments are
+        then visited newest first, skipping any whose manifest says it holds
+        none of the kinds still missing.
+        """
+
+        with self._lock:
+            sealed = list(self._segments.sealed)
+
+        collected: dict[str, list[Mapping[str, Any]]] = {kind: [] for kind in limits}
+        remaining = {kind: limit for kind, limit in limits.items() if limit > 0}
+
+        with closing(self._iter_lines_reversed()) as lines:
+            _extend_recent(collected, remaining, map(_decode_line, lines))
+        for segment in reversed(sealed):
+            if not remaining:
+                break
+            if not any(segment["kinds"].get(kind) for kind in remaining):
+                continue
+            lines = list(self._segments.iter_lines(segment["seq"]))
+            _extend_recent(collected, remaining, map(_decode_line, reversed(lines)))
+        return collected
+
+    def _iter_between(
+        self, start: datetime | None, end: datetime | None, batch_size: int
+    ) -> Iterator[list[dict[str, Any]]]:
+        with self._lock:
+            sealed = list(self._segments.sealed)
+
+        sources = [
+            self._segments.iter_lines_from(segment, start)
+            for segment in sealed
+            if _segment_overlaps(segment, start, end)
+        ]
+        sources.append(self._iter_active_lines_from(start))
+        batch: list[dict[str, Any]] = []
+        for source in sources:
+            with closing(source) as lines:
+                for entry in _entries_between(lines, start, end):
+                    batch.append(entry)
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
+
+    def _iter_active_lines_from(self, start: datetime | None) -> Iterator[bytes]:
+        """Yield the complete lines of the active segment from ``start`` on."""
+
+        try:
+            fp = self._path.open("rb")
+        except FileNotFoundError:
+            return
+        with fp:
+            size = os.fstat(fp.fileno()).st_size
+            fp.seek(0 if start is None else _find_time(fp, size, start))
+            for line in fp:
+                if not line.endswith(b"\n"):
+                    # Partial line still being written.
+                    return
+                yield line
+
+    def _read_recent_between(
+        self,
+        limits: dict[str, int],
+        start: datetime | None,
+        end: datetime | None,
+    ) -> dict[str, list[Mapping[str, Any]]]:
+        """Collect the newest entries per kind created in ``[start, end)``.
+
+        The active segment is read backwards from the end of the range, found
+        by binary search, until the quotas are met or the range starts.
+        Overlapping sealed segments are then read backwards one gzip member at
+        a time, starting with the member that holds the end of the range.
+        """
+
+        with self._lock:
+            sealed = list(self._segments.sealed)
+
+        collected: dict[str, list[Mapping[str, Any]]] = {kind: [] for kind in limits}
+        remaining = {kind: limit for kind, limit in limits.items() if limit > 0}
+
+        try:
+            fp = self._path.open("rb")
+        except FileNotFoundError:
+            fp = None
+        if fp is not None:
+            with fp:
+                size = os.fstat(fp.fileno()).st_size
+                low = 0 if start is None else _find_time(fp, size, start)
+                high = size if end is None else _find_time(fp, size, end)
+            with closing(self._iter_lines_reversed(low, high)) as lines:
+                _extend_recent(collected, remaining, _entries_back_to(lines, start, end))
+
+        for segment in reversed(sealed):
+            if not remaining:
+                break
+            if not _segment_overlaps(segment, start, end):
+                continue
+            if not any(segment["kinds"].get(kind) for kind in remaining):
+                continue
+            if segment.get("checkpoints"):
+                lines = self._segments.iter_lines_reversed(segment, end)
+                with closing(lines):
+                    _extend_recent(
+                        collected, remaining, _entries_back_to(lines, start, end)
+                    )
+                continue
+
+            # Sealed without checkpoints: read the slice forwards and keep the
+            # newest entries.
+            newest = {kind: deque(maxlen=limit) for kind, limit in remaining.items()}
+            with closing(self._segments.iter_lines_from(segment, start)) as lines:
+                for entry in _entries_between(lines, start, end):
+                    bucket = newest.get(entry.get("kind"))
+                    if bucket is not None:
+                        bucket.append(entry)
+            for kind, entries in newest.items():
+                collected[kind].extend(reversed(entries))
+                remaining[kind] -= len(entries)
+            remaining = {kind: left for kind, left in remaining.items() if left > 0}
+        return collected
+
+    def _iter_lines_reversed(
+        self, start: int = 0, end: int | None = None
+    ) -> Iterator[bytes]:
+        """Yield raw lines from the end of the storage file towards the start.
+
+        The file is read in fixed-size blocks starting at EOF (or at ``end``
+        and down to ``start``, both line boundaries) so that only the tail
+        that is actually consumed is ever loaded.  Splitting on ``\\n`` is
+        safe on the raw bytes because UTF-8 never uses that byte inside a
+        multi-byte sequence.
+        """
+
+        if not self._path.exists():
+            return
+
+        with self._path.open("rb") as fp:
+            position = fp.seek(0, os.SEEK_END) if end is None else end
+            remainder = b""
+            while position > start:
+                size = min(_READ_CHUNK_SIZE, position - start)
+                position -= size
+                fp.seek(position)
+                lines = (fp.read(size) + remainder).split(b"\n")
+                # The first piece may be the tail of a line that starts in an
+                # earlier block, so keep it until that block has been read.
+                remainder = lines[0]
+                yield from reversed(lines[1:])
+            yield remainder
+
+
+class _Segments:
+    """Manifest of the sealed, gzip-compressed segments of a text log.
+
+    Sealed segments are stored as ``<log>.NNNNN.gz`` and described in
+    ``<log>.manifest.json`` with their sequence number, time range, entry
+    count and per-kind counts.  The active segment is the log file itself and
+    carries the next sequence number, so byte offsets recorded while it is
+    active stay valid (as uncompressed offsets) once it has been sealed.
+    Callers must hold the database lock.
+    """
+
+    def __init__(self, log_path: Path) -> None:
+        self._log_path = log_path
+        self._manifest_path = log_path.with_name(log_path.name + ".manifest.json")
+        self._pattern = re.compile(re.escape(log_path.name) + r"\.(\d{5,})(\.gz)?")
+        self.sealed: list[dict[str, Any]] = []
+        self.active_seq = 1
+
+    def load(self) -> None:
+        """Read the manifest and finish sealing interrupted by a crash."""
+
+        self.read_manifest()
+        known = {segment["seq"] for segment in self.sealed}
+        for seq, path in self.plain_segments():
+            if seq in known:
+                path.unlink()
+            else:
+                self._seal(seq)
+
+    def read_manifest(self) -> None:
+        """Read the manifest without touching any file."""
+
+        if self._manifest_path.exists():
+            manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            self.sealed = manifest.get("segments", [])
+            self.active_seq = manifest.get("active_seq", 1)
+
+    def plain_segments(self) -> list[tuple[int, Path]]:
+        """Return the uncompressed ``<log>.NNNNN`` files, oldest first.
+
+        Such a file is a segment that was moved aside but not yet compressed
+        and recorded, or one whose compressed copy is already in the manifest
+        but that was not deleted yet.
+        """
+
+        directory = self._log_path.parent
+        segments = []
+        for path in sorted(directory.iterdir()) if directory.exists() else ():
+            match = self._pattern.fullmatch(path.name)
+            if match is not None and not match.group(2):
+                segments.append((int(match.group(1)), path))
+        return segments
+
+    def path(self, seq: int) -> Path:
+        """Return the file holding segment ``seq``."""
+
+        if seq == self.active_seq:
+            return self._log_path
+        return self._sealed_path(seq)
+
+    def open(self, seq: int) -> BinaryIO:
+        """Open segment ``seq`` for reading uncompressed bytes."""
+
+        if seq == self.active_seq:
+            return self._log_path.open("rb")
+        return gzip.open(self._sealed_path(seq), "rb")
+
+    def iter_lines(self, seq: int) -> Iterator[bytes]:
+        """Yield the raw lines of segment ``seq``."""
+
+        with self.open(seq) as fp:
+            yield from fp
+
+    def iter_lines_from(
+        self, segment: dict[str, Any], start: datetime | None
+    ) -> Iterator[bytes]:
+        """Yield the lines of a sealed segment, skipping ahead towards ``start``.
+
+        Decompression starts at the last checkpoint created before ``start``,
+        or at the top for segments sealed without checkpoints.  Lines before
+        ``start`` may still be yielded.
+        """
+
+        checkpoints = segment.get("checkpoints") or []
+        offset = 0
+        if start is not None and checkpoints:
+            times = [
+                parse_created_at(checkpoint[0]) or datetime.min
+                for checkpoint in checkpoints
+            ]
+            index = bisect.bisect_left(times, start) - 1
+            if index >= 0:
+                offset = checkpoints[index][1]
+        with self._sealed_path(segment["seq"]).open("rb") as raw:
+            raw.seek(offset)
+            with gzip.GzipFile(fileobj=raw, mode="rb") as fp:
+                yield from fp
+
+    def iter_lines_reversed(
+        self, segment: dict[str, Any], end: datetime | None
+    ) -> Iterator[bytes]:
+        """Yield the lines of a checkpointed sealed segment, newest first.
+
+        Members starting at or after ``end`` are skipped; the rest are
+        decompressed one at a time from the newest, so only the members that
+        are consumed are read.
+        """
+
+        checkpoints = segment["checkpoints"]
+        offsets = [checkpoint[1] for checkpoint in checkpoints]
+        times = [
+            parse_created_at(checkpoint[0]) or datetime.min
+            for checkpoint in checkpoints
+        ]
+        if offsets[0] != 0:
+            # Leading members without any timestamp.
+            offsets.insert(0, 0)
+            times.insert(0, datetime.min)
+        last = len(offsets) if end is None else bisect.bisect_left(times, end)
+
+        with self._sealed_path(segment["seq"]).open("rb") as raw:
+            stop = offsets[last] if last < len(offsets) else None
+            for offset in reversed(offsets[:last]):
+                raw.seek(offset)
+                data = raw.read() if stop is None else raw.read(stop - offset)
+                yield from reversed(gzip.decompress(data).splitlines(keepends=True))
+                stop = offset
+
+    def read_lines(
+        self, segment: dict[str, Any] | None, spans: list[tuple[int, int]]
+    ) -> list[bytes]:
+        """Return the bytes at each ``(offset, length)`` of a segment.
+
+        ``segment`` is a sealed segment from the manifest, or ``None`` for the
+        active one.  ``spans`` must be in offset order.  Segments sealed with
+        a member table only decompress the members holding a span; older
+        ones are decompressed from the top up to the last span.
+        """
+
+        if not spans:
             return []
+        if segment is None:
+            with self._log_path.open("rb") as fp:
+                return [_read_span(fp, offset, length) for offset, length in spans]
+
+        members = segment.get("members")
+        path = self._sealed_path(segment["seq"])
+        if not members:
+            with gzip.open(path, "rb") as fp:
+                return [_read_span(fp, offset, length) for offset, length in spans]
+
+        starts = [member[0] for member in members]
+        lines = []
+        current = -1
+        data = b""
+        with path.open("rb") as raw:
+            for offset, length in spans:
+                index = bisect.bisect_right(starts, offset) - 1
+                if index != current:
+                    raw.seek(members[index][1])
+                    if index + 1 < len(members):
+                        compressed = raw.read(members[index + 1][1] - members[index][1])
+                    else:
+                        compressed = raw.read()
+                    data = gzip.decompress(compressed)
+                    current = index
+                start = offset - starts[index]
+                lines.append(data[start : start + length])
+        return lines
+
+    def seal_active(self) -> None:
+        """Move the active segment aside and seal it."""
 
-        entries: list[dict[str, Any]] = []
+        seq = self.active_seq
+        os.replace(self._log_path, self._plain_path(seq))
+        self._seal(seq)
+
+    def _plain_path(self, seq: int) -> Path:
+        return self._log_path.with_name(f"{self._log_path.name}.{seq:05d}")
+
+    def _sealed_path(self, seq: int) -> Path:
+        return self._log_path.with_name(f"{self._log_path.name}.{seq:05d}.gz")
+
+    def _seal(self, seq: int) -> None:
+        plain = self._plain_path(seq)
+        target = self._sealed_path(seq)
+        temporary = target.with_name(target.name + ".tmp")
+
+        segment: dict[str, Any] = {
+            "seq": seq,
+            "file": target.name,
+            "first_at": None,
+            "last_at": None,
+            "count": 0,
+            "kinds": {},
+            "bytes": 0,
+            # ``[first created_at, compressed offset]`` of every gzip member.
+            "checkpoints": [],
+            # ``[uncompressed offset, compressed offset]`` of every gzip member.
+            "members": [],
+        }
+        with plain.open("rb") as source, temporary.open("wb") as sink:
+            block: list[bytes] = []
+            block_size = 0
+            block_first_at = None
+            for line in source:
+                block.append(line)
+                block_size += len(line)
+                segment["bytes"] += len(line)
+                entry = _decode_line(line)
+                if entry is not None:
+                    segment["count"] += 1
+                    kind = str(entry.get("kind"))
+                    segment["kinds"][kind] = segment["kinds"].get(kind, 0) + 1
+                    created_at = entry.get("created_at")
+                    if created_at:
+                        segment["first_at"] = segment["first_at"] or created_at
+                        segment["last_at"] = created_at
+                        block_first_at = block_first_at or created_at
+                if block_size >= _CHECKPOINT_BYTES:
+                    _write_member(sink, block, block_first_at, segment)
+                    block, block_size, block_first_at = [], 0, None
+            if block:
+                _write_member(sink, block, block_first_at, segment)
+        os.replace(temporary, target)
+
+        self.sealed.append(segment)
+        self.sealed.sort(key=lambda item: item["seq"])
+        self.active_seq = max(self.active_seq, seq + 1)
+        self._save()
+        plain.unlink()
+
+    def _save(self) -> None:
+        temporary = self._manifest_path.with_name(self._manifest_path.name + ".tmp")
+        temporary.write_text(
+            json.dumps(
+                {"active_seq": self.active_seq, "segments": self.sealed},
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        os.replace(temporary, self._manifest_path)
+
+
+class _UserIndex:
+    """Persistent sidecar mapping user IDs to the locations of their lines.
+
+    The sidecar lives next to the log as ``<log>.users`` and holds one
+    ``user_id<TAB>segment<TAB>offset<TAB>length`` record per indexed line,
+    where offsets are uncompressed byte offsets inside that segment.  It is
+    only ever appended to, except when the log was replaced or truncated and
+    the index has to be rebuilt from scratch.  Callers must hold the database
+    lock.
+    """
+
+    def __init__(self, log_path: Path, segments: _Segments) -> None:
+        self._log_path = log_path
+        self._segments = segments
+        self._path = log_path.with_name(log_path.name + ".users")
+        self._locations: dict[int, list[tuple[int, int, int]]] = {}
+        # Bytes of the active segment covered by the index and its identity.
+        self._offset = 0
+        self._file_id: tuple[int, int] | None = None
+        self._loaded = False
+
+    def sync(self) -> None:
+        """Load the sidecar if needed and index whatever the log gained since."""
+
+        try:
+            stat = self._log_path.stat()
+        except FileNotFoundError:
+            self._reset()
+            return
+
+        if not self._loaded:
+            self._load(stat)
+        if _file_id(stat) != self._file_id or stat.st_size < self._offset:
+            self.rebuild()
+        elif stat.st_size > self._offset:
+            self._index_from(self._offset)
+
+    def rebuild(self) -> None:
+        """Discard the sidecar and index every segment again."""
+
+        self._reset()
+        self._loaded = True
+        self._path.write_text("", encoding="utf-8")
+        for segment in self._segments.sealed:
+            seq = segment["seq"]
+            records: list[tuple[int, int, int, int]] = []
+            offset = 0
+            for line in self._segments.iter_lines(seq):
+                entry = _decode_line(line)
+                if entry is not None and _is_user_id(entry.get("user_id")):
+                    records.append((entry["user_id"], seq, offset, len(line)))
+                offset += len(line)
+            self._write_records(records)
+        self._index_from(0)
+
+    def rolled(self, stat: os.stat_result) -> None:
+        """Point the index at the fresh active segment after a roll."""
+
+        if self._loaded:
+            self._offset = 0
+            self._file_id = _file_id(stat)
+
+    def add(
+        self, records: list[tuple[Any, int, int]], stat: os.stat_result
+    ) -> None:
+        """Record consecutive ``(user_id, offset, length)`` lines just appended."""
+
+        if not self._loaded or not records:
+            return
+        if records[0][1] != self._offset or _file_id(stat) != self._file_id:
+            # The index is behind; the next ``sync`` picks these lines up too.
+            return
+        _, offset, length = records[-1]
+        self._offset = offset + length
+        seq = self._segments.active_seq
+        self._write_records(
+            [
+                (user_id, seq, offset, length)
+                for user_id, offset, length in records
+                if _is_user_id(user_id)
+            ]
+        )
+
+    def locations(self, user_id: int) -> list[tuple[int, int, int]]:
+        """Return the ``(segment, offset, length)`` of every line of ``user_id``."""
+
+        return list(self._locations.get(user_id, []))
+
+    def read(self, user_id: int) -> list[dict[str, Any]] | None:
+        """Return the entries for ``user_id`` oldest first.
+
+        ``None`` means a location no longer matched the log and the index needs
+        to be rebuilt.
+        """
+
+        sealed = {segment["seq"]: segment for segment in self._segments.sealed}
+        return _read_user_lines(
+            self._segments,
+            user_id,
+            self.locations(user_id),
+            sealed,
+            self._segments.active_seq,
+        )
+
+    def _reset(self) -> None:
+        self._locations = {}
+        self._offset = 0
+        self._file_id = None
+
+    def _load(self, stat: os.stat_result) -> None:
+        self._loaded = True
+        self._reset()
+        if not self._path.exists():
+            return
+
+        active_seq = self._segments.active_seq
+        end = 0
+        last: tuple[int, int, int] | None = None
         with self._path.open("r", encoding="utf-8") as fp:
             for line in fp:
-                data = line.strip()
-                if not data:
-                    continue
                 try:
-                    entries.append(json.loads(data))
-                except json.JSONDecodeError:
-                    # Skip malformed lines but keep processing newer entries.
-                    continue
-        return entries
+                    user_id, seq, offset, length = map(int, line.split("\t"))
+                except ValueError:
+                    # Unreadable or written by an older layout; rebuild.
+                    self._reset()
+                    return
+                if seq > active_seq:
+                    self._reset()
+                    return
+                self._locations.setdefault(user_id, []).append((seq, offset, length))
+                if seq == active_seq and offset + length > end:
+                    end = offset + length
+                    last = (user_id, offset, length)
+
+        if last is not None:
+            # Spot-check the newest record: if it does not point at a line of
+            # that user the log was replaced and the sidecar is worthless.
+            user_id, offset, length = last
+            if end > stat.st_size or self._read_user_id(offset, length) != user_id:
+                self._reset()
+                return
+        self._offset = end
+        self._file_id = _file_id(stat)
+
+    def _read_user_id(self, offset: int, length: int) -> Any:
+        with self._log_path.open("rb") as fp:
+            fp.seek(offset)
+            entry = _decode_line(fp.read(length))
+        return None if entry is None else entry.get("user_id")
+
+    def _index_from(self, start: int) -> None:
+        seq = self._segments.active_seq
+        records: list[tuple[int, int, int, int]] = []
+        with self._log_path.open("rb") as fp:
+            stat = os.fstat(fp.fileno())
+            fp.seek(start)
+            offset = start
+            for line in fp:
+                if not line.endswith(b"\n"):
+                    # Partial line still being written; index it next time.
+                    break
+                entry = _decode_line(line)
+                if entry is not None and _is_user_id(entry.get("user_id")):
+                    records.append((entry["user_id"], seq, offset, len(line)))
+                offset += len(line)
+        self._offset = offset
+        self._file_id = _file_id(stat)
+        self._write_records(records)
+
+    def _write_records(self, records: list[tuple[int, int, int, int]]) -> None:
+        if not records:
+            return
+        for user_id, seq, offset, length in records:
+            self._locations.setdefault(user_id, []).append((seq, offset, length))
+        with self._path.open("a", encoding="utf-8") as fp:
+            fp.writelines(
+                f"{user_id}\t{seq}\t{offset}\t{length}\n"
+                for user_id, seq, offset, length in records
+            )
+
+
+def _write_member(
+    sink: BinaryIO,
+    lines: list[bytes],
+    first_at: str | None,
+    segment: dict[str, Any],
+) -> None:
+    """Write ``lines`` as one gzip member, recording where it starts.
+
+    ``segment["bytes"]`` must already include ``lines``.
+    """
+
+    data = b"".join(lines)
+    offset = sink.tell()
+    segment["members"].append([segment["bytes"] - len(data), offset])
+    if first_at is not None:
+        segment["checkpoints"].append([first_at, offset])
+    sink.write(gzip.compress(data))
+
+
+def _read_span(fp: BinaryIO, offset: int, length: int) -> bytes:
+    fp.seek(offset)
+    return fp.read(length)
+
+
+def _read_user_lines(
+    segments: _Segments,
+    user_id: int,
+    locations: list[tuple[int, int, int]],
+    sealed: dict[int, dict[str, Any]],
+    active_seq: int,
+) -> list[dict[str, Any]] | None:
+    """Read the indexed lines of ``user_id``, or ``None`` if one no longer matches."""
+
+    entries: list[dict[str, Any]] = []
+    start = 0
+    while start < len(locations):
+        seq = locations[start][0]
+        end = start
+        while end < len(locations) and locations[end][0] == seq:
+            end += 1
+        if seq != active_seq and seq not in sealed:
+            return None
+        try:
+            lines = segments.read_lines(
+                None if seq == active_seq else sealed[seq],
+                [(offset, length) for _, offset, length in locations[start:end]],
+            )
+        except (FileNotFoundError, EOFError, gzip.BadGzipFile):
+            return None
+        for line in lines:
+            entry = _decode_line(line)
+            if entry is None or entry.get("user_id") != user_id:
+                return None
+            entries.append(entry)
+        start = end
+    return entries
+
+
+def _segment_overlaps(
+    segment: dict[str, Any], start: datetime | None, end: datetime | None
+) -> bool:
+    """Return False if the manifest shows ``segment`` is outside ``[start, end)``."""
+
+    first_at = parse_created_at(segment.get("first_at"))
+    last_at = parse_created_at(segment.get("last_at"))
+    if start is not None and last_at is not None and last_at < start:
+        return False
+    if end is not None and first_at is not None and first_at >= end:
+        return False
+    return True
+
+
+def _entries_back_to(
+    lines: Iterable[bytes], start: datetime | None, end: datetime | None
+) -> Iterator[dict[str, Any]]:
+    """Yield the entries of newest-first ``lines`` created in ``[start, end)``.
+
+    Iteration stops at the first entry created before ``start``.
+    """
+
+    for line in lines:
+        entry = _decode_line(line)
+        if entry is None:
+            continue
+        created_at = parse_created_at(entry.get("created_at"))
+        if created_at is None or (end is not None and created_at >= end):
+            continue
+        if start is not None and created_at < start:
+            return
+        yield entry
+
+
+def _entries_between(
+    lines: Iterable[bytes], start: datetime | None, end: datetime | None
+) -> Iterator[dict[str, Any]]:
+    """Yield the entries of oldest-first ``lines`` created in ``[start, end)``.
+
+    Iteration stops at the first entry created at or after ``end``.
+    """
+
+    for line in lines:
+        entry = _decode_line(line)
+        if entry is None:
+            continue
+        created_at = parse_created_at(entry.get("created_at"))
+        if created_at is None or (start is not None and created_at < start):
+            continue
+        if end is not None and created_at >= end:
+            return
+        yield entry
+
+
+def _find_time(fp: BinaryIO, size: int, target: datetime) -> int:
+    """Return the offset of the first line created at or after ``target``.
+
+    ``fp`` holds lines in ``created_at`` order.  Each probe seeks to a byte
+    offset, realigns to the start of the next line and reads forward to the
+    first entry with a timestamp, so about ``log2(size)`` short reads are
+    needed.  Returns ``size`` if every entry is older than ``target``.
+    """
+
+    low, high = 0, size
+    while low < high:
+        middle = (low + high) // 2
+        created_at = _time_from(fp, _line_start(fp, middle), high)
+        if created_at is None or created_at >= target:
+            high = middle
+        else:
+            low = middle + 1
+    return _line_start(fp, low)
+
+
+def _line_start(fp: BinaryIO, position: int) -> int:
+    """Return the offset of the first line starting at or after ``position``."""
+
+    if position == 0:
+        return 0
+    fp.seek(position - 1)
+    fp.readline()
+    return fp.tell()
+
+
+def _time_from(fp: BinaryIO, position: int, limit: int) -> datetime | None:
+    """Return the ``created_at`` of the first dated entry between the offsets."""
+
+    fp.seek(position)
+    while position < limit:
+        line = fp.readline()
+        if not line.endswith(b"\n"):
+            return None
+        position += len(line)
+        entry = _decode_line(line)
+        if entry is not None:
+            created_at = parse_created_at(entry.get("created_at"))
+            if created_at is not None:
+                return created_at
+    return None
+
+
+def _is_user_id(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _extend_recent(
+    collected: dict[str, list[Mapping[str, Any]]],
+    remaining: dict[str, int],
+    entries: Iterable[Mapping[str, Any] | None],
+) -> None:
+    """Add newest-first ``entries`` to ``collected``, updating ``remaining``."""
+
+    found = _collect_recent(entries, remaining)
+    for kind, kind_entries in found.items():
+        collected[kind].extend(kind_entries)
+        remaining[kind] -= len(kind_entries)
+        if remaining[kind] <= 0:
+            del remaining[kind]
+
+
+def _collect_recent(
+    entries: Iterable[Mapping[str, Any] | None], limits: dict[str, int]
+) -> dict[str, list[Mapping[str, Any]]]:
+    """Partition newest-first ``entries`` by kind, stopping once ``limits`` are met."""
+
+    collected: dict[str, list[Mapping[str, Any]]] = {kind: [] for kind in limits}
+    pending = {kind for kind, limit in limits.items() if limit > 0}
+    if not pending:
+        return collected
+
+    for entry in entries:
+        if entry is None:
+            continue
+        kind = entry.get("kind")
+        if kind not in pending:
+            continue
+        collected[kind].append(entry)
+        if len(collected[kind]) >= limits[kind]:
+            pending.discard(kind)
+            if not pending:
+                break
+    return collected
+
+
+def _file_id(stat: os.stat_result) -> tuple[int, int]:
+    """Return a key identifying the file behind ``stat`` across renames."""
+
+    return (stat.st_dev, stat.st_ino)
+
+
+def iter_log_entries(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield the well-formed entries of a text log and its segments, oldest first.
+
+    Sealed segments listed in the manifest come first, then segments moved
+    aside by a roll that did not finish, then the log file itself.  Files are
+    only read; an interrupted roll is left for the bot to finish.
+    """
+
+    path = Path(path)
+    segments = _Segments(path)
+    segments.read_manifest()
+    known = {segment["seq"] for segment in segments.sealed}
+    sources: list[Callable[[], BinaryIO]] = [
+        partial(gzip.open, segments.path(segment["seq"]), "rb")
+        for segment in segments.sealed
+    ]
+    sources.extend(
+        partial(plain.open, "rb")
+        for seq, plain in segments.plain_segments()
+        if seq not in known
+    )
+    if path.exists():
+        sources.append(partial(path.open, "rb"))
+    for source in sources:
+        with source() as fp:
+            for line in fp:
+                entry = _decode_line(line)
+                if entry is not None and "kind" in entry:
+                    yield entry
+
+
+def _decode_line(line: str | bytes) -> dict[str, Any] | None:
+    """Parse a stored line, returning ``None`` for blank or malformed lines."""
+
+    data = line.strip()
+    if not data:
+        return None
+    try:
+        entry = json.loads(data)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # Skip malformed lines but keep processing newer entries.
+        return None
+    if not isinstance(entry, dict):
+        return None
+    return entry
+
 
+def format_entries(
+    entries: Iterable[Mapping[str, Any]], *, reason_limit: int | None = None
+) -> list[str]:
+    """Format database entries into Discord-friendly lines.
 
-def format_entries(entries: Iterable[dict[str, Any]]) -> list[str]:
-    """Format database entries into Discord-friendly lines."""
+    ``entries`` may be ``LogRecord`` objects or plain entry dicts.  Reasons
+    longer than ``reason_limit`` characters are cut with an ellipsis.
+    """
 
     formatted = []
     for entry in entries:
+        if not isinstance(entry, LogRecord):
+            entry = LogRecord.from_dict(entry)
+        reason = entry.reason or ""
+        if reason_limit is not None and len(reason) > reason_limit:
+            reason = reason[: reason_limit - 1].rstrip() + "…"
         details = [
-            f"• {entry['user_name']} (`{entry['user_id']}`)",
-            f"  - 처벌: {entry['punishment']}",
-            f"  - 사유: {entry['reason']}",
-            f"  - 담당자: {entry['moderator_name']} (`{entry['moderator_id']}`)",
+            f"• {entry.user_name} (`{entry.user_id}`)",
+            f"  - 처벌: {entry.punishment}",
+            f"  - 사유: {reason}",
+            f"  - 담당자: {entry.moderator_name} (`{entry.moderator_id}`)",
         ]
-        duration = entry.get("duration")
-        if duration:
-            details.append(f"  - 기간: {duration}")
-        timestamp = entry.get("created_at")
+        if entry.duration:
+            details.append(f"  - 기간: {entry.duration}")
+        timestamp = entry.created_at
         if timestamp:
             details.append(f"  - 기록일: {timestamp}")
         formatted.append("\n".join(details))
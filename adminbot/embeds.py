@@ -2,10 +2,25 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from typing import Iterable, Sequence
 
 import discord
 
+# Discord limits for the embeds attached to a single message.
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+# Discord limits for a single embed.
+MAX_FIELDS_PER_EMBED = 25
+MAX_FIELD_NAME_CHARS = 256
+MAX_FIELD_VALUE_CHARS = 1024
+# Reasons longer than this are cut when listing stored entries.
+MAX_LOGGED_REASON_CHARS = 300
+
+# Room kept free in every message for the ``n/m`` footer of multi-part results.
+_FOOTER_RESERVE = 16
+_ENTRY_SEPARATOR = "\n\n"
+
 
 def punishment_embed(
     *,
@@ -53,23 +68,322 @@ def release_embed(
     return embed
 
 
-def log_embed(*, punishments: list[str], releases: list[str]) -> discord.Embed:
-    """Build an embed summarising stored punishments and releases."""
+def log_embeds(
+    *, punishments: Sequence[str], releases: Sequence[str]
+) -> list[list[discord.Embed]]:
+    """Build the stored punishments and releases, grouped per message."""
+
+    return pack_entries(
+        title="처벌 로그",
+        colour=discord.Colour.purple(),
+        sections=[
+            ("최근 처벌", punishments, "저장된 처벌이 없습니다."),
+            ("최근 해제", releases, "저장된 해제 내역이 없습니다."),
+        ],
+    )
+
+
+def user_history_embeds(
+    *,
+    user: discord.Member | discord.User,
+    punishments: Sequence[str],
+    releases: Sequence[str],
+) -> list[list[discord.Embed]]:
+    """Build the stored history of a single user, grouped per message."""
+
+    return pack_entries(
+        title="유저 기록",
+        description=f"{user.mention} (`{user.id}`) 님의 처벌 및 해제 내역입니다.",
+        colour=discord.Colour.purple(),
+        sections=[
+            ("처벌 내역", punishments, "저장된 처벌이 없습니다."),
+            ("해제 내역", releases, "저장된 해제 내역이 없습니다."),
+        ],
+    )
+
+
+def active_punishments_embeds(
+    *, punishments: Sequence[str], total: int
+) -> list[list[discord.Embed]]:
+    """Build the list of punishments in force, grouped per message."""
+
+    shown = f"만료가 가까운 {len(punishments)}건을 표시합니다." if punishments else ""
+    return pack_entries(
+        title="처벌 현황",
+        description=f"현재 {total}건의 처벌이 적용 중입니다. {shown}".strip(),
+        colour=discord.Colour.orange(),
+        sections=[("적용 중인 처벌", punishments, "적용 중인 처벌이 없습니다.")],
+    )
+
+
+def search_embeds(
+    *, query: str, results: Sequence[str]
+) -> list[list[discord.Embed]]:
+    """Build the matches of a log search, best first, grouped per message."""
+
+    return pack_entries(
+        title="로그 검색",
+        description=_truncate(f"검색어: {query}", MAX_FIELD_VALUE_CHARS),
+        colour=discord.Colour.purple(),
+        sections=[("검색 결과", results, "일치하는 기록이 없습니다.")],
+    )
+
+
+def stats_embeds(
+    *,
+    start: date,
+    end: date,
+    punishments: int,
+    releases: int,
+    types: Sequence[tuple[str, int]],
+    moderators: Sequence[tuple[str, int, int, int]],
+    days: Sequence[tuple[date, int, int]],
+) -> list[list[discord.Embed]]:
+    """Build the moderation statistics of a period, grouped per message."""
+
+    ratio = f"{releases / punishments:.1%}" if punishments else "-"
+    return pack_entries(
+        title="처벌 통계",
+        description=(
+            f"{start.isoformat()} ~ {end.isoformat()}\n"
+            f"처벌 {punishments}건 · 해제 {releases}건 · 처벌 대비 해제 {ratio}"
+        ),
+        colour=discord.Colour.teal(),
+        sections=[
+            (
+                "처벌 종류별",
+                [f"• {name or '(없음)'}: {count}건" for name, count in types],
+                "기간 내 처벌이 없습니다.",
+            ),
+            (
+                "담당자별",
+                [
+                    f"• {name} (`{moderator_id}`): 처벌 {punished}건 · 해제 {released}건"
+                    for name, moderator_id, punished, released in moderators
+                ],
+                "기간 내 기록이 없습니다.",
+            ),
+            (
+                "일별",
+                [
+                    f"{day.isoformat()}: 처벌 {punished} · 해제 {released}"
+                    for day, punished, released in days
+                ],
+                "기간 내 기록이 없습니다.",
+            ),
+        ],
+    )
+
+
+def pack_entries(
+    *,
+    title: str,
+    sections: Sequence[tuple[str, Sequence[str], str]],
+    description: str | None = None,
+    colour: discord.Colour | None = None,
+) -> list[list[discord.Embed]]:
+    """Lay formatted entries out over as few messages as Discord allows.
+
+    ``sections`` holds ``(field name, entries, text shown when empty)``.
+    Entries are joined into fields of up to 1024 characters, fields are added
+    to embeds of up to 25 fields and embeds to messages until the message
+    reaches 6000 characters or 10 embeds.  A section that does not fit in one
+    field continues in a ``(계속)`` field, and an entry that is longer than a
+    field on its own is cut short.  The result lists the embeds of every
+    message in order.
+    """
+
+    packer = _MessagePacker(title=title, description=description, colour=colour)
+    for name, entries, empty in sections:
+        name = _truncate(name, MAX_FIELD_NAME_CHARS)
+        if not entries:
+            packer.add_field(name, empty)
+            continue
+
+        field_name = name
+        chunk: list[str] = []
+        size = 0
+        for text in entries:
+            text = _truncate(text, MAX_FIELD_VALUE_CHARS)
+            if not chunk:
+                # Open the field where its first entry fits so that the rest
+                # of the field is measured against the right message.
+                packer.reserve(len(field_name) + len(text))
+            added = len(text) + (len(_ENTRY_SEPARATOR) if chunk else 0)
+            if chunk and size + added > packer.capacity(field_name):
+                packer.add_field(field_name, _ENTRY_SEPARATOR.join(chunk))
+                field_name = _truncate(f"{name} (계속)", MAX_FIELD_NAME_CHARS)
+                packer.reserve(len(field_name) + len(text))
+                chunk, size, added = [], 0, len(text)
+            chunk.append(text)
+            size += added
+        packer.add_field(field_name, _ENTRY_SEPARATOR.join(chunk))
+    return packer.finish()
+
+
+class _MessagePacker:
+    """Greedy placement of fields into embeds and messages for :func:`pack_entries`."""
+
+    def __init__(
+        self,
+        *,
+        title: str,
+        description: str | None,
+        colour: discord.Colour | None,
+    ) -> None:
+        self._title = title
+        self._description = description
+        self._colour = colour
+        self._messages: list[list[discord.Embed]] = []
+        self._embed: discord.Embed | None = None
+        # Characters still available in the current message.
+        self._budget = 0
+
+    def capacity(self, name: str) -> int:
+        """Return how long the value of a field called ``name`` may be right now."""
+
+        return min(MAX_FIELD_VALUE_CHARS, self._budget - len(name))
+
+    def reserve(self, length: int) -> None:
+        """Make sure a field of ``length`` characters fits the current embed."""
+
+        if self._embed is None or length > self._budget:
+            self._start_message()
+        elif len(self._embed.fields) >= MAX_FIELDS_PER_EMBED:
+            if len(self._messages[-1]) >= MAX_EMBEDS_PER_MESSAGE:
+                self._start_message()
+            else:
+                self._embed = discord.Embed(colour=self._colour)
+                self._messages[-1].append(self._embed)
+
+    def add_field(self, name: str, value: str) -> None:
+        self.reserve(len(name) + len(value))
+        assert self._embed is not None
+        self._embed.add_field(name=name, value=value, inline=False)
+        self._budget -= len(name) + len(value)
+
+    def finish(self) -> list[list[discord.Embed]]:
+        if len(self._messages) > 1:
+            total = len(self._messages)
+            for number, message in enumerate(self._messages, start=1):
+                message[-1].set_footer(text=f"{number}/{total}")
+        return self._messages
+
+    def _start_message(self) -> None:
+        self._embed = discord.Embed(
+            title=self._title,
+            # Only the first message carries the description.
+            description=None if self._messages else self._description,
+            colour=self._colour,
+            timestamp=datetime.now(timezone.utc),
+        )
+        self._messages.append([self._embed])
+        self._budget = MAX_EMBED_CHARS_PER_MESSAGE - _FOOTER_RESERVE - len(self._embed)
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut ``text`` to ``limit`` characters, marking the cut with an ellipsis."""
+
+    if len(text) <= limit:
+        return text
+    return text[: limit - 1].rstrip() + "…"
+
+
+def pack_embeds(embeds: Iterable[discord.Embed]) -> list[list[discord.Embed]]:
+    """Group embeds into as few messages as Discord's per-message limits allow."""
+
+    messages: list[list[discord.Embed]] = []
+    current: list[discord.Embed] = []
+    size = 0
+    for embed in embeds:
+        length = len(embed)
+        if current and (
+            len(current) >= MAX_EMBEDS_PER_MESSAGE
+            or size + length > MAX_EMBED_CHARS_PER_MESSAGE
+        ):
+            messages.append(current)
+            current, size = [], 0
+        current.append(embed)
+        size += length
+    if current:
+        messages.append(current)
+    return messages
+
+
+def log_page_embed(*, entries: list[tuple[str, str]], page: int) -> discord.Embed:
+    """Build one page of the log viewer from ``(label, formatted entry)`` pairs."""
 
     embed = discord.Embed(
         title="처벌 로그",
         colour=discord.Colour.purple(),
         timestamp=datetime.now(timezone.utc),
     )
+    for label, text in entries:
+        embed.add_field(
+            name=label, value=_truncate(text, MAX_FIELD_VALUE_CHARS), inline=False
+        )
+    if not entries:
+        embed.description = "저장된 기록이 없습니다."
+    embed.set_footer(text=f"{page} 페이지")
+    return embed
+
 
-    if punishments:
-        embed.add_field(name="최근 처벌", value="\n\n".join(punishments), inline=False)
-    else:
-        embed.add_field(name="최근 처벌", value="저장된 처벌이 없습니다.", inline=False)
+def _format_seconds(value: float | None) -> str:
+    if value is None:
+        return "-"
+    if value < 1:
+        return f"{value * 1000:.0f}ms"
+    return f"{value:.2f}s"
 
-    if releases:
-        embed.add_field(name="최근 해제", value="\n\n".join(releases), inline=False)
-    else:
-        embed.add_field(name="최근 해제", value="저장된 해제 내역이 없습니다.", inline=False)
 
+def status_embed(
+    *,
+    commands: Sequence[tuple[str, int, float | None, float | None]],
+    stages: Sequence[tuple[str, str, float | None]],
+    errors: int,
+    dm_failures: int,
+    malformed_lines: int,
+    log_bytes: int,
+    outbox_pending: int,
+    append_p99: float | None,
+) -> discord.Embed:
+    """Build the bot status summary.
+
+    ``commands`` holds ``(command, count, p50, p99)`` and ``stages`` holds
+    ``(command, stage, p99)`` with latencies in seconds.
+    """
+
+    embed = discord.Embed(
+        title="봇 상태",
+        colour=discord.Colour.green(),
+        timestamp=datetime.now(timezone.utc),
+    )
+    command_lines = [
+        f"`{name}` {count}회 · p50 {_format_seconds(p50)} · p99 {_format_seconds(p99)}"
+        for name, count, p50, p99 in commands
+    ]
+    embed.add_field(
+        name="명령어 처리 시간",
+        value=_truncate(
+            "\n".join(command_lines) or "아직 실행된 명령어가 없습니다.",
+            MAX_FIELD_VALUE_CHARS,
+        ),
+        inline=False,
+    )
+    stage_lines = [
+        f"`{name}` {stage}: p99 {_format_seconds(p99)}" for name, stage, p99 in stages
+    ]
+    embed.add_field(
+        name="가장 느린 단계",
+        value=_truncate(
+            "\n".join(stage_lines) or "기록이 없습니다.", MAX_FIELD_VALUE_CHARS
+        ),
+        inline=False,
+    )
+    embed.add_field(name="명령어 오류", value=f"{errors}회")
+    embed.add_field(name="DM 실패", value=f"{dm_failures}건")
+    embed.add_field(name="전송 대기", value=f"{outbox_pending}건")
+    embed.add_field(name="로그 크기", value=f"{log_bytes / (1024 * 1024):.1f} MiB")
+    embed.add_field(name="깨진 로그 줄", value=f"{malformed_lines}줄")
+    embed.add_field(name="기록 p99", value=_format_seconds(append_p99))
     return embed
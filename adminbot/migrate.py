@@ -0,0 +1,87 @@
+"""One-shot import of a JSON-lines text log into the SQLite backend.
+
+Usage::
+
+    python -m adminbot.migrate hanbyeol_logs.txt hanbyeol_logs.db
+
+The sealed segments listed in the log's manifest are read first, oldest
+first, followed by the active log file.  The source is streamed line by line
+and inserted in fixed-size batches inside a single transaction, so memory use
+does not depend on the size of the log.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Any, Iterator
+
+from .database import iter_log_entries
+from .sqlite_storage import connect, insert_entries
+
+_BATCH_SIZE = 1000
+
+
+def iter_text_log(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield the well-formed entries of a text log, skipping malformed lines.
+
+    Entries of the sealed ``<log>.NNNNN.gz`` segments come before those of the
+    log file itself; the source files are never modified.
+    """
+
+    return iter_log_entries(path)
+
+
+def import_text_log(
+    source: str | Path, destination: str | Path, *, batch_size: int = _BATCH_SIZE
+) -> int:
+    """Copy every entry of ``source`` into the SQLite file ``destination``.
+
+    Returns the number of imported entries.  The destination must not contain
+    entries yet so that running the import twice cannot duplicate history.
+    """
+
+    connection = connect(destination)
+    try:
+        (existing,) = connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+        if existing:
+            raise RuntimeError(f"{destination} 에 이미 {existing}개의 기록이 있습니다.")
+
+        imported = 0
+        batch: list[dict[str, Any]] = []
+        with connection:
+            for entry in iter_text_log(source):
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    insert_entries(connection, batch)
+                    imported += len(batch)
+                    batch.clear()
+            insert_entries(connection, batch)
+            imported += len(batch)
+        return imported
+    finally:
+        connection.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="텍스트 로그 파일을 SQLite 데이터베이스로 옮깁니다."
+    )
+    parser.add_argument("source", help="기존 텍스트 로그 파일 (예: hanbyeol_logs.txt)")
+    parser.add_argument("destination", help="새 SQLite 파일 (예: hanbyeol_logs.db)")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=_BATCH_SIZE,
+        help="한 번에 삽입할 기록 수",
+    )
+    args = parser.parse_args(argv)
+
+    imported = import_text_log(
+        args.source, args.destination, batch_size=args.batch_size
+    )
+    print(f"{imported}개의 기록을 {args.destination} 로 옮겼습니다.")
+
+
+if __name__ == "__main__":
+    main()
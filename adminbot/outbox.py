@@ -0,0 +1,304 @@
+"""Durable outbox for announcements and DMs sent by the bot."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import random
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+log = logging.getLogger(__name__)
+
+# Backoff applied to transient failures: the first retry waits about
+# ``_BASE_BACKOFF`` seconds and every further attempt doubles it.
+_BASE_BACKOFF = 2.0
+_MAX_BACKOFF = 600.0
+# Rewrite the journal once this many delivered items have piled up in it.
+_COMPACT_AFTER = 1000
+
+
+class RetryAfter(Exception):
+    """Raised by a delivery callback when the API asked us to wait."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__(f"retry after {delay:.2f}s")
+        self.delay = delay
+
+
+class PermanentFailure(Exception):
+    """Raised by a delivery callback when retrying can never succeed."""
+
+
+@dataclass(slots=True)
+class OutboxItem:
+    """A pending message to a channel or a user."""
+
+    target: str
+    target_id: int
+    content: str | None = None
+    embed: dict[str, Any] | None = None
+    embeds: list[dict[str, Any]] | None = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+
+
+class Outbox:
+    """Journal-backed queue of deliveries drained by a background dispatcher.
+
+    Every item is appended to a JSON-lines journal before :meth:`enqueue`
+    returns and a ``done`` marker is appended once it was delivered or given
+    up on, so items still pending when the bot stops are resumed by the next
+    :meth:`start`.  Channel posts and DMs are scheduled in separate lanes
+    running at most ``channel_concurrency`` and ``concurrency`` deliveries at
+    once, so announcements never queue behind a burst of DMs.  Rate limit
+    responses are honoured and other transient failures are retried with
+    exponential backoff up to ``max_attempts`` times.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        concurrency: int = 4,
+        channel_concurrency: int = 2,
+        max_attempts: int = 8,
+    ) -> None:
+        self._path = Path(path)
+        self._max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._items: dict[str, OutboxItem] = {}
+        self._results: dict[str, asyncio.Future[bool]] = {}
+        # Per lane, ``(due, sequence, item id)``; the sequence keeps FIFO
+        # order among items that are due at the same time.  The channel lane
+        # comes first so that it is dispatched first.
+        self._schedules: dict[str, list[tuple[float, int, str]]] = {
+            "channel": [],
+            "user": [],
+        }
+        self._slots = {
+            "channel": asyncio.Semaphore(channel_concurrency),
+            "user": asyncio.Semaphore(concurrency),
+        }
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+        self._deliver: Callable[[OutboxItem], Awaitable[None]] | None = None
+        self._dispatcher: asyncio.Task[None] | None = None
+        self._in_flight: set[asyncio.Task[None]] = set()
+        self._delivered_since_compaction = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of items that have not been delivered or given up on."""
+
+        return len(self._items)
+
+    async def start(self, deliver: Callable[[OutboxItem], Awaitable[None]]) -> None:
+        """Resume items left in the journal and start dispatching."""
+
+        self._deliver = deliver
+        for item in await asyncio.to_thread(self._load):
+            if item.id not in self._items:
+                self._items[item.id] = item
+                self._schedule_item(item, 0.0)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop dispatching; undelivered items stay in the journal."""
+
+        tasks = list(self._in_flight)
+        if self._dispatcher is not None:
+            tasks.append(self._dispatcher)
+            self._dispatcher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def enqueue(
+        self,
+        *,
+        target: str,
+        target_id: int,
+        content: str | None = None,
+        embed: dict[str, Any] | None = None,
+        embeds: list[dict[str, Any]] | None = None,
+    ) -> asyncio.Future[bool]:
+        """Persist a delivery and schedule it.
+
+        The returned future resolves to ``True`` once the item was delivered
+        and to ``False`` if it was given up on.
+        """
+
+        item = OutboxItem(
+            target=target,
+            target_id=target_id,
+            content=content,
+            embed=embed,
+            embeds=embeds,
+        )
+        (future,) = await self.enqueue_many([item])
+        return future
+
+    async def enqueue_many(self, items: list[OutboxItem]) -> list[asyncio.Future[bool]]:
+        """Persist several deliveries with a single journal write."""
+
+        # Register the items before journaling them so a concurrent compaction
+        # cannot drop the lines we are about to write.
+        for item in items:
+            self._items[item.id] = item
+        try:
+            await asyncio.to_thread(
+                self._append, [{"op": "add", **asdict(item)} for item in items]
+            )
+        except BaseException:
+            for item in items:
+                self._items.pop(item.id, None)
+            raise
+
+        loop = asyncio.get_running_loop()
+        futures: list[asyncio.Future[bool]] = []
+        for item in items:
+            future: asyncio.Future[bool] = loop.create_future()
+            self._results[item.id] = future
+            futures.append(future)
+            self._schedule_item(item, 0.0)
+        return futures
+
+    def _schedule_item(self, item: OutboxItem, delay: float) -> None:
+        due = asyncio.get_running_loop().time() + delay
+        self._sequence += 1
+        heapq.heappush(self._schedules[_lane(item)], (due, self._sequence, item.id))
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            for lane, schedule in self._schedules.items():
+                slots = self._slots[lane]
+                while schedule and schedule[0][0] <= loop.time() and not slots.locked():
+                    _, _, item_id = heapq.heappop(schedule)
+                    item = self._items.get(item_id)
+                    if item is None:
+                        continue
+                    await slots.acquire()
+                    task = asyncio.create_task(self._attempt(item))
+                    self._in_flight.add(task)
+                    task.add_done_callback(self._in_flight.discard)
+
+            # Lanes without a free slot are woken up by the next delivery
+            # that finishes in them.
+            due = [
+                schedule[0][0]
+                for lane, schedule in self._schedules.items()
+                if schedule and not self._slots[lane].locked()
+            ]
+            timeout = max(0.0, min(due) - loop.time()) if due else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _attempt(self, item: OutboxItem) -> None:
+        assert self._deliver is not None
+        try:
+            item.attempts += 1
+            try:
+                await self._deliver(item)
+            except RetryAfter as exc:
+                # Rate limits are not the item's fault; do not count them.
+                item.attempts -= 1
+                self._schedule_item(item, exc.delay)
+            except PermanentFailure as exc:
+                log.warning("Dropping outbox item %s: %s", item.id, exc)
+                await self._finish(item, delivered=False)
+            except Exception as exc:
+                if item.attempts >= self._max_attempts:
+                    log.warning(
+                        "Giving up on outbox item %s after %d attempts: %s",
+                        item.id,
+                        item.attempts,
+                        exc,
+                    )
+                    await self._finish(item, delivered=False)
+                else:
+                    backoff = min(_MAX_BACKOFF, _BASE_BACKOFF * 2 ** (item.attempts - 1))
+                    self._schedule_item(item, backoff * random.uniform(0.5, 1.0))
+            else:
+                await self._finish(item, delivered=True)
+        finally:
+            self._slots[_lane(item)].release()
+            self._wakeup.set()
+
+    async def _finish(self, item: OutboxItem, *, delivered: bool) -> None:
+        # Forget the item before journaling its ``done`` marker: writing the
+        # marker may compact the journal from ``_items``, and an item still
+        # listed there would be rewritten without the marker and come back
+        # on the next start.
+        self._items.pop(item.id, None)
+        try:
+            await asyncio.to_thread(self._append, [{"op": "done", "id": item.id}])
+        finally:
+            future = self._results.pop(item.id, None)
+            if future is not None and not future.done():
+                future.set_result(delivered)
+
+    def _append(self, records: list[dict[str, Any]]) -> None:
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with self._path.open("a", encoding="utf-8") as fp:
+                fp.write(data)
+            done = sum(record["op"] == "done" for record in records)
+            if done:
+                self._delivered_since_compaction += done
+                if self._delivered_since_compaction >= _COMPACT_AFTER:
+                    self._compact_locked(list(self._items.values()))
+
+    def _load(self) -> list[OutboxItem]:
+        """Replay the journal and rewrite it with only the pending items."""
+
+        with self._lock:
+            if not self._path.exists():
+                return []
+
+            pending: dict[str, OutboxItem] = {}
+            with self._path.open("r", encoding="utf-8") as fp:
+                for line in fp:
+                    try:
+                        record = json.loads(line)
+                        op = record.pop("op")
+                    except (json.JSONDecodeError, AttributeError, KeyError):
+                        continue
+                    if op == "add":
+                        try:
+                            item = OutboxItem(**record)
+                        except TypeError:
+                            continue
+                        pending[item.id] = item
+                    elif op == "done":
+                        pending.pop(record.get("id"), None)
+
+            self._compact_locked(list(pending.values()))
+            return list(pending.values())
+
+    def _compact_locked(self, items: list[OutboxItem]) -> None:
+        temporary = self._path.with_name(self._path.name + ".tmp")
+        with temporary.open("w", encoding="utf-8") as fp:
+            for item in items:
+                fp.write(json.dumps({"op": "add", **asdict(item)}, ensure_ascii=False) + "\n")
+        os.replace(temporary, self._path)
+        self._delivered_since_compaction = 0
+
+
+def _lane(item: OutboxItem) -> str:
+    """Return the dispatch lane of ``item``."""
+
+    return "channel" if item.target == "channel" else "user"
@@ -0,0 +1,296 @@
+"""Punishments that are currently in force and when they run out.
+
+:class:`ActivePunishments` is a materialised view over the log: it is rebuilt
+once from every stored entry and then kept current by applying each new entry
+as it is logged.  Punishments with a parseable duration are also kept in a
+heap ordered by expiry, so finding the next one to lift never scans the view.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Mapping
+
+from .storage import parse_created_at
+
+log = logging.getLogger(__name__)
+
+# Durations that explicitly never run out.
+_PERMANENT = {"영구", "영구정지", "무기한", "permanent", "perm", "forever", "indefinite"}
+
+_UNITS = {
+    "초": timedelta(seconds=1),
+    "분": timedelta(minutes=1),
+    "시간": timedelta(hours=1),
+    "일": timedelta(days=1),
+    "주": timedelta(weeks=1),
+    "주일": timedelta(weeks=1),
+    "개월": timedelta(days=30),
+    "달": timedelta(days=30),
+    "년": timedelta(days=365),
+    "s": timedelta(seconds=1),
+    "sec": timedelta(seconds=1),
+    "second": timedelta(seconds=1),
+    "m": timedelta(minutes=1),
+    "min": timedelta(minutes=1),
+    "minute": timedelta(minutes=1),
+    "h": timedelta(hours=1),
+    "hr": timedelta(hours=1),
+    "hour": timedelta(hours=1),
+    "d": timedelta(days=1),
+    "day": timedelta(days=1),
+    "w": timedelta(weeks=1),
+    "wk": timedelta(weeks=1),
+    "week": timedelta(weeks=1),
+    "mo": timedelta(days=30),
+    "month": timedelta(days=30),
+    "y": timedelta(days=365),
+    "yr": timedelta(days=365),
+    "year": timedelta(days=365),
+}
+# Longest units first so that ``min`` is not read as ``m`` followed by ``in``.
+_UNIT_PATTERN = "|".join(sorted(map(re.escape, _UNITS), key=len, reverse=True))
+_DURATION_PART = re.compile(
+    rf"(\d+(?:\.\d+)?)\s*({_UNIT_PATTERN})(?:s\b|(?![a-z]))(?:\s*(?:간|동안))?",
+    re.IGNORECASE,
+)
+# Text allowed between the parts of a compound duration such as "1시간 30분".
+_DURATION_GLUE = re.compile(r"[\s,+]*(?:and|및)?[\s,+]*", re.IGNORECASE)
+
+
+def parse_duration(text: str | None) -> timedelta | None:
+    """Return the length of a duration such as ``7일`` or ``1h 30m``.
+
+    Korean and English units can be combined (``1일 12시간``, ``2 days``).
+    ``None`` is returned for permanent punishments, for an empty duration and
+    for text that is not entirely made of durations, since such punishments
+    have no expiry the bot could act on.
+    """
+
+    if not text:
+        return None
+    text = text.strip().lower()
+    if text in _PERMANENT:
+        return None
+
+    total = timedelta()
+    position = 0
+    for match in _DURATION_PART.finditer(text):
+        if _DURATION_GLUE.fullmatch(text, position, match.start()) is None:
+            return None
+        try:
+            total += float(match.group(1)) * _UNITS[match.group(2).lower()]
+        except OverflowError:
+            return None
+        position = match.end()
+    if position == 0 or _DURATION_GLUE.fullmatch(text, position) is None:
+        return None
+    return total if total > timedelta() else None
+
+
+@dataclass(slots=True)
+class ActivePunishment:
+    """A punishment that has not been released yet."""
+
+    user_id: int
+    user_name: str
+    punishment: str
+    reason: str
+    duration: str | None
+    moderator_id: int
+    moderator_name: str
+    created_at: datetime | None
+    # ``None`` when the punishment does not run out by itself.
+    expires_at: datetime | None
+
+
+class ActivePunishments:
+    """Punishments in force, keyed by user and punishment type.
+
+    A release lifts the punishment of the same type for that user.  Older
+    releases did not always repeat the punishment text exactly, so a release
+    that matches nothing lifts the user's only active punishment if there is
+    exactly one.  Punishing a user again with the same type replaces the
+    earlier punishment and its expiry.
+    """
+
+    def __init__(self) -> None:
+        self._active: dict[tuple[int, str], ActivePunishment] = {}
+        self._by_user: dict[int, set[str]] = {}
+        # ``(expires_at, sequence, punishment)``; entries whose punishment was
+        # released or replaced are skipped when they reach the top.
+        self._heap: list[tuple[datetime, int, ActivePunishment]] = []
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def apply_many(self, entries: Iterable[Mapping[str, Any]]) -> None:
+        """Apply stored entries in the order they were logged."""
+
+        for entry in entries:
+            self.apply(entry)
+
+    def apply(self, entry: Mapping[str, Any]) -> None:
+        """Update the view with a single stored entry.
+
+        Entries without a usable user or moderator ID are logged and skipped.
+        """
+
+        kind = entry.get("kind")
+        if kind not in ("punishment", "release"):
+            return
+        try:
+            user_id = int(entry["user_id"])
+            moderator_id = (
+                int(entry.get("moderator_id") or 0) if kind == "punishment" else 0
+            )
+        except (KeyError, TypeError, ValueError):
+            log.warning("Skipping malformed %s entry: %r", kind, entry)
+            return
+        punishment = str(entry.get("punishment") or "")
+        if kind == "release":
+            self._release(user_id, punishment)
+            return
+
+        created_at = parse_created_at(entry.get("created_at"))
+        duration = entry.get("duration")
+        if duration is not None:
+            duration = str(duration)
+        length = parse_duration(duration)
+        expires_at = None
+        if length is not None and created_at is not None:
+            try:
+                expires_at = created_at + length
+            except OverflowError:
+                pass
+        self._add(
+            ActivePunishment(
+                user_id=user_id,
+                user_name=str(entry.get("user_name") or user_id),
+                punishment=punishment,
+                reason=str(entry.get("reason") or ""),
+                duration=duration,
+                moderator_id=moderator_id,
+                moderator_name=str(entry.get("moderator_name") or ""),
+                created_at=created_at,
+                expires_at=expires_at,
+            )
+        )
+
+    def next_expiry(self) -> datetime | None:
+        """Return when the next punishment runs out, if any will."""
+
+        heap = self._heap
+        while heap and not self._is_current(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_expired(self, now: datetime) -> list[ActivePunishment]:
+        """Return every punishment that ran out by ``now``, soonest first.
+
+        The punishments leave the expiry schedule but stay active until their
+        release is logged and applied, so each one is returned once; use
+        :meth:`reschedule` to try again later if lifting one failed.
+        """
+
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            item = heapq.heappop(heap)
+            if self._is_current(item):
+                expired.append(item[2])
+        return expired
+
+    def discard_expired(self, before: datetime) -> int:
+        """Drop every punishment that ran out by ``before`` without lifting it.
+
+        Used for punishments that expired before the bot started tracking
+        expiries; return how many were dropped.
+        """
+
+        dropped = 0
+        heap = self._heap
+        while heap and heap[0][0] <= before:
+            item = heapq.heappop(heap)
+            if self._is_current(item):
+                self._discard(item[2])
+                dropped += 1
+        return dropped
+
+    def reschedule(self, item: ActivePunishment, expires_at: datetime) -> None:
+        """Schedule ``item`` to expire at ``expires_at`` if it is still active."""
+
+        if self._active.get((item.user_id, item.punishment)) is item:
+            item.expires_at = expires_at
+            self._push(item)
+
+    def active(self) -> list[ActivePunishment]:
+        """Return the active punishments, soonest to expire first."""
+
+        return sorted(
+            self._active.values(),
+            key=lambda item: (
+                item.expires_at is None,
+                item.expires_at or datetime.max,
+                item.created_at or datetime.min,
+            ),
+        )
+
+    def _is_current(self, item: tuple[datetime, int, ActivePunishment]) -> bool:
+        expires_at, _, punishment = item
+        return (
+            self._active.get((punishment.user_id, punishment.punishment)) is punishment
+            and punishment.expires_at == expires_at
+        )
+
+    def _add(self, item: ActivePunishment) -> None:
+        self._active[(item.user_id, item.punishment)] = item
+        self._by_user.setdefault(item.user_id, set()).add(item.punishment)
+        if item.expires_at is not None:
+            self._push(item)
+
+    def _push(self, item: ActivePunishment) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (item.expires_at, self._sequence, item))
+
+    def _release(self, user_id: int, punishment: str) -> None:
+        item = self._active.get((user_id, punishment))
+        if item is None:
+            punishments = self._by_user.get(user_id)
+            if not punishments or len(punishments) != 1:
+                return
+            item = self._active[(user_id, next(iter(punishments)))]
+        self._discard(item)
+
+    def _discard(self, item: ActivePunishment) -> None:
+        del self._active[(item.user_id, item.punishment)]
+        punishments = self._by_user[item.user_id]
+        punishments.discard(item.punishment)
+        if not punishments:
+            del self._by_user[item.user_id]
+
+
+def format_active_punishments(items: Iterable[ActivePunishment]) -> list[str]:
+    """Format active punishments into Discord-friendly lines."""
+
+    formatted = []
+    for item in items:
+        details = [
+            f"• {item.user_name} (`{item.user_id}`)",
+            f"  - 처벌: {item.punishment}",
+            f"  - 담당자: {item.moderator_name} (`{item.moderator_id}`)",
+        ]
+        if item.expires_at is not None:
+            timestamp = int(item.expires_at.timestamp())
+            details.append(f"  - 만료: <t:{timestamp}:f> (<t:{timestamp}:R>)")
+        elif item.duration:
+            details.append(f"  - 기간: {item.duration} (자동 해제 없음)")
+        else:
+            details.append("  - 기간: 지정되지 않음")
+        formatted.append("\n".join(details))
+    return formatted
@@ -0,0 +1,171 @@
+"""Character bigram search over the reasons and punishments of log entries.
+
+Splitting text into overlapping two-character grams works for Hangul without
+a morphological analyser: ``사기 링크`` becomes ``사기`` and ``링크``, and a
+query matches every entry that shares its grams.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from array import array
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+
+def bigrams(text: str) -> set[str]:
+    """Return the distinct two-character grams of every word in ``text``.
+
+    Grams never span whitespace and case is ignored, so single-character
+    words contribute nothing.
+    """
+
+    grams: set[str] = set()
+    for word in text.casefold().split():
+        grams.update(word[index : index + 2] for index in range(len(word) - 1))
+    return grams
+
+
+def _entry_grams(entry: Mapping[str, Any]) -> set[str]:
+    return bigrams(f"{entry.get('punishment') or ''} {entry.get('reason') or ''}")
+
+
+class SearchIndex:
+    """Inverted index from bigrams to the positions of matching entries.
+
+    Positions refer to the list of entries passed to :meth:`sync`, which must
+    only grow at the end.  The index is persisted as ``<log>.search`` with one
+    ``position<TAB>grams`` line per entry that has any grams; the file is only
+    appended to, except when the entries no longer match it and it is written
+    again from scratch.  Callers are responsible for locking.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._postings: dict[str, array] = {}
+        # Number of entries covered by the index.
+        self._count = 0
+        # Position and grams of the newest indexed entry, used to notice a
+        # log that was rewritten underneath the sidecar.
+        self._last: tuple[int, frozenset[str]] | None = None
+        self._loaded = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def sync(self, entries: Sequence[Mapping[str, Any]]) -> None:
+        """Index whatever ``entries`` gained since the last call."""
+
+        if not self._loaded:
+            self._load()
+        if not self._matches(entries):
+            self._reset()
+            self._path.write_text("", encoding="utf-8")
+        if len(entries) > self._count:
+            self._index(entries, self._count)
+
+    def search(self, query: str, limit: int) -> list[int]:
+        """Return the positions of the best matches for ``query``, best first.
+
+        Entries score the inverse document frequency of every query gram they
+        contain, so rare grams such as parts of a link weigh more than common
+        words.  Entries sharing fewer than half of the query grams are left
+        out, and equal scores favour newer entries.
+        """
+
+        grams = bigrams(query)
+        if not grams or limit <= 0:
+            return []
+
+        total = max(self._count, 1)
+        scores: dict[int, float] = {}
+        matched: dict[int, int] = {}
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if not postings:
+                continue
+            weight = math.log(1 + total / len(postings))
+            for position in postings:
+                scores[position] = scores.get(position, 0.0) + weight
+                matched[position] = matched.get(position, 0) + 1
+
+        required = (len(grams) + 1) // 2
+        candidates = (
+            (score, position)
+            for position, score in scores.items()
+            if matched[position] >= required
+        )
+        return [position for _, position in heapq.nlargest(limit, candidates)]
+
+    def _matches(self, entries: Sequence[Mapping[str, Any]]) -> bool:
+        if self._count > len(entries):
+            return False
+        if self._last is None:
+            return True
+        position, grams = self._last
+        return _entry_grams(entries[position]) == grams
+
+    def _reset(self) -> None:
+        self._postings = {}
+        self._count = 0
+        self._last = None
+
+    def _add(self, position: int, grams: frozenset[str]) -> None:
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(position)
+        self._last = (position, grams)
+        self._count = position + 1
+
+    def _load(self) -> None:
+        self._loaded = True
+        self._reset()
+        try:
+            fp = self._path.open("r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        postings = self._postings
+        position = -1
+        grams: list[str] = []
+        with fp:
+            for line in fp:
+                try:
+                    if not line.endswith("\n"):
+                        # Cut short by a crash.
+                        raise ValueError(line)
+                    position_text, grams_text = line[:-1].split("\t", 1)
+                    if int(position_text) <= position:
+                        raise ValueError(line)
+                except ValueError:
+                    break
+                position = int(position_text)
+                grams = grams_text.split(" ")
+                for gram in grams:
+                    gram_postings = postings.get(gram)
+                    if gram_postings is None:
+                        gram_postings = postings[gram] = array("I")
+                    gram_postings.append(position)
+            else:
+                if position >= 0:
+                    self._last = (position, frozenset(grams))
+                    self._count = position + 1
+                return
+        # Unreadable sidecar; start over so that new lines are not appended
+        # after the damaged one.
+        self._reset()
+        self._path.write_text("", encoding="utf-8")
+
+    def _index(self, entries: Sequence[Mapping[str, Any]], start: int) -> None:
+        lines = []
+        for position in range(start, len(entries)):
+            grams = frozenset(_entry_grams(entries[position]))
+            if grams:
+                self._add(position, grams)
+                lines.append(f"{position}\t{' '.join(sorted(grams))}\n")
+        self._count = len(entries)
+        if lines:
+            with self._path.open("a", encoding="utf-8") as fp:
+                fp.writelines(lines)
@@ -0,0 +1,342 @@
+"""SQLite backed storage for the Hanbyeol administration bot."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Mapping
+
+from .storage import FSYNC_POLICIES, Storage
+
+# Columns of the ``entries`` table in the order used by the JSON log lines.
+_COLUMNS = (
+    "kind",
+    "user_id",
+    "user_name",
+    "punishment",
+    "reason",
+    "duration",
+    "moderator_id",
+    "moderator_name",
+    "created_at",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    user_id INTEGER,
+    user_name TEXT,
+    punishment TEXT,
+    reason TEXT,
+    duration TEXT,
+    moderator_id INTEGER,
+    moderator_name TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_kind_created_at ON entries (kind, created_at);
+CREATE INDEX IF NOT EXISTS entries_user_id ON entries (user_id);
+CREATE INDEX IF NOT EXISTS entries_moderator_id ON entries (moderator_id);
+CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at);
+"""
+
+_INSERT = (
+    f"INSERT INTO entries ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+)
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM entries"
+
+# ``PRAGMA synchronous`` level matching each fsync policy.  In WAL mode
+# ``NORMAL`` only syncs at checkpoints, which mirrors the ``batch`` policy.
+_SYNCHRONOUS = {"always": "FULL", "batch": "NORMAL", "never": "OFF"}
+
+
+class SQLiteDatabase(Storage):
+    """SQLite (WAL mode) backed storage for punishment data.
+
+    Writes share one connection guarded by a lock.  Reads run in worker
+    threads, each with its own connection, so WAL lets them proceed while a
+    write is in progress.
+    """
+
+    def __init__(self, path: str, *, fsync: str = "batch") -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync!r}")
+        super().__init__()
+        self._path = Path(path)
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._writer: sqlite3.Connection | None = None
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+
+    async def setup(self) -> None:
+        """Create the database file and schema if needed."""
+
+        await asyncio.to_thread(self._open_writer)
+
+    async def close(self) -> None:
+        """Close every connection opened by this backend."""
+
+        await asyncio.to_thread(self._close_connections)
+
+    async def get_recent_entries(
+        self,
+        limits: Mapping[str, int],
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Return the newest entries of each kind in ``limits``, newest first."""
+
+        return await asyncio.to_thread(
+            self._read_recent_entries, dict(limits), start, end
+        )
+
+    async def get_entries_before(
+        self, cursor: int | None, limit: int
+    ) -> tuple[list[dict[str, Any]], int | None]:
+        """Return up to ``limit`` entries older than ``cursor``, newest first.
+
+        The cursor is a row id, so each page is a primary key range scan.
+        """
+
+        return await asyncio.to_thread(self._read_entries_before, cursor, limit)
+
+    async def get_user_history(
+        self, user_id: int, limit: int | None = None
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Return the entries recorded for ``user_id`` partitioned by kind."""
+
+        return await asyncio.to_thread(self._read_user_history, user_id, limit)
+
+    async def iter_entries_between(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        *,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield the entries created in ``[start, end)``, oldest first.
+
+        The range is an index scan over ``created_at``; batches continue from
+        the last ``(created_at, id)`` seen.
+        """
+
+        last: tuple[str, int] | None = None
+        while True:
+            last, entries = await asyncio.to_thread(
+                self._read_entries_between, start, end, last, batch_size
+            )
+            if not entries:
+                return
+            yield entries
+
+    async def search_entries(self, query: str, limit: int) -> list[dict[str, Any]]:
+        """Return up to ``limit`` entries containing every word of ``query``.
+
+        SQLite has no bigram index here; the words are matched as substrings
+        of the reason and punishment and the newest matches come first.
+        """
+
+        words = query.split()
+        if not words or limit <= 0:
+            return []
+        return await asyncio.to_thread(self._read_search, words, limit)
+
+    async def scan_entries(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield every entry oldest first, one row id range per batch."""
+
+        last_id = 0
+        while True:
+            last_id, entries = await asyncio.to_thread(
+                self._read_entries_after, last_id, batch_size
+            )
+            if not entries:
+                return
+            yield entries
+
+    async def _submit_many(self, entries: list[dict[str, Any]]) -> None:
+        await asyncio.to_thread(self._insert_entries, entries)
+
+    def _open_writer(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._writer is None:
+                self._writer = connect(self._path, fsync=self._fsync)
+            return self._writer
+
+    def _insert_entries(self, entries: list[dict[str, Any]]) -> None:
+        connection = self._open_writer()
+        with self._lock, connection:
+            insert_entries(connection, entries)
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self._open_writer()
+            connection = sqlite3.connect(self._path, check_same_thread=False)
+            self._local.connection = connection
+            with self._lock:
+                self._readers.append(connection)
+        return connection
+
+    def _read_recent_entries(
+        self,
+        limits: dict[str, int],
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> dict[str, list[dict[str, Any]]]:
+        connection = self._reader()
+        clauses, parameters = _range_clauses(start, end)
+        entries: dict[str, list[dict[str, Any]]] = {}
+        for kind, limit in limits.items():
+            rows = connection.execute(
+                f"{_SELECT} WHERE kind = ?{clauses} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (kind, *parameters, max(limit, 0)),
+            )
+            entries[kind] = [_row_entry(row) for row in rows]
+        return entries
+
+    def _read_entries_between(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        last: tuple[str, int] | None,
+        limit: int,
+    ) -> tuple[tuple[str, int] | None, list[dict[str, Any]]]:
+        connection = self._reader()
+        clauses, parameters = _range_clauses(start, end)
+        if last is not None:
+            clauses += " AND (created_at, id) > (?, ?)"
+            parameters.extend(last)
+        rows = connection.execute(
+            f"SELECT id, {', '.join(_COLUMNS)} FROM entries "
+            f"WHERE created_at IS NOT NULL{clauses} "
+            "ORDER BY created_at, id LIMIT ?",
+            (*parameters, limit),
+        ).fetchall()
+        if not rows:
+            return last, []
+        last_row = rows[-1]
+        return (
+            (last_row[1 + _COLUMNS.index("created_at")], last_row[0]),
+            [_row_entry(row[1:]) for row in rows],
+        )
+
+    def _read_entries_before(
+        self, cursor: int | None, limit: int
+    ) -> tuple[list[dict[str, Any]], int | None]:
+        connection = self._reader()
+        rows = connection.execute(
+            f"SELECT id, {', '.join(_COLUMNS)} FROM entries WHERE id < ? "
+            "ORDER BY id DESC LIMIT ?",
+            (cursor if cursor is not None else 2**63 - 1, limit + 1),
+        ).fetchall()
+        page = rows[:limit]
+        next_cursor = page[-1][0] if len(rows) > limit else None
+        return [_row_entry(row[1:]) for row in page], next_cursor
+
+    def _read_entries_after(
+        self, last_id: int, limit: int
+    ) -> tuple[int, list[dict[str, Any]]]:
+        connection = self._reader()
+        rows = connection.execute(
+            f"SELECT id, {', '.join(_COLUMNS)} FROM entries WHERE id > ? "
+            "ORDER BY id LIMIT ?",
+            (last_id, limit),
+        ).fetchall()
+        if not rows:
+            return last_id, []
+        return rows[-1][0], [_row_entry(row[1:]) for row in rows]
+
+    def _read_search(self, words: list[str], limit: int) -> list[dict[str, Any]]:
+        # ``instr`` instead of ``LIKE`` so that ``%`` and ``_`` in the query
+        # need no escaping; SQLite's ``lower`` only folds ASCII.
+        clauses = " AND ".join(
+            "(instr(lower(punishment), ?) OR instr(lower(reason), ?))" for _ in words
+        )
+        parameters: list[Any] = []
+        for word in words:
+            parameters.extend((word.lower(), word.lower()))
+        connection = self._reader()
+        rows = connection.execute(
+            f"{_SELECT} WHERE {clauses} ORDER BY id DESC LIMIT ?",
+            (*parameters, limit),
+        ).fetchall()
+        return [_row_entry(row) for row in rows]
+
+    def _read_user_history(
+        self, user_id: int, limit: int | None
+    ) -> dict[str, list[dict[str, Any]]]:
+        connection = self._reader()
+        history: dict[str, list[dict[str, Any]]] = {}
+        for kind in ("punishment", "release"):
+            rows = connection.execute(
+                f"{_SELECT} WHERE user_id = ? AND kind = ? ORDER BY id DESC LIMIT ?",
+                (user_id, kind, -1 if limit is None else limit),
+            )
+            history[kind] = [_row_entry(row) for row in rows]
+        return history
+
+    def _close_connections(self) -> None:
+        with self._lock:
+            connections = self._readers
+            self._readers = []
+            if self._writer is not None:
+                connections.append(self._writer)
+                self._writer = None
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+def connect(path: str | Path, *, fsync: str = "batch") -> sqlite3.Connection:
+    """Open a write connection with WAL enabled and the schema in place."""
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(f"PRAGMA synchronous={_SYNCHRONOUS[fsync]}")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def insert_entries(
+    connection: sqlite3.Connection, entries: Iterable[Mapping[str, Any]]
+) -> None:
+    """Insert decoded log entries; the caller owns the transaction."""
+
+    connection.executemany(
+        _INSERT, (tuple(entry.get(column) for column in _COLUMNS) for entry in entries)
+    )
+
+
+def _range_clauses(
+    start: datetime | None, end: datetime | None
+) -> tuple[str, list[Any]]:
+    """Return SQL conditions (each led by ``AND``) limiting ``created_at``."""
+
+    clauses = ""
+    parameters: list[Any] = []
+    if start is not None:
+        clauses += " AND created_at >= ?"
+        parameters.append(start.isoformat(timespec="seconds"))
+    if end is not None:
+        clauses += " AND created_at < ?"
+        parameters.append(end.isoformat(timespec="seconds"))
+    return clauses, parameters
+
+
+def _row_entry(row: tuple[Any, ...]) -> dict[str, Any]:
+    entry = dict(zip(_COLUMNS, row))
+    # Match the JSON log, which omits an empty duration.
+    if entry.get("duration") is None:
+        entry.pop("duration", None)
+    return entry
@@ -0,0 +1,142 @@
+"""Moderation statistics kept up to date as entries are logged.
+
+:class:`LogStatistics` keeps per-day counters instead of entries.  It is
+filled once from every stored entry at startup and then updated with each new
+batch, so a query only adds up the days in its window and never reads the
+log.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Iterable, Mapping
+
+from .storage import parse_created_at
+
+
+@dataclass(slots=True)
+class _Day:
+    punishments: int = 0
+    releases: int = 0
+    # Punishments per punishment type.
+    types: Counter[str] = field(default_factory=Counter)
+    # Punishments and releases per moderator ID.
+    moderator_punishments: Counter[int] = field(default_factory=Counter)
+    moderator_releases: Counter[int] = field(default_factory=Counter)
+
+
+@dataclass(slots=True)
+class StatsSummary:
+    """Totals of the entries logged between ``start`` and ``end`` inclusive."""
+
+    start: date
+    end: date
+    punishments: int
+    releases: int
+    # ``(punishment type, count)``, most frequent first.
+    types: list[tuple[str, int]]
+    # ``(moderator name, moderator ID, punishments, releases)``, busiest first.
+    moderators: list[tuple[str, int, int, int]]
+    # ``(day, punishments, releases)`` for every day with entries, oldest first.
+    days: list[tuple[date, int, int]]
+
+    @property
+    def release_ratio(self) -> float | None:
+        """Releases per punishment, or ``None`` without punishments."""
+
+        return self.releases / self.punishments if self.punishments else None
+
+
+class LogStatistics:
+    """Per-day punishment and release counters.
+
+    Entries without a usable ``created_at`` cannot be placed in a window and
+    are only counted in :attr:`undated`.
+    """
+
+    def __init__(self) -> None:
+        self._days: dict[date, _Day] = {}
+        self._moderator_names: dict[int, str] = {}
+        self.undated = 0
+
+    def apply_many(self, entries: Iterable[Mapping[str, Any]]) -> None:
+        """Count stored entries."""
+
+        for entry in entries:
+            self.apply(entry)
+
+    def apply(self, entry: Mapping[str, Any]) -> None:
+        """Count a single stored entry."""
+
+        kind = entry.get("kind")
+        if kind not in ("punishment", "release"):
+            return
+        created_at = parse_created_at(entry.get("created_at"))
+        if created_at is None:
+            self.undated += 1
+            return
+        day = created_at.date()
+
+        bucket = self._days.get(day)
+        if bucket is None:
+            bucket = self._days[day] = _Day()
+        try:
+            moderator_id = int(entry.get("moderator_id") or 0)
+        except (TypeError, ValueError):
+            moderator_id = 0
+        if entry.get("moderator_name"):
+            self._moderator_names[moderator_id] = str(entry["moderator_name"])
+
+        if kind == "punishment":
+            bucket.punishments += 1
+            bucket.types[str(entry.get("punishment") or "")] += 1
+            bucket.moderator_punishments[moderator_id] += 1
+        else:
+            bucket.releases += 1
+            bucket.moderator_releases[moderator_id] += 1
+
+    def summary(self, start: date, end: date) -> StatsSummary:
+        """Return the totals of the days from ``start`` to ``end``.
+
+        The cost depends on the length of the window, not on the size of the
+        log.
+        """
+
+        types: Counter[str] = Counter()
+        moderator_punishments: Counter[int] = Counter()
+        moderator_releases: Counter[int] = Counter()
+        punishments = releases = 0
+        days = []
+        day = start
+        while day <= end:
+            bucket = self._days.get(day)
+            if bucket is not None:
+                punishments += bucket.punishments
+                releases += bucket.releases
+                types.update(bucket.types)
+                moderator_punishments.update(bucket.moderator_punishments)
+                moderator_releases.update(bucket.moderator_releases)
+                days.append((day, bucket.punishments, bucket.releases))
+            day += timedelta(days=1)
+
+        moderators = [
+            (
+                self._moderator_names.get(moderator_id, str(moderator_id)),
+                moderator_id,
+                moderator_punishments[moderator_id],
+                moderator_releases[moderator_id],
+            )
+            for moderator_id in moderator_punishments.keys() | moderator_releases.keys()
+        ]
+        moderators.sort(key=lambda item: (-(item[2] + item[3]), item[0]))
+        return StatsSummary(
+            start=start,
+            end=end,
+            punishments=punishments,
+            releases=releases,
+            types=sorted(types.items(), key=lambda item: (-item[1], item[0])),
+            moderators=moderators,
+            days=days,
+        )
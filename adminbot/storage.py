@@ -0,0 +1,393 @@
+"""Storage interface shared by the Hanbyeol log backends."""
+
+from __future__ import annotations
+
+import logging
+import sys
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable, Iterator, Mapping
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Sequence
+
+PunishmentRecord = Mapping[str, Any]
+ReleaseRecord = Mapping[str, Any]
+# Called with every batch of entries once it has been stored.
+EntryListener = Callable[[list[Mapping[str, Any]]], None]
+
+log = logging.getLogger(__name__)
+
+# Supported values for the ``fsync`` durability policy of every backend.
+FSYNC_POLICIES = ("always", "batch", "never")
+
+
+@dataclass(slots=True)
+class _Entry:
+    """Internal representation of a stored log entry."""
+
+    kind: str
+    user_id: int
+    user_name: str
+    punishment: str
+    reason: str
+    moderator_id: int
+    moderator_name: str
+    created_at: str
+    duration: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        # Remove ``None`` duration so the consumer can omit the field.
+        if data.get("duration") is None:
+            data.pop("duration", None)
+        return data
+
+
+# ``created_at`` is stored as whole seconds since this naive epoch; entries are
+# written with naive local timestamps, so no timezone conversion is involved.
+_EPOCH = datetime(1970, 1, 1)
+
+
+class LogRecord(Mapping[str, Any]):
+    """Compact, read-only form of a stored entry for in-memory caches.
+
+    A parsed line is a ``dict`` of nine keys with its own copy of every
+    string.  Records keep the fields in slots instead, intern the strings
+    that repeat across entries (kind, names, punishment, duration) and hold
+    ``created_at`` as an integer.  They still behave as a read-only mapping
+    with the same keys as the stored line, so code written against plain
+    entries keeps working.
+    """
+
+    __slots__ = (
+        "kind",
+        "user_id",
+        "user_name",
+        "punishment",
+        "reason",
+        "moderator_id",
+        "moderator_name",
+        "timestamp",
+        "duration",
+        "_extra",
+    )
+
+    _FIELDS = (
+        "kind",
+        "user_id",
+        "user_name",
+        "punishment",
+        "reason",
+        "moderator_id",
+        "moderator_name",
+        "created_at",
+        "duration",
+    )
+    _INTERNED = ("kind", "user_name", "punishment", "moderator_name", "duration")
+
+    kind: str | None
+    user_id: Any
+    user_name: str | None
+    punishment: str | None
+    reason: str | None
+    moderator_id: Any
+    moderator_name: str | None
+    # Seconds since ``_EPOCH``; ``None`` if the line had no usable timestamp.
+    timestamp: int | None
+    duration: str | None
+    # Keys this class has no slot for and timestamps that would not survive
+    # the round trip through ``timestamp``; ``None`` for regular entries.
+    _extra: dict[str, Any] | None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "LogRecord":
+        record = cls.__new__(cls)
+        extra: dict[str, Any] = {}
+        for key, value in data.items():
+            if key == "created_at":
+                timestamp = _parse_timestamp(value)
+                if timestamp is None:
+                    extra[key] = value
+                record.timestamp = timestamp
+            elif key in cls._FIELDS:
+                if key in cls._INTERNED and type(value) is str:
+                    value = sys.intern(value)
+                setattr(record, key, value)
+            else:
+                extra[key] = value
+        for key in cls.__slots__[:-1]:
+            if not hasattr(record, key):
+                setattr(record, key, None)
+        record._extra = extra or None
+        return record
+
+    @property
+    def created_at(self) -> str | None:
+        if self.timestamp is not None:
+            return (_EPOCH + timedelta(seconds=self.timestamp)).isoformat()
+        if self._extra is not None:
+            return self._extra.get("created_at")
+        return None
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self._extra is not None:
+            yield from (key for key in self._extra if key not in self._FIELDS)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"LogRecord({dict(self)!r})"
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the entry as the plain ``dict`` it was stored as."""
+
+        return dict(self)
+
+
+def parse_created_at(value: Any) -> datetime | None:
+    """Return a stored ``created_at`` as a naive local datetime, if it is one.
+
+    Entries are written with naive local timestamps; timezone-aware values
+    from other writers are converted so that they compare with those.
+    """
+
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _parse_timestamp(value: Any) -> int | None:
+    """Return ``value`` as seconds since ``_EPOCH`` if that loses nothing."""
+
+    if type(value) is not str:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None or parsed.microsecond:
+        return None
+    timestamp = (parsed - _EPOCH) // timedelta(seconds=1)
+    if (_EPOCH + timedelta(seconds=timestamp)).isoformat() != value:
+        return None
+    return timestamp
+
+
+class Storage(ABC):
+    """Base class for punishment log backends.
+
+    Backends only implement persistence and queries; building entries from
+    command arguments is shared here so every backend stores the same shape.
+    """
+
+    def __init__(self) -> None:
+        self._listeners: list[EntryListener] = []
+        # Incremented after every batch logged through this object, and by
+        # backends that notice entries written by other processes, so that
+        # results derived from the log can be keyed by the version they saw.
+        self.version = 0
+
+    def add_listener(self, listener: EntryListener) -> None:
+        """Call ``listener`` with each batch of entries logged through this object.
+
+        Listeners run on the event loop right after the batch was written and
+        must not block.  Entries appended by other processes are not reported.
+        """
+
+        self._listeners.append(listener)
+
+    async def current_version(self) -> int:
+        """Return :attr:`version`, first noticing outside changes if possible."""
+
+        return self.version
+
+    @abstractmethod
+    async def setup(self) -> None:
+        """Prepare the backend for use."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Flush pending writes and release resources."""
+
+    @abstractmethod
+    async def get_recent_entries(
+        self,
+        limits: Mapping[str, int],
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> dict[str, list[Mapping[str, Any]]]:
+        """Return the newest entries of each kind in ``limits``, newest first.
+
+        ``start`` and ``end`` restrict the result to entries created in
+        ``[start, end)``.
+        """
+
+    @abstractmethod
+    def iter_entries_between(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        *,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[Mapping[str, Any]]]:
+        """Yield the entries created in ``[start, end)`` oldest first, in batches."""
+
+    @abstractmethod
+    async def get_user_history(
+        self, user_id: int, limit: int | None = None
+    ) -> dict[str, list[Mapping[str, Any]]]:
+        """Return the entries recorded for ``user_id`` partitioned by kind."""
+
+    @abstractmethod
+    async def get_entries_before(
+        self, cursor: int | None, limit: int
+    ) -> tuple[list[Mapping[str, Any]], int | None]:
+        """Return up to ``limit`` entries older than ``cursor``, newest first.
+
+        ``cursor`` is an opaque position returned by a previous call (``None``
+        starts at the newest entry).  The second item is the cursor of the
+        following page, or ``None`` when there are no older entries.
+        """
+
+    @abstractmethod
+    async def search_entries(self, query: str, limit: int) -> list[Mapping[str, Any]]:
+        """Return up to ``limit`` entries whose reason or punishment match ``query``.
+
+        The best matches come first.
+        """
+
+    @abstractmethod
+    def scan_entries(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[list[Mapping[str, Any]]]:
+        """Yield every stored entry, oldest first, in batches of ``batch_size``."""
+
+    @abstractmethod
+    async def _submit_many(self, entries: list[dict[str, Any]]) -> None:
+        """Persist ``entries`` in order as one batch."""
+
+    async def _store(self, entries: list[dict[str, Any]]) -> None:
+        """Persist ``entries`` and notify the listeners."""
+
+        await self._submit_many(entries)
+        self.version += 1
+        for listener in self._listeners:
+            try:
+                listener(entries)
+            except Exception:
+                log.exception("Entry listener %r failed", listener)
+
+    async def log_punishment(
+        self,
+        *,
+        user_id: int,
+        user_name: str,
+        punishment: str,
+        reason: str,
+        duration: str | None,
+        moderator_id: int,
+        moderator_name: str,
+    ) -> None:
+        """Persist a punishment record."""
+
+        entry = _Entry(
+            kind="punishment",
+            user_id=user_id,
+            user_name=user_name,
+            punishment=punishment,
+            reason=reason,
+            duration=duration,
+            moderator_id=moderator_id,
+            moderator_name=moderator_name,
+            created_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        await self._store([entry.as_dict()])
+
+    async def log_punishments(
+        self,
+        *,
+        users: Sequence[tuple[int, str]],
+        punishment: str,
+        reason: str,
+        duration: str | None,
+        moderator_id: int,
+        moderator_name: str,
+    ) -> None:
+        """Persist the same punishment for several ``(user_id, user_name)`` pairs.
+
+        All records are written as a single batch.
+        """
+
+        created_at = datetime.now().isoformat(timespec="seconds")
+        await self._store(
+            [
+                _Entry(
+                    kind="punishment",
+                    user_id=user_id,
+                    user_name=user_name,
+                    punishment=punishment,
+                    reason=reason,
+                    duration=duration,
+                    moderator_id=moderator_id,
+                    moderator_name=moderator_name,
+                    created_at=created_at,
+                ).as_dict()
+                for user_id, user_name in users
+            ]
+        )
+
+    async def log_release(
+        self,
+        *,
+        user_id: int,
+        user_name: str,
+        punishment: str,
+        reason: str,
+        moderator_id: int,
+        moderator_name: str,
+    ) -> None:
+        """Persist a punishment release record."""
+
+        entry = _Entry(
+            kind="release",
+            user_id=user_id,
+            user_name=user_name,
+            punishment=punishment,
+            reason=reason,
+            moderator_id=moderator_id,
+            moderator_name=moderator_name,
+            created_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        await self._store([entry.as_dict()])
+
+    async def get_recent_punishments(self, limit: int) -> list[PunishmentRecord]:
+        """Return the newest punishment entries."""
+
+        entries = await self.get_recent_entries({"punishment": limit})
+        return entries["punishment"]
+
+    async def get_recent_releases(self, limit: int) -> list[ReleaseRecord]:
+        """Return the newest punishment release entries."""
+
+        entries = await self.get_recent_entries({"release": limit})
+        return entries["release"]
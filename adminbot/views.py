@@ -0,0 +1,84 @@
+"""Interactive Discord views used by the Hanbyeol administration bot."""
+
+from __future__ import annotations
+
+import discord
+
+from .database import format_entries
+from .embeds import MAX_LOGGED_REASON_CHARS, log_page_embed
+from .storage import Storage
+
+_KIND_LABELS = {"punishment": "처벌", "release": "해제"}
+
+
+class LogPageView(discord.ui.View):
+    """Browse the log page by page with previous/next buttons.
+
+    Pages are fetched lazily through :meth:`Storage.get_entries_before` as the
+    moderator clicks.  The view only remembers the cursor that starts each
+    visited page, so going back re-reads that page instead of caching it.
+    """
+
+    def __init__(
+        self,
+        *,
+        database: Storage,
+        owner_id: int,
+        page_size: int,
+        timeout: float = 300.0,
+    ) -> None:
+        super().__init__(timeout=timeout)
+        self._database = database
+        self._owner_id = owner_id
+        self._page_size = page_size
+        self._cursors: list[int | None] = [None]
+        self._next_cursor: int | None = None
+        # Message showing the view; its buttons are disabled on timeout.
+        self.message: discord.InteractionMessage | discord.WebhookMessage | None = None
+
+    async def render(self) -> discord.Embed:
+        """Fetch the current page and update the button states."""
+
+        entries, self._next_cursor = await self._database.get_entries_before(
+            self._cursors[-1], self._page_size
+        )
+        self.previous_page.disabled = len(self._cursors) == 1
+        self.next_page.disabled = self._next_cursor is None
+        labels = [
+            _KIND_LABELS.get(entry.get("kind"), str(entry.get("kind"))) for entry in entries
+        ]
+        return log_page_embed(
+            entries=list(
+                zip(labels, format_entries(entries, reason_limit=MAX_LOGGED_REASON_CHARS))
+            ),
+            page=len(self._cursors),
+        )
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self._owner_id
+
+    async def on_timeout(self) -> None:
+        # Expired buttons would only answer with "interaction failed".
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(label="이전", style=discord.ButtonStyle.secondary)
+    async def previous_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ) -> None:
+        if len(self._cursors) > 1:
+            self._cursors.pop()
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    @discord.ui.button(label="다음", style=discord.ButtonStyle.primary)
+    async def next_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ) -> None:
+        if self._next_cursor is not None:
+            self._cursors.append(self._next_cursor)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
@@ -0,0 +1,470 @@
+"""Offline load test of the ``/한별`` commands.
+
+Usage::
+
+    python -m benchmarks.load --rates 5 20 50 --duration 10
+
+A real :class:`HanbyeolBot` is built with its database and outbox in a
+temporary directory, but it never logs in: interactions, members, the
+announcement channel and DM targets are local fakes that sleep for an
+injected latency and answer a configurable share of requests with HTTP 429.
+The registered command callbacks are invoked at a fixed arrival rate, and
+for every rate the harness prints one JSON object with throughput, defer
+latency, completion latency and the number of interactions that were not
+deferred within Discord's 3-second window.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import discord
+from discord import app_commands
+
+from adminbot.config import BotConfig
+from bot import HanbyeolBot
+
+from .stats import summarise
+
+# Discord discards interactions that were not answered (or deferred) within
+# this many seconds.
+_DEFER_WINDOW = 3.0
+
+_GUILD_ID = 900_000_000_000_000_001
+_CHANNEL_ID = 900_000_000_000_000_002
+_ROLE_ID = 900_000_000_000_000_003
+_FIRST_USER_ID = 910_000_000_000_000_000
+_FIRST_MODERATOR_ID = 920_000_000_000_000_000
+
+
+class FakeDiscord:
+    """Injected latency and rate limits shared by every fake endpoint.
+
+    Every endpoint waits out a 429 and retries, the way discord.py's HTTP
+    client does.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float,
+        jitter: float,
+        rate_limit_ratio: float,
+        retry_after: float,
+        seed: int,
+    ) -> None:
+        self._latency = latency
+        self._jitter = jitter
+        self._rate_limit_ratio = rate_limit_ratio
+        self._retry_after = retry_after
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self.messages: dict[str, int] = {"channel": 0, "dm": 0, "followup": 0}
+
+    async def _round_trip(self) -> bool:
+        """Wait one request's latency; return False if it was rate limited."""
+
+        self.requests += 1
+        await asyncio.sleep(self._latency + self._rng.uniform(0, self._jitter))
+        if self._rng.random() < self._rate_limit_ratio:
+            self.rate_limited += 1
+            return False
+        return True
+
+    async def interaction_call(self) -> None:
+        while not await self._round_trip():
+            await asyncio.sleep(self._retry_after)
+
+    async def message_call(self, kind: str) -> None:
+        await self.interaction_call()
+        self.messages[kind] += 1
+
+
+class FakeMember(discord.Member):
+    """Guild member with just the attributes the commands use."""
+
+    def __init__(
+        self,
+        user_id: int,
+        name: str,
+        fake: FakeDiscord,
+        *,
+        role_ids: tuple[int, ...] = (),
+    ) -> None:
+        # ``discord.Member`` is normally built from gateway state; none of
+        # its slots are filled here and every attribute we need is overridden.
+        self._fake_id = user_id
+        self._fake_name = name
+        self._fake = fake
+        self._role_ids = frozenset(role_ids)
+
+    @property
+    def id(self) -> int:  # type: ignore[override]
+        return self._fake_id
+
+    @property
+    def mention(self) -> str:  # type: ignore[override]
+        return f"<@{self._fake_id}>"
+
+    def __str__(self) -> str:
+        return self._fake_name
+
+    def __repr__(self) -> str:
+        return f"<FakeMember id={self._fake_id} name={self._fake_name!r}>"
+
+    def __hash__(self) -> int:
+        return self._fake_id >> 22
+
+    def get_role(self, role_id: int) -> discord.Object | None:  # type: ignore[override]
+        return discord.Object(id=role_id) if role_id in self._role_ids else None
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> None:  # type: ignore[override]
+        await self._fake.message_call("dm")
+
+
+class FakeTextChannel(discord.TextChannel):
+    """Announcement channel whose sends go through :class:`FakeDiscord`."""
+
+    def __init__(self, channel_id: int, fake: FakeDiscord) -> None:
+        self.id = channel_id
+        self._fake = fake
+
+    def __repr__(self) -> str:
+        return f"<FakeTextChannel id={self.id}>"
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> None:  # type: ignore[override]
+        await self._fake.message_call("channel")
+
+
+class FakeGuild:
+    """Guild lookups used by the bulk command."""
+
+    def __init__(self, members: dict[int, FakeMember], fake: FakeDiscord) -> None:
+        self.id = _GUILD_ID
+        self._members = members
+        self._fake = fake
+
+    def get_member(self, user_id: int) -> FakeMember | None:
+        return self._members.get(user_id)
+
+    async def query_members(
+        self, *, user_ids: list[int], limit: int
+    ) -> list[FakeMember]:
+        await self._fake.interaction_call()
+        return [
+            self._members[user_id] for user_id in user_ids if user_id in self._members
+        ][:limit]
+
+    async def fetch_member(self, user_id: int) -> FakeMember:
+        await self._fake.interaction_call()
+        try:
+            return self._members[user_id]
+        except KeyError:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Member") from None
+
+
+class _FakeResponse:
+    """Minimal ``aiohttp`` response for constructing HTTP exceptions."""
+
+    def __init__(self, status: int) -> None:
+        self.status = status
+        self.reason = "Fake"
+        self.headers: dict[str, str] = {}
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction: "FakeInteraction") -> None:
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs: Any) -> None:
+        await self._interaction.fake.interaction_call()
+        self._done = True
+        self._interaction.deferred_at = time.perf_counter()
+
+    async def send_message(self, content: str | None = None, **kwargs: Any) -> None:
+        await self._interaction.fake.interaction_call()
+        self._done = True
+        self._interaction.deferred_at = time.perf_counter()
+        self._interaction.messages.append(content)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction") -> None:
+        self._interaction = interaction
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> None:
+        await self._interaction.fake.interaction_call()
+        self._interaction.fake.messages["followup"] += 1
+        self._interaction.messages.append(content)
+        if self._interaction.completed_at is None:
+            self._interaction.completed_at = time.perf_counter()
+
+
+class FakeInteraction:
+    """Slash command invocation as seen by the command callbacks."""
+
+    def __init__(
+        self,
+        *,
+        command: app_commands.Command,
+        user: FakeMember,
+        guild: FakeGuild,
+        fake: FakeDiscord,
+    ) -> None:
+        self.command = command
+        self.user = user
+        self.guild = guild
+        self.fake = fake
+        self.extras: dict[str, Any] = {}
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+        self.messages: list[str | None] = []
+        self.created_at = time.perf_counter()
+        self.deferred_at: float | None = None
+        self.completed_at: float | None = None
+
+
+def _build_bot(
+    directory: Path, fake: FakeDiscord, members: dict[int, FakeMember], *, lean: bool
+) -> HanbyeolBot:
+    config = BotConfig(
+        token="offline",
+        guild_id=_GUILD_ID,
+        announcement_channel_id=_CHANNEL_ID,
+        punishment_role_id=_ROLE_ID,
+        log_role_id=_ROLE_ID,
+        database_path=str(directory / "hanbyeol_logs.txt"),
+        fsync_policy="batch",
+        segment_max_bytes=32 * 1024 * 1024,
+        outbox_path=str(directory / "hanbyeol_outbox.jsonl"),
+        lean_gateway=lean,
+        metrics_port=None,
+    )
+    bot = HanbyeolBot(config=config)
+    channel = FakeTextChannel(_CHANNEL_ID, fake)
+
+    # The bot never connects, so its cache lookups are answered by the fakes.
+    async def fetch_user(user_id: int) -> FakeMember:
+        await fake.interaction_call()
+        return members[user_id]
+
+    bot.get_channel = lambda channel_id: channel if channel_id == _CHANNEL_ID else None  # type: ignore[method-assign]
+    bot.get_user = members.get  # type: ignore[method-assign]
+    bot.fetch_user = fetch_user  # type: ignore[method-assign]
+    bot.create_dm = lambda user: fetch_user(user.id)  # type: ignore[method-assign]
+    return bot
+
+
+def _invocations(
+    bot: HanbyeolBot, members: list[FakeMember], commands: list[str], bulk_size: int
+) -> Callable[[int], tuple[app_commands.Command, dict[str, Any]]]:
+    """Return a factory for the ``(command, arguments)`` of the n-th invocation."""
+
+    callbacks = {
+        "punishment": bot.hanbyeol.get_command("처벌정보전송"),
+        "release": bot.hanbyeol.get_command("처벌해제정보전송"),
+        "bulk": bot.hanbyeol.get_command("일괄처벌정보전송"),
+    }
+
+    def invocation(number: int) -> tuple[app_commands.Command, dict[str, Any]]:
+        name = commands[number % len(commands)]
+        command = callbacks[name]
+        target = members[number % len(members)]
+        if name == "punishment":
+            arguments: dict[str, Any] = {
+                "user": target,
+                "punishment": "타임아웃",
+                "reason": f"부하 테스트 {number}",
+                "duration": "1일",
+            }
+        elif name == "release":
+            arguments = {
+                "user": target,
+                "punishment": "타임아웃",
+                "reason": f"부하 테스트 {number}",
+            }
+        else:
+            start = number % len(members)
+            targets = [
+                members[(start + offset) % len(members)] for offset in range(bulk_size)
+            ]
+            arguments = {
+                "users": " ".join(str(member.id) for member in targets),
+                "punishment": "타임아웃",
+                "reason": f"부하 테스트 {number}",
+                "duration": "1일",
+            }
+        return command, arguments
+
+    return invocation
+
+
+async def _run_rate(options: dict[str, Any], rate: float) -> dict[str, Any]:
+    fake = FakeDiscord(
+        latency=options["latency"],
+        jitter=options["jitter"],
+        rate_limit_ratio=options["rate_limit_ratio"],
+        retry_after=options["retry_after"],
+        seed=options["seed"],
+    )
+    members = {
+        _FIRST_USER_ID + index: FakeMember(_FIRST_USER_ID + index, f"유저{index}", fake)
+        for index in range(options["users"])
+    }
+    moderators = [
+        FakeMember(
+            _FIRST_MODERATOR_ID + index, f"관리자{index}", fake, role_ids=(_ROLE_ID,)
+        )
+        for index in range(options["moderators"])
+    ]
+    members.update({moderator.id: moderator for moderator in moderators})
+    guild = FakeGuild(members, fake)
+    targets = [member for member in members.values() if member not in moderators]
+
+    with tempfile.TemporaryDirectory(prefix="hanbyeol-load-") as directory:
+        bot = _build_bot(Path(directory), fake, members, lean=options["lean"])
+        await bot.database.setup()
+        await bot.outbox.start(bot._send_outbox_item)
+        invocation = _invocations(
+            bot, targets, options["commands"], options["bulk_size"]
+        )
+
+        interactions: list[FakeInteraction] = []
+        errors: list[str] = []
+
+        async def invoke(number: int) -> None:
+            moderator = moderators[number % len(moderators)]
+            command, arguments = invocation(number)
+            interaction = FakeInteraction(
+                command=command, user=moderator, guild=guild, fake=fake
+            )
+            interactions.append(interaction)
+            try:
+                await command.callback(interaction, **arguments)
+            except Exception as exc:
+                errors.append(f"{type(exc).__name__}: {exc}")
+
+        total = max(1, int(rate * options["duration"]))
+        started = time.perf_counter()
+        tasks = []
+        for number in range(total):
+            # Open-loop arrivals: a slow bot does not slow the moderators down.
+            delay = started + number / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(invoke(number)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*bot._background_tasks, return_exceptions=True)
+
+        pending = bot.outbox.pending
+        await bot.outbox.close()
+        await bot.database.close()
+
+    defer = [
+        i.deferred_at - i.created_at for i in interactions if i.deferred_at is not None
+    ]
+    completion = [
+        i.completed_at - i.created_at
+        for i in interactions
+        if i.completed_at is not None
+    ]
+    return {
+        "rate": rate,
+        "invocations": total,
+        "completed": len(completion),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "defer_timeouts": sum(latency > _DEFER_WINDOW for latency in defer)
+        + sum(i.deferred_at is None for i in interactions),
+        "throughput_per_sec": round(len(completion) / elapsed, 2),
+        "defer": summarise(defer),
+        "completion": summarise(completion),
+        "requests": fake.requests,
+        "rate_limited": fake.rate_limited,
+        "messages": fake.messages,
+        "outbox_pending": pending,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="가짜 디스코드 객체로 한별 명령어의 처리량과 지연 시간을 측정합니다."
+    )
+    parser.add_argument(
+        "--rates",
+        type=float,
+        nargs="+",
+        default=[5, 20, 50],
+        help="초당 명령어 실행 횟수",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="비율마다 실행할 시간(초)"
+    )
+    parser.add_argument(
+        "--commands",
+        nargs="+",
+        choices=("punishment", "release", "bulk"),
+        default=["punishment", "release"],
+        help="번갈아 실행할 명령어",
+    )
+    parser.add_argument(
+        "--bulk-size", type=int, default=10, help="일괄 처벌 한 번의 대상 수"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.08, help="요청마다 기본 지연(초)"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.04,
+        help="요청마다 더해질 최대 무작위 지연(초)",
+    )
+    parser.add_argument(
+        "--rate-limit-ratio", type=float, default=0.02, help="429 로 응답할 요청의 비율"
+    )
+    parser.add_argument(
+        "--retry-after", type=float, default=1.0, help="429 응답의 대기 시간(초)"
+    )
+    parser.add_argument("--users", type=int, default=500, help="가짜 서버의 유저 수")
+    parser.add_argument(
+        "--moderators", type=int, default=5, help="명령어를 실행하는 관리자 수"
+    )
+    parser.add_argument(
+        "--lean", action="store_true", help="멤버 캐시 없는 모드로 실행"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    args = parser.parse_args(argv)
+
+    options = {
+        "duration": args.duration,
+        "commands": args.commands,
+        "bulk_size": args.bulk_size,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "rate_limit_ratio": args.rate_limit_ratio,
+        "retry_after": args.retry_after,
+        "users": args.users,
+        "moderators": args.moderators,
+        "lean": args.lean,
+        "seed": args.seed,
+    }
+    for rate in args.rates:
+        result = asyncio.run(_run_rate(options, rate))
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Summary statistics shared by the benchmarks."""
+
+from __future__ import annotations
+
+import math
+import resource
+import sys
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of ``samples``."""
+
+    ordered = sorted(samples)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarise(samples: list[float]) -> dict[str, float]:
+    """Summarise latencies given in seconds as milliseconds."""
+
+    if not samples:
+        return {"runs": 0}
+    return {
+        "runs": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
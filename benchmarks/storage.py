@@ -0,0 +1,223 @@
+"""Benchmark the text log backend against synthetic logs.
+
+Usage::
+
+    python -m benchmarks.storage --lines 10000 100000 1000000
+
+Every log size runs in a fresh process so that peak RSS figures are not
+inflated by the previous run.  Results are printed as JSON, one object per
+log size, with latencies in milliseconds::
+
+    {"lines": 100000, "file_bytes": ..., "setup": {"p50_ms": ..., ...}, ...}
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from adminbot.database import Database, format_entries
+from adminbot.storage import FSYNC_POLICIES
+
+from .stats import peak_rss_bytes, summarise
+from .synthetic import write_log
+
+
+async def _bench_setup(path: Path, runs: int) -> dict[str, float]:
+    samples = []
+    for _ in range(runs):
+        database = Database(str(path), fsync="never")
+        started = time.perf_counter()
+        await database.setup()
+        samples.append(time.perf_counter() - started)
+        await database.close()
+    return summarise(samples)
+
+
+async def _bench_append(
+    database: Database, *, callers: int, per_caller: int
+) -> dict[str, float]:
+    samples: list[float] = []
+
+    async def caller(number: int) -> None:
+        for index in range(per_caller):
+            started = time.perf_counter()
+            await database.log_punishment(
+                user_id=10**17 + number,
+                user_name=f"벤치{number}",
+                punishment="타임아웃",
+                reason=f"벤치마크 기록 {index}",
+                duration="1일",
+                moderator_id=10**17,
+                moderator_name="벤치마크",
+            )
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(number) for number in range(callers)))
+    elapsed = time.perf_counter() - started
+    return {
+        **summarise(samples),
+        "callers": callers,
+        "ops_per_sec": round(len(samples) / elapsed, 1),
+    }
+
+
+async def _bench_recent(database: Database, *, limit: int, runs: int) -> dict[str, Any]:
+    queries = {
+        "entries": lambda: database.get_recent_entries(
+            {"punishment": limit, "release": limit}
+        ),
+        "punishments": lambda: database.get_recent_punishments(limit),
+        "releases": lambda: database.get_recent_releases(limit),
+    }
+    results: dict[str, Any] = {}
+    for name, query in queries.items():
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await query()
+            samples.append(time.perf_counter() - started)
+        results[name] = summarise(samples)
+    return results
+
+
+async def _bench_recent_cold(path: Path, *, limit: int, runs: int) -> dict[str, float]:
+    """Time the file-reading path used before the cache is loaded."""
+
+    database = Database(str(path), fsync="never")
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await database.get_recent_entries({"punishment": limit, "release": limit})
+        samples.append(time.perf_counter() - started)
+    return summarise(samples)
+
+
+def _bench_render(
+    entries: dict[str, list[Any]], *, runs: int
+) -> dict[str, float] | None:
+    try:
+        from adminbot.embeds import MAX_LOGGED_REASON_CHARS, log_embeds
+    except ImportError:
+        # Rendering needs discord.py; the storage figures are still useful.
+        return None
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        log_embeds(
+            punishments=format_entries(
+                entries["punishment"], reason_limit=MAX_LOGGED_REASON_CHARS
+            ),
+            releases=format_entries(
+                entries["release"], reason_limit=MAX_LOGGED_REASON_CHARS
+            ),
+        )
+        samples.append(time.perf_counter() - started)
+    return summarise(samples)
+
+
+async def _run(options: dict[str, Any], directory: Path) -> dict[str, Any]:
+    path = directory / "hanbyeol_logs.txt"
+    file_bytes = write_log(
+        path,
+        options["lines"],
+        release_ratio=options["release_ratio"],
+        malformed_ratio=options["malformed_ratio"],
+        seed=options["seed"],
+    )
+    result: dict[str, Any] = {"lines": options["lines"], "file_bytes": file_bytes}
+    limit = options["limit"]
+    runs = options["runs"]
+
+    result["recent_cold"] = await _bench_recent_cold(path, limit=limit, runs=runs)
+    result["setup"] = await _bench_setup(path, options["setup_runs"])
+
+    database = Database(str(path), fsync=options["fsync"])
+    await database.setup()
+    try:
+        result["recent"] = await _bench_recent(database, limit=limit, runs=runs)
+        entries = await database.get_recent_entries(
+            {"punishment": limit, "release": limit}
+        )
+        result["render"] = _bench_render(entries, runs=runs)
+        result["append"] = await _bench_append(
+            database, callers=options["callers"], per_caller=options["per_caller"]
+        )
+    finally:
+        await database.close()
+
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    return result
+
+
+def run_benchmark(options: dict[str, Any]) -> dict[str, Any]:
+    """Generate one synthetic log and benchmark it in a temporary directory."""
+
+    with tempfile.TemporaryDirectory(prefix="hanbyeol-bench-") as directory:
+        return asyncio.run(_run(options, Path(directory)))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="합성 로그로 텍스트 로그 저장소의 성능을 측정합니다."
+    )
+    parser.add_argument(
+        "--lines",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="생성할 로그 줄 수 (여러 개 지정 가능)",
+    )
+    parser.add_argument(
+        "--release-ratio", type=float, default=0.3, help="해제 기록의 비율"
+    )
+    parser.add_argument(
+        "--malformed-ratio", type=float, default=0.001, help="깨진 줄의 비율"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    parser.add_argument(
+        "--fsync",
+        choices=FSYNC_POLICIES,
+        default="batch",
+        help="기록 성능 측정에 쓸 fsync 정책",
+    )
+    parser.add_argument(
+        "--callers", type=int, default=50, help="동시에 기록하는 호출자 수"
+    )
+    parser.add_argument(
+        "--per-caller", type=int, default=20, help="호출자마다 남길 기록 수"
+    )
+    parser.add_argument("--limit", type=int, default=50, help="최근 기록 조회 개수")
+    parser.add_argument("--runs", type=int, default=200, help="조회/렌더링 반복 횟수")
+    parser.add_argument("--setup-runs", type=int, default=3, help="setup 반복 횟수")
+    args = parser.parse_args(argv)
+
+    for lines in args.lines:
+        options = {
+            "lines": lines,
+            "release_ratio": args.release_ratio,
+            "malformed_ratio": args.malformed_ratio,
+            "seed": args.seed,
+            "fsync": args.fsync,
+            "callers": args.callers,
+            "per_caller": args.per_caller,
+            "limit": args.limit,
+            "runs": args.runs,
+            "setup_runs": args.setup_runs,
+        }
+        # A fresh process per size keeps ``ru_maxrss`` specific to that size.
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(run_benchmark, options).result()
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
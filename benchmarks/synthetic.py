@@ -0,0 +1,132 @@
+"""Synthetic punishment logs for benchmarks.
+
+The generated lines have the same shape as the ones ``Database`` writes:
+Korean names and reasons, a handful of moderators, monotonically increasing
+``created_at`` values and an optional sprinkling of malformed lines.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterator
+
+_SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+_SYLLABLES = "민서준지하윤도현우진수영예은채다유시연주성"
+_PUNISHMENTS = ["경고", "채팅 금지", "타임아웃", "음성 채널 금지", "추방", "영구 차단"]
+_DURATIONS = ["1시간", "6시간", "1일", "3일", "7일", "30일", "1h", "7d", None]
+_REASONS = [
+    "도배 및 반복 메시지 전송",
+    "욕설 및 비하 발언",
+    "허가되지 않은 홍보 링크 게시: https://discord.gg/{code}",
+    "피싱 의심 링크 게시: http://nitro-{code}.example",
+    "운영진 사칭",
+    "음란물 게시",
+    "분쟁 유발 및 타 유저 저격",
+    "규칙 {rule}조 위반",
+    "신고 누적 {count}회",
+]
+_RELEASE_REASONS = [
+    "기간 만료",
+    "이의 제기 수용",
+    "오처벌 정정",
+    "운영진 재검토 결과 해제",
+]
+
+
+def _name(rng: random.Random) -> str:
+    return rng.choice(_SURNAMES) + "".join(rng.choices(_SYLLABLES, k=2))
+
+
+def iter_entries(
+    count: int,
+    *,
+    release_ratio: float = 0.3,
+    users: int = 5000,
+    moderators: int = 8,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    seed: int = 0,
+) -> Iterator[dict[str, Any]]:
+    """Yield ``count`` well-formed entries in ``created_at`` order.
+
+    Timestamps are spread between ``start`` and ``end``, which default to the
+    beginning of the current month and now.  That matches what the active
+    log file holds, so the first append of a benchmark does not seal it.
+    """
+
+    rng = random.Random(seed)
+    user_pool = [(10**17 + rng.randrange(10**17), _name(rng)) for _ in range(users)]
+    moderator_pool = [
+        (10**17 + rng.randrange(10**17), _name(rng)) for _ in range(moderators)
+    ]
+    end = end or datetime.now().replace(microsecond=0)
+    start = start or end.replace(day=1, hour=0, minute=0, second=0)
+    step = (end - start).total_seconds() / max(1, count)
+    for index in range(count):
+        offset = (index + rng.random()) * step
+        created_at = start + timedelta(seconds=int(offset))
+        user_id, user_name = rng.choice(user_pool)
+        moderator_id, moderator_name = rng.choice(moderator_pool)
+        punishment = rng.choice(_PUNISHMENTS)
+        entry: dict[str, Any] = {
+            "kind": "release" if rng.random() < release_ratio else "punishment",
+            "user_id": user_id,
+            "user_name": user_name,
+            "punishment": punishment,
+        }
+        if entry["kind"] == "punishment":
+            entry["reason"] = rng.choice(_REASONS).format(
+                code=f"{rng.randrange(16**6):06x}",
+                rule=rng.randint(1, 12),
+                count=rng.randint(2, 20),
+            )
+        else:
+            entry["reason"] = rng.choice(_RELEASE_REASONS)
+        entry["moderator_id"] = moderator_id
+        entry["moderator_name"] = moderator_name
+        entry["created_at"] = created_at.isoformat(timespec="seconds")
+        duration = rng.choice(_DURATIONS) if entry["kind"] == "punishment" else None
+        if duration is not None:
+            entry["duration"] = duration
+        yield entry
+
+
+def _malformed_line(rng: random.Random, line: bytes) -> bytes:
+    choice = rng.randrange(4)
+    if choice == 0:
+        # A write that was cut off half way.
+        return line[: rng.randint(1, max(1, len(line) - 2))] + b"\n"
+    if choice == 1:
+        return b"\n"
+    if choice == 2:
+        return b'["not", "an", "entry"]\n'
+    return b"\xff\xfe invalid utf-8\n"
+
+
+def write_log(
+    path: str | Path,
+    lines: int,
+    *,
+    release_ratio: float = 0.3,
+    malformed_ratio: float = 0.001,
+    seed: int = 0,
+) -> int:
+    """Write a synthetic text log of ``lines`` lines to ``path``.
+
+    Roughly ``malformed_ratio`` of the lines are damaged the way a crash or a
+    manual edit would leave them.  Returns the size of the file in bytes.
+    """
+
+    rng = random.Random(seed + 1)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as fp:
+        for entry in iter_entries(lines, release_ratio=release_ratio, seed=seed):
+            line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            if rng.random() < malformed_ratio:
+                line = _malformed_line(rng, line)
+            fp.write(line)
+        return fp.tell()
@@ -2,6 +2,17 @@
 
 from __future__ import annotations
 
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -11,9 +22,85 @@ from dotenv import find_dotenv, load_dotenv
 
 from inspect import signature
 
+from adminbot.cache import LRUCache
 from adminbot.config import BotConfig
-from adminbot.database import Database, format_entries
-from adminbot.embeds import log_embed, punishment_embed, release_embed
+from adminbot.database import format_entries, open_database, storage_path
+from adminbot.embeds import (
+    MAX_LOGGED_REASON_CHARS,
+    active_punishments_embeds,
+    log_embeds,
+    pack_embeds,
+    punishment_embed,
+    release_embed,
+    search_embeds,
+    stats_embeds,
+    status_embed,
+    user_history_embeds,
+)
+from adminbot.export import export_entries
+from adminbot.metrics import (
+    COMMAND_SECONDS,
+    DM_FAILURES,
+    LOG_BYTES,
+    LOG_RENDER_CACHE,
+    MALFORMED_LINES,
+    OUTBOX_DELIVERIES,
+    OUTBOX_PENDING,
+    STAGE_SECONDS,
+    STORAGE_SECONDS,
+    serve_metrics,
+)
+from adminbot.outbox import Outbox, OutboxItem, PermanentFailure, RetryAfter
+from adminbot.punishments import (
+    ActivePunishment,
+    ActivePunishments,
+    format_active_punishments,
+)
+from adminbot.stats import LogStatistics
+from adminbot.views import LogPageView
+
+log = logging.getLogger(__name__)
+
+
+# Longest wait in seconds for the channel announcements before the moderator
+# gets their confirmation; a slow or rate limited post must not hold it up.
+_SEND_TIMEOUT = 10.0
+
+# Maximum number of users accepted by the bulk punishment command.
+_MAX_BULK_USERS = 50
+# Longest list of names put into a single status message (Discord caps
+# message content at 2000 characters).
+_MAX_NAMES_LENGTH = 1800
+_USER_ID_PATTERN = re.compile(r"\d{15,20}")
+
+# Bounds of the on-demand member cache and the number of concurrent member
+# fetches used when the gateway member cache is not available.
+_MEMBER_CACHE_SIZE = 1024
+_MEMBER_CACHE_TTL = 300.0
+_MEMBER_FETCH_CONCURRENCY = 5
+# Number of rendered punishment log responses kept between requests.
+_LOG_RENDER_CACHE_SIZE = 32
+
+# The metrics endpoint only listens locally; scrape it from the same host or
+# through a tunnel.
+_METRICS_HOST = "127.0.0.1"
+# Number of slowest command stages listed by the status command.
+_STATUS_STAGE_COUNT = 8
+# Number of punishment types and moderators listed by the statistics command.
+_STATS_TOP_COUNT = 10
+_MONTH_PATTERN = re.compile(r"(\d{4})-(\d{1,2})")
+
+# Reason stored and announced when the bot lifts a punishment whose duration
+# ran out.
+_EXPIRY_REASON = "처벌 기간 만료"
+# Expired punishments lifted concurrently; the storage writer groups their
+# releases into shared commits.
+_EXPIRY_BATCH = 50
+# Delay before retrying a punishment whose release could not be stored.
+_EXPIRY_RETRY_DELAY = 60.0
+# Longest single wait of the expiry task, so that wall clock adjustments are
+# noticed even when the next expiry is far away.
+_EXPIRY_MAX_SLEEP = 3600.0
 
 
 def _supports_localizations(callable_obj) -> bool:
@@ -26,6 +113,95 @@ def _supports_localizations(callable_obj) -> bool:
     return "name_localizations" in params and "description_localizations" in params
 
 
+def _parse_user_ids(text: str) -> list[int]:
+    """Extract unique user IDs from mentions or raw IDs, keeping their order."""
+
+    return list(dict.fromkeys(int(match) for match in _USER_ID_PATTERN.findall(text)))
+
+
+def _parse_month(text: str) -> tuple[date, date] | None:
+    """Return the first and last day of a ``YYYY-MM`` month."""
+
+    match = _MONTH_PATTERN.fullmatch(text.strip())
+    if match is None or not 1 <= int(match.group(2)) <= 12:
+        return None
+    start = date(int(match.group(1)), int(match.group(2)), 1)
+    following = (start + timedelta(days=31)).replace(day=1)
+    return start, following - timedelta(days=1)
+
+
+def _parse_date_range(
+    since: str | None, until: str | None
+) -> tuple[datetime | None, datetime | None]:
+    """Turn inclusive ``YYYY-MM-DD`` bounds into a ``[start, end)`` range.
+
+    Raises ``ValueError`` for dates in any other format.
+    """
+
+    start = end = None
+    if since:
+        start = datetime.combine(date.fromisoformat(since.strip()), datetime.min.time())
+    if until:
+        end = datetime.combine(
+            date.fromisoformat(until.strip()) + timedelta(days=1), datetime.min.time()
+        )
+    return start, end
+
+
+async def _command_payload(command, tree: app_commands.CommandTree) -> dict:
+    """Return the payload ``tree.sync`` uploads for ``command``.
+
+    Newer discord.py releases pass the tree to the serialisation helpers, so
+    the call is adapted to whichever signature is available.
+    """
+
+    translator = tree.translator
+    if translator is not None:
+        if "tree" in signature(command.get_translated_payload).parameters:
+            return await command.get_translated_payload(tree, translator)
+        return await command.get_translated_payload(translator)
+    if "tree" in signature(command.to_dict).parameters:
+        return command.to_dict(tree)
+    return command.to_dict()
+
+
+def _command_label(interaction: discord.Interaction) -> str:
+    """Return the metric label of the command behind ``interaction``."""
+
+    command = interaction.command
+    return command.qualified_name if command is not None else "unknown"
+
+
+def _stage(interaction: discord.Interaction, stage: str):
+    """Time a stage of the command behind ``interaction``."""
+
+    return STAGE_SECONDS.time(_command_label(interaction), stage)
+
+
+def _observe_command(interaction: discord.Interaction, outcome: str) -> None:
+    """Record how long the command behind ``interaction`` took."""
+
+    started_at = interaction.extras.get("started_at")
+    if started_at is not None:
+        COMMAND_SECONDS.observe(
+            time.perf_counter() - started_at, _command_label(interaction), outcome
+        )
+
+
+class _HanbyeolTree(app_commands.CommandTree):
+    """Command tree that times every command it runs."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started_at"] = time.perf_counter()
+        return True
+
+    async def on_error(
+        self, interaction: discord.Interaction, error: app_commands.AppCommandError
+    ) -> None:
+        _observe_command(interaction, "error")
+        await super().on_error(interaction, error)
+
+
 async def _reply_permission_denied(interaction: discord.Interaction) -> None:
     """Send an ephemeral permission denied response if possible."""
 
@@ -49,12 +225,57 @@ async def _reply_guild_only(interaction: discord.Interaction) -> None:
 class HanbyeolBot(commands.Bot):
     """Discord bot that manages punishment reports for the Hanbyeol server."""
 
-    def __init__(self, *, config: BotConfig) -> None:
+    def __init__(self, *, config: BotConfig, force_sync: bool = False) -> None:
         intents = discord.Intents.default()
-        intents.members = True
-        super().__init__(command_prefix="!", intents=intents)
+        bot_kwargs: dict[str, object] = {}
+        if config.lean_gateway:
+            # Members are not downloaded or cached; commands work from the
+            # interaction payload and fetch anything else on demand.
+            intents.members = False
+            bot_kwargs["chunk_guilds_at_startup"] = False
+            bot_kwargs["member_cache_flags"] = discord.MemberCacheFlags.none()
+        else:
+            intents.members = True
+        super().__init__(
+            command_prefix="!",
+            intents=intents,
+            tree_cls=_HanbyeolTree,
+            **bot_kwargs,
+        )
         self.config = config
-        self.database = Database(config.database_path)
+        self.database = open_database(
+            config.database_path,
+            fsync=config.fsync_policy,
+            segment_max_bytes=config.segment_max_bytes,
+        )
+        self.outbox = Outbox(config.outbox_path)
+        OUTBOX_PENDING.set_function(lambda: self.outbox.pending)
+        self.active_punishments = ActivePunishments()
+        self.statistics = LogStatistics()
+        self._expiry_wakeup = asyncio.Event()
+        self._expiry_task: asyncio.Task[None] | None = None
+        self._metrics_server: asyncio.AbstractServer | None = None
+        self.force_sync = force_sync
+        # Members fetched on demand, keyed by ``(guild_id, user_id)``.
+        self._members: LRUCache[tuple[int, int], discord.Member] = LRUCache(
+            _MEMBER_CACHE_SIZE, ttl=_MEMBER_CACHE_TTL
+        )
+        # Rendered punishment log responses keyed by the query and the storage
+        # version they were read at, and the renders still in progress.
+        self._log_renders: LRUCache[tuple, list[list[discord.Embed]]] = LRUCache(
+            _LOG_RENDER_CACHE_SIZE
+        )
+        self._pending_log_renders: dict[
+            tuple, asyncio.Task[list[list[discord.Embed]]]
+        ] = {}
+        database_file = storage_path(config.database_path)
+        self._sync_state_path = database_file.with_name(
+            database_file.name + ".commands.json"
+        )
+        # Time up to which every expired punishment has been lifted.
+        self._expiry_state_path = database_file.with_name(
+            database_file.name + ".expiry.json"
+        )
 
         group_kwargs: dict[str, object] = {
             "name": "한별",
@@ -70,24 +291,286 @@ class HanbyeolBot(commands.Bot):
                 "en-GB": "Hanbyeol administration commands.",
             }
 
+        # Strong references to fire-and-forget tasks so they are not collected
+        # before they finish.
+        self._background_tasks: set[asyncio.Task[None]] = set()
+
         self.hanbyeol = app_commands.Group(**group_kwargs)
         self.tree.add_command(self.hanbyeol)
 
         self._register_commands()
 
-    async def _safe_send_dm(
+    async def _send_outbox_item(self, item: OutboxItem) -> None:
+        """Deliver one outbox item, translating Discord errors for retries."""
+
+        payloads = item.embeds or ([item.embed] if item.embed else [])
+        embeds = [discord.Embed.from_dict(payload) for payload in payloads]
+        result = "error"
+        try:
+            if item.target == "channel":
+                with STAGE_SECONDS.time("outbox", "resolve_channel"):
+                    recipient: discord.abc.Messageable = await self._resolve_channel(
+                        item.target_id
+                    )
+                stage = "channel_send"
+            else:
+                # Opening the DM channel directly needs no user object, so
+                # lean mode does not spend a user fetch on every DM.
+                with STAGE_SECONDS.time("outbox", "resolve_user"):
+                    recipient = await self.create_dm(discord.Object(id=item.target_id))
+                stage = "dm"
+            # No timeout here: the library may be waiting out a rate limit,
+            # and cutting that short would retry (and possibly duplicate) a
+            # send that is still going to happen.
+            with STAGE_SECONDS.time("outbox", stage):
+                await recipient.send(content=item.content, embeds=embeds)
+            result = "ok"
+        except discord.RateLimited as exc:
+            result = "rate_limited"
+            raise RetryAfter(exc.retry_after) from exc
+        except (discord.Forbidden, discord.NotFound) as exc:
+            result = "permanent"
+            raise PermanentFailure(str(exc)) from exc
+        except discord.HTTPException as exc:
+            if exc.status == 429:
+                result = "rate_limited"
+                raise RetryAfter(float(exc.response.headers.get("Retry-After", 1))) from exc
+            if 400 <= exc.status < 500:
+                result = "permanent"
+                raise PermanentFailure(str(exc)) from exc
+            raise
+        finally:
+            OUTBOX_DELIVERIES.inc(1, item.target, result)
+
+    def _on_entries_stored(self, entries: list) -> None:
+        """Keep the active punishments current as entries are logged."""
+
+        self.active_punishments.apply_many(entries)
+        self._expiry_wakeup.set()
+
+    async def _run_expiry(self) -> None:
+        """Lift punishments as their durations run out.
+
+        A single task sleeps until the soonest expiry in the heap, or until a
+        newly logged entry may have moved it, so the cost does not depend on
+        how many punishments are active.
+        """
+
+        while True:
+            self._expiry_wakeup.clear()
+            now = datetime.now()
+            expired = self.active_punishments.pop_expired(now)
+            lifted = True
+            for start in range(0, len(expired), _EXPIRY_BATCH):
+                batch = expired[start : start + _EXPIRY_BATCH]
+                results = await asyncio.gather(
+                    *(self._lift_expired(item) for item in batch),
+                    return_exceptions=True,
+                )
+                for item, result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        # Keep the task alive; the item is tried again later.
+                        log.error(
+                            "Could not lift expired punishment %r for %s",
+                            item.punishment,
+                            item.user_id,
+                            exc_info=result,
+                        )
+                        self.active_punishments.reschedule(
+                            item,
+                            datetime.now() + timedelta(seconds=_EXPIRY_RETRY_DELAY),
+                        )
+                    lifted = lifted and result is True
+            if expired and lifted:
+                await self._store_expiry_watermark(now)
+
+            timeout = _EXPIRY_MAX_SLEEP
+            next_expiry = self.active_punishments.next_expiry()
+            if next_expiry is not None:
+                remaining = (next_expiry - datetime.now()).total_seconds()
+                timeout = min(timeout, max(0.0, remaining))
+            try:
+                await asyncio.wait_for(self._expiry_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _lift_expired(self, item: ActivePunishment) -> bool:
+        """Log the release of an expired punishment and announce it.
+
+        Return whether the release was stored; the punishment is rescheduled
+        if it was not.
+        """
+
+        moderator = self.user
+        try:
+            await self.database.log_release(
+                user_id=item.user_id,
+                user_name=item.user_name,
+                punishment=item.punishment,
+                reason=_EXPIRY_REASON,
+                moderator_id=moderator.id,
+                moderator_name=str(moderator),
+            )
+        except Exception:
+            log.exception(
+                "Could not store the release of expired punishment %r for %s",
+                item.punishment,
+                item.user_id,
+            )
+            self.active_punishments.reschedule(
+                item, datetime.now() + timedelta(seconds=_EXPIRY_RETRY_DELAY)
+            )
+            return False
+
+        try:
+            user = self.get_user(item.user_id) or await self.fetch_user(item.user_id)
+        except Exception:
+            log.exception("Could not find user %s to announce a release", item.user_id)
+            return True
+        embed = release_embed(
+            user=user,
+            punishment=item.punishment,
+            reason=_EXPIRY_REASON,
+            moderator=moderator,
+        )
+        try:
+            await self.outbox.enqueue_many(
+                [
+                    OutboxItem(
+                        target="channel",
+                        target_id=self.config.announcement_channel_id,
+                        embeds=[embed.to_dict()],
+                    ),
+                    OutboxItem(
+                        target="user",
+                        target_id=user.id,
+                        content="한별 서버에서 처벌 기간이 만료되어 처벌이 해제되었습니다.",
+                        embeds=[embed.to_dict()],
+                    ),
+                ]
+            )
+        except Exception:
+            log.exception(
+                "Could not queue the announcement of expired punishment %r for %s",
+                item.punishment,
+                item.user_id,
+            )
+        return True
+
+    def _load_expiry_watermark(self) -> datetime | None:
+        """Return the stored expiry watermark, or ``None`` on the first run."""
+
+        try:
+            state = json.loads(self._expiry_state_path.read_text(encoding="utf-8"))
+            return datetime.fromisoformat(state["watermark"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return None
+
+    async def _store_expiry_watermark(self, watermark: datetime) -> None:
+        state = {"watermark": watermark.isoformat(timespec="seconds")}
+        try:
+            await asyncio.to_thread(
+                self._expiry_state_path.write_text, json.dumps(state), encoding="utf-8"
+            )
+        except OSError:
+            log.exception("Could not store the expiry watermark")
+
+    async def _deliver(
         self,
-        recipient: discord.abc.Messageable,
+        interaction: discord.Interaction,
         *,
-        content: str | None = None,
-        embed: discord.Embed | None = None,
+        embed: discord.Embed,
+        target: discord.abc.Snowflake,
+        target_message: str,
+        moderator_message: str,
+        confirmation: str,
     ) -> None:
-        """Attempt to send a DM and silently ignore delivery issues."""
+        """Queue the announcement and both DMs for a single-user command."""
 
-        try:
-            await recipient.send(content=content, embed=embed)
-        except (discord.Forbidden, discord.HTTPException):
-            pass
+        await self._dispatch(
+            interaction,
+            announcements=[[embed]],
+            dms={
+                "대상자": (target.id, target_message, [embed]),
+                "담당자": (interaction.user.id, moderator_message, [embed]),
+            },
+            confirmation=confirmation,
+        )
+
+    async def _dispatch(
+        self,
+        interaction: discord.Interaction,
+        *,
+        announcements: list[list[discord.Embed]],
+        dms: dict[str, tuple[int, str, list[discord.Embed]]],
+        confirmation: str,
+    ) -> None:
+        """Queue channel messages and labelled DMs in the outbox.
+
+        Everything is journaled with one write.  The confirmation is sent once
+        the channel messages went out, or after ``_SEND_TIMEOUT`` with a note
+        that the outbox keeps retrying them.  DM results are reported
+        afterwards in a separate ephemeral message.
+        """
+
+        items = [
+            OutboxItem(
+                target="channel",
+                target_id=self.config.announcement_channel_id,
+                embeds=[embed.to_dict() for embed in embeds],
+            )
+            for embeds in announcements
+        ]
+        items.extend(
+            OutboxItem(
+                target="user",
+                target_id=user_id,
+                content=content,
+                embeds=[embed.to_dict() for embed in embeds],
+            )
+            for user_id, content, embeds in dms.values()
+        )
+        with _stage(interaction, "enqueue"):
+            futures = await self.outbox.enqueue_many(items)
+        posted = futures[: len(announcements)]
+        self._spawn(
+            self._report_dm_results(
+                interaction, dict(zip(dms, futures[len(announcements) :]))
+            )
+        )
+
+        with _stage(interaction, "announce"):
+            await asyncio.wait(posted, timeout=_SEND_TIMEOUT)
+        if not all(future.done() and future.result() for future in posted):
+            confirmation += " (채널 공지는 전송 대기 중이며 자동으로 다시 시도합니다.)"
+        with _stage(interaction, "confirm"):
+            await interaction.followup.send(confirmation, ephemeral=True)
+
+    async def _report_dm_results(
+        self, interaction: discord.Interaction, dms: dict[str, asyncio.Future[bool]]
+    ) -> None:
+        """Tell the moderator which DMs could not be delivered, if any."""
+
+        await asyncio.wait(dms.values())
+        failed = [name for name, future in dms.items() if not future.result()]
+        if failed:
+            DM_FAILURES.inc(len(failed))
+            names = ", ".join(failed)
+            if len(names) > _MAX_NAMES_LENGTH:
+                names = names[:_MAX_NAMES_LENGTH] + f"… (총 {len(failed)}명)"
+            try:
+                await interaction.followup.send(
+                    f"DM 전송에 실패했습니다: {names}", ephemeral=True
+                )
+            except discord.HTTPException:
+                pass
+
+    def _spawn(self, coro) -> None:
+        """Run ``coro`` in the background while keeping a reference to it."""
+
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
     async def on_app_command_error(
         self, interaction: discord.Interaction, error: app_commands.AppCommandError
@@ -108,15 +591,18 @@ class HanbyeolBot(commands.Bot):
     ) -> bool:
         """Verify that the invoker has the required role and notify if not."""
 
-        if not isinstance(interaction.user, discord.Member):
-            await _reply_guild_only(interaction)
-            return False
+        with _stage(interaction, "role_check"):
+            if not isinstance(interaction.user, discord.Member):
+                await _reply_guild_only(interaction)
+                return False
 
-        if any(role.id == required_role_id for role in interaction.user.roles):
-            return True
+            # The member comes from the interaction payload, so this works
+            # without the gateway member cache.
+            if interaction.user.get_role(required_role_id) is not None:
+                return True
 
-        await _reply_permission_denied(interaction)
-        return False
+            await _reply_permission_denied(interaction)
+            return False
 
     def _register_commands(self) -> None:
         punishment_kwargs: dict[str, object] = {
@@ -152,18 +638,19 @@ class HanbyeolBot(commands.Bot):
             ):
                 return
 
-            await interaction.response.defer(ephemeral=True, thinking=True)
-            await self.database.log_punishment(
-                user_id=user.id,
-                user_name=str(user),
-                punishment=punishment,
-                reason=reason,
-                duration=duration,
-                moderator_id=interaction.user.id,
-                moderator_name=str(interaction.user),
-            )
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            with _stage(interaction, "database"):
+                await self.database.log_punishment(
+                    user_id=user.id,
+                    user_name=str(user),
+                    punishment=punishment,
+                    reason=reason,
+                    duration=duration,
+                    moderator_id=interaction.user.id,
+                    moderator_name=str(interaction.user),
+                )
 
-            channel = await self._resolve_channel()
             embed = punishment_embed(
                 user=user,
                 punishment=punishment,
@@ -171,18 +658,14 @@ class HanbyeolBot(commands.Bot):
                 duration=duration,
                 moderator=interaction.user,
             )
-            await channel.send(embed=embed)
-            await self._safe_send_dm(
-                user,
-                content="한별 서버에서 다음 처벌이 적용되었습니다.",
-                embed=embed.copy(),
-            )
-            await self._safe_send_dm(
-                interaction.user,
-                content="처벌 정보가 성공적으로 전송되었습니다.",
-                embed=embed.copy(),
+            await self._deliver(
+                interaction,
+                embed=embed,
+                target=user,
+                target_message="한별 서버에서 다음 처벌이 적용되었습니다.",
+                moderator_message="처벌 정보가 성공적으로 전송되었습니다.",
+                confirmation="처벌 정보를 전송하고 저장했습니다.",
             )
-            await interaction.followup.send("처벌 정보를 전송하고 저장했습니다.", ephemeral=True)
 
         release_kwargs: dict[str, object] = {
             "name": "처벌해제정보전송",
@@ -215,35 +698,131 @@ class HanbyeolBot(commands.Bot):
             ):
                 return
 
-            await interaction.response.defer(ephemeral=True, thinking=True)
-            await self.database.log_release(
-                user_id=user.id,
-                user_name=str(user),
-                punishment=punishment,
-                reason=reason,
-                moderator_id=interaction.user.id,
-                moderator_name=str(interaction.user),
-            )
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            with _stage(interaction, "database"):
+                await self.database.log_release(
+                    user_id=user.id,
+                    user_name=str(user),
+                    punishment=punishment,
+                    reason=reason,
+                    moderator_id=interaction.user.id,
+                    moderator_name=str(interaction.user),
+                )
 
-            channel = await self._resolve_channel()
             embed = release_embed(
                 user=user,
                 punishment=punishment,
                 reason=reason,
                 moderator=interaction.user,
             )
-            await channel.send(embed=embed)
-            await self._safe_send_dm(
-                user,
-                content="한별 서버에서 처벌이 해제되었습니다.",
-                embed=embed.copy(),
+            await self._deliver(
+                interaction,
+                embed=embed,
+                target=user,
+                target_message="한별 서버에서 처벌이 해제되었습니다.",
+                moderator_message="처벌 해제 정보가 성공적으로 전송되었습니다.",
+                confirmation="처벌 해제 정보를 전송하고 저장했습니다.",
             )
-            await self._safe_send_dm(
-                interaction.user,
-                content="처벌 해제 정보가 성공적으로 전송되었습니다.",
-                embed=embed.copy(),
+
+        bulk_kwargs: dict[str, object] = {
+            "name": "일괄처벌정보전송",
+            "description": "여러 유저에게 같은 처벌을 한 번에 적용하고 전송합니다.",
+        }
+        if _supports_localizations(self.hanbyeol.command):
+            bulk_kwargs["name_localizations"] = {
+                "en-US": "send_bulk_punishment",
+                "en-GB": "send_bulk_punishment",
+            }
+            bulk_kwargs["description_localizations"] = {
+                "en-US": "Apply and announce the same punishment for several users.",
+                "en-GB": "Apply and announce the same punishment for several users.",
+            }
+
+        @self.hanbyeol.command(**bulk_kwargs)
+        @app_commands.describe(
+            users=f"처벌할 유저 멘션 또는 ID 목록 (공백/쉼표로 구분, 최대 {_MAX_BULK_USERS}명)",
+            punishment="적용할 처벌 종류",
+            reason="처벌 사유",
+            duration="처벌 기간 (선택 사항)",
+        )
+        async def send_bulk_punishment(
+            interaction: discord.Interaction,
+            users: str,
+            punishment: str,
+            reason: str,
+            duration: str | None = None,
+        ) -> None:
+            if not await self._ensure_role(
+                interaction, required_role_id=self.config.punishment_role_id
+            ):
+                return
+
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            user_ids = _parse_user_ids(users)
+            if not user_ids:
+                await interaction.followup.send("처벌할 유저를 찾지 못했습니다.", ephemeral=True)
+                return
+            if len(user_ids) > _MAX_BULK_USERS:
+                await interaction.followup.send(
+                    f"한 번에 최대 {_MAX_BULK_USERS}명까지 처벌할 수 있습니다.", ephemeral=True
+                )
+                return
+
+            with _stage(interaction, "resolve_members"):
+                members, missing = await self._resolve_members(
+                    interaction.guild, user_ids
+                )
+            if not members:
+                await interaction.followup.send(
+                    "서버에서 처벌할 유저를 찾지 못했습니다.", ephemeral=True
+                )
+                return
+
+            with _stage(interaction, "database"):
+                await self.database.log_punishments(
+                    users=[(member.id, str(member)) for member in members],
+                    punishment=punishment,
+                    reason=reason,
+                    duration=duration,
+                    moderator_id=interaction.user.id,
+                    moderator_name=str(interaction.user),
+                )
+
+            embeds = [
+                punishment_embed(
+                    user=member,
+                    punishment=punishment,
+                    reason=reason,
+                    duration=duration,
+                    moderator=interaction.user,
+                )
+                for member in members
+            ]
+            confirmation = f"{len(members)}명의 처벌 정보를 전송하고 저장했습니다."
+            if missing:
+                confirmation += f" 찾지 못한 ID: {', '.join(map(str, missing))}"
+            await self._dispatch(
+                interaction,
+                announcements=pack_embeds(embeds),
+                dms={
+                    **{
+                        str(member): (
+                            member.id,
+                            "한별 서버에서 다음 처벌이 적용되었습니다.",
+                            [embed],
+                        )
+                        for member, embed in zip(members, embeds)
+                    },
+                    "담당자": (
+                        interaction.user.id,
+                        f"일괄 처벌 정보가 성공적으로 전송되었습니다. ({len(members)}명)",
+                        [],
+                    ),
+                },
+                confirmation=confirmation,
             )
-            await interaction.followup.send("처벌 해제 정보를 전송하고 저장했습니다.", ephemeral=True)
 
         log_kwargs: dict[str, object] = {
             "name": "처벌로그",
@@ -262,44 +841,629 @@ class HanbyeolBot(commands.Bot):
         @self.hanbyeol.command(**log_kwargs)
         @app_commands.describe(
             count="최근 내역을 몇 묶음(5개 단위) 확인할지 지정합니다.",
+            since="이 날짜부터의 기록만 봅니다. (YYYY-MM-DD, 선택 사항)",
+            until="이 날짜까지의 기록만 봅니다. (YYYY-MM-DD, 선택 사항)",
         )
         async def punishment_log(
-            interaction: discord.Interaction, count: app_commands.Range[int, 1, 10]
+            interaction: discord.Interaction,
+            count: app_commands.Range[int, 1, 10],
+            since: str | None = None,
+            until: str | None = None,
         ) -> None:
             if not await self._ensure_role(
                 interaction, required_role_id=self.config.log_role_id
             ):
                 return
 
-            await interaction.response.defer(ephemeral=True, thinking=True)
+            try:
+                start, end = _parse_date_range(since, until)
+            except ValueError:
+                await interaction.response.send_message(
+                    "날짜는 2024-05-01 처럼 YYYY-MM-DD 형식으로 입력해 주세요.",
+                    ephemeral=True,
+                )
+                return
+
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            messages = await self._punishment_log_messages(
+                _command_label(interaction), min(50, count * 5), start, end
+            )
+            with _stage(interaction, "reply"):
+                for embeds in messages:
+                    await interaction.followup.send(embeds=embeds, ephemeral=True)
+
+        browse_kwargs: dict[str, object] = {
+            "name": "로그탐색",
+            "description": "저장된 처벌 로그를 페이지 단위로 넘겨 봅니다.",
+        }
+        if _supports_localizations(self.hanbyeol.command):
+            browse_kwargs["name_localizations"] = {
+                "en-US": "browse_log",
+                "en-GB": "browse_log",
+            }
+            browse_kwargs["description_localizations"] = {
+                "en-US": "Page through stored punishment logs.",
+                "en-GB": "Page through stored punishment logs.",
+            }
+
+        @self.hanbyeol.command(**browse_kwargs)
+        @app_commands.describe(page_size="한 페이지에 보여줄 기록 수")
+        async def browse_log(
+            interaction: discord.Interaction,
+            page_size: app_commands.Range[int, 1, 10] = 5,
+        ) -> None:
+            if not await self._ensure_role(
+                interaction, required_role_id=self.config.log_role_id
+            ):
+                return
+
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            view = LogPageView(
+                database=self.database,
+                owner_id=interaction.user.id,
+                page_size=page_size,
+            )
+            with _stage(interaction, "database"):
+                embed = await view.render()
+            with _stage(interaction, "reply"):
+                view.message = await interaction.followup.send(
+                    embed=embed, view=view, ephemeral=True
+                )
+
+        history_kwargs: dict[str, object] = {
+            "name": "유저기록",
+            "description": "특정 유저의 처벌 및 해제 내역을 확인합니다.",
+        }
+        if _supports_localizations(self.hanbyeol.command):
+            history_kwargs["name_localizations"] = {
+                "en-US": "user_history",
+                "en-GB": "user_history",
+            }
+            history_kwargs["description_localizations"] = {
+                "en-US": "Inspect every stored punishment and release of a user.",
+                "en-GB": "Inspect every stored punishment and release of a user.",
+            }
+
+        @self.hanbyeol.command(**history_kwargs)
+        @app_commands.describe(
+            user="기록을 확인할 유저",
+            count="최근 내역을 몇 묶음(5개 단위) 확인할지 지정합니다.",
+        )
+        async def user_history(
+            interaction: discord.Interaction,
+            user: discord.User,
+            count: app_commands.Range[int, 1, 10] = 1,
+        ) -> None:
+            if not await self._ensure_role(
+                interaction, required_role_id=self.config.log_role_id
+            ):
+                return
+
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
             limit = min(50, count * 5)
-            punishments = await self.database.get_recent_punishments(limit)
-            releases = await self.database.get_recent_releases(limit)
+            with _stage(interaction, "database"):
+                history = await self.database.get_user_history(user.id, limit)
+
+            with _stage(interaction, "render"):
+                messages = user_history_embeds(
+                    user=user,
+                    punishments=format_entries(
+                        history["punishment"], reason_limit=MAX_LOGGED_REASON_CHARS
+                    ),
+                    releases=format_entries(
+                        history["release"], reason_limit=MAX_LOGGED_REASON_CHARS
+                    ),
+                )
+            with _stage(interaction, "reply"):
+                for embeds in messages:
+                    await interaction.followup.send(embeds=embeds, ephemeral=True)
+
+        active_kwargs: dict[str, object] = {
+            "name": "처벌현황",
+            "description": "현재 적용 중인 처벌과 만료 시각을 확인합니다.",
+        }
+        if _supports_localizations(self.hanbyeol.command):
+            active_kwargs["name_localizations"] = {
+                "en-US": "active_punishments",
+                "en-GB": "active_punishments",
+            }
+            active_kwargs["description_localizations"] = {
+                "en-US": "List punishments in force and when they expire.",
+                "en-GB": "List punishments in force and when they expire.",
+            }
 
-            embed = log_embed(
-                punishments=format_entries(punishments),
-                releases=format_entries(releases),
+        @self.hanbyeol.command(**active_kwargs)
+        @app_commands.describe(count="만료가 가까운 순서로 보여줄 처벌 수")
+        async def active_punishments(
+            interaction: discord.Interaction,
+            count: app_commands.Range[int, 1, 100] = 25,
+        ) -> None:
+            if not await self._ensure_role(
+                interaction, required_role_id=self.config.log_role_id
+            ):
+                return
+
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            with _stage(interaction, "render"):
+                active = self.active_punishments.active()
+                messages = active_punishments_embeds(
+                    punishments=format_active_punishments(active[:count]),
+                    total=len(active),
+                )
+            with _stage(interaction, "reply"):
+                for embeds in messages:
+                    await interaction.followup.send(embeds=embeds, ephemeral=True)
+
+        search_kwargs: dict[str, object] = {
+            "name": "로그검색",
+            "description": "처벌 사유와 종류에서 검색어가 들어간 기록을 찾습니다.",
+        }
+        if _supports_localizations(self.hanbyeol.command):
+            search_kwargs["name_localizations"] = {
+                "en-US": "search_log",
+                "en-GB": "search_log",
+            }
+            search_kwargs["description_localizations"] = {
+                "en-US": "Search stored entries by punishment reason and type.",
+                "en-GB": "Search stored entries by punishment reason and type.",
+            }
+
+        @self.hanbyeol.command(**search_kwargs)
+        @app_commands.describe(
+            query="찾을 내용 (두 글자 이상)",
+            limit="보여줄 최대 결과 수",
+        )
+        async def search_log(
+            interaction: discord.Interaction,
+            query: app_commands.Range[str, 2, 200],
+            limit: app_commands.Range[int, 1, 50] = 10,
+        ) -> None:
+            if not await self._ensure_role(
+                interaction, required_role_id=self.config.log_role_id
+            ):
+                return
+
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            with _stage(interaction, "database"):
+                results = await self.database.search_entries(query, limit)
+
+            with _stage(interaction, "render"):
+                messages = search_embeds(
+                    query=query,
+                    results=format_entries(
+                        results, reason_limit=MAX_LOGGED_REASON_CHARS
+                    ),
+                )
+            with _stage(interaction, "reply"):
+                for embeds in messages:
+                    await interaction.followup.send(embeds=embeds, ephemeral=True)
+
+        export_kwargs: dict[str, object] = {
+            "name": "내보내기",
+            "description": "조건에 맞는 로그를 압축 파일(JSONL/CSV)로 내려받습니다.",
+        }
+        if _supports_localizations(self.hanbyeol.command):
+            export_kwargs["name_localizations"] = {
+                "en-US": "export_log",
+                "en-GB": "export_log",
+            }
+            export_kwargs["description_localizations"] = {
+                "en-US": "Download matching log entries as a compressed JSONL or CSV file.",
+                "en-GB": "Download matching log entries as a compressed JSONL or CSV file.",
+            }
+
+        @self.hanbyeol.command(**export_kwargs)
+        @app_commands.rename(file_format="format")
+        @app_commands.describe(
+            file_format="파일 형식 (기본 JSONL)",
+            kind="처벌 또는 해제 기록만 내보냅니다.",
+            user="이 유저의 기록만 내보냅니다.",
+            moderator="이 담당자가 처리한 기록만 내보냅니다.",
+            since="이 날짜부터의 기록만 내보냅니다. (YYYY-MM-DD)",
+            until="이 날짜까지의 기록만 내보냅니다. (YYYY-MM-DD)",
+        )
+        @app_commands.choices(
+            file_format=[
+                app_commands.Choice(name="JSONL", value="jsonl"),
+                app_commands.Choice(name="CSV", value="csv"),
+            ],
+            kind=[
+                app_commands.Choice(name="처벌", value="punishment"),
+                app_commands.Choice(name="해제", value="release"),
+            ],
+        )
+        async def export_log(
+            interaction: discord.Interaction,
+            file_format: str = "jsonl",
+            kind: str | None = None,
+            user: discord.User | None = None,
+            moderator: discord.User | None = None,
+            since: str | None = None,
+            until: str | None = None,
+        ) -> None:
+            if not await self._ensure_role(
+                interaction, required_role_id=self.config.log_role_id
+            ):
+                return
+
+            try:
+                start, end = _parse_date_range(since, until)
+            except ValueError:
+                await interaction.response.send_message(
+                    "날짜는 2024-05-01 처럼 YYYY-MM-DD 형식으로 입력해 주세요.",
+                    ephemeral=True,
+                )
+                return
+
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            filename = f"hanbyeol_logs_{datetime.now():%Y%m%d_%H%M%S}.{file_format}.gz"
+            descriptor, name = await asyncio.to_thread(
+                tempfile.mkstemp, prefix="hanbyeol-export-", suffix=".gz"
+            )
+            os.close(descriptor)
+            path = Path(name)
+            try:
+                with _stage(interaction, "export"):
+                    count = await export_entries(
+                        self.database,
+                        path,
+                        file_format=file_format,
+                        start=start,
+                        end=end,
+                        kind=kind,
+                        user_id=user.id if user else None,
+                        moderator_id=moderator.id if moderator else None,
+                    )
+                size = (await asyncio.to_thread(path.stat)).st_size
+                limit = interaction.guild.filesize_limit
+                if size > limit:
+                    await interaction.followup.send(
+                        f"내보낸 파일이 {size / 1024 / 1024:.1f}MB 로 이 서버의 업로드 한도"
+                        f"({limit / 1024 / 1024:.0f}MB)를 넘습니다. 기간이나 조건을 좁혀 "
+                        "다시 시도해 주세요.",
+                        ephemeral=True,
+                    )
+                    return
+                with _stage(interaction, "upload"):
+                    await interaction.followup.send(
+                        f"{count}건의 기록을 내보냈습니다.",
+                        file=discord.File(path, filename=filename),
+                        ephemeral=True,
+                    )
+            finally:
+                await asyncio.to_thread(path.unlink, missing_ok=True)
+
+        stats_kwargs: dict[str, object] = {
+            "name": "통계",
+            "description": "기간별 처벌/해제 통계를 확인합니다.",
+        }
+        if _supports_localizations(self.hanbyeol.command):
+            stats_kwargs["name_localizations"] = {
+                "en-US": "statistics",
+                "en-GB": "statistics",
+            }
+            stats_kwargs["description_localizations"] = {
+                "en-US": "Show punishment and release statistics for a period.",
+                "en-GB": "Show punishment and release statistics for a period.",
+            }
+
+        @self.hanbyeol.command(**stats_kwargs)
+        @app_commands.describe(
+            days="오늘까지 최근 며칠의 통계를 볼지 지정합니다.",
+            month="특정 달의 통계를 볼 때 YYYY-MM 형식으로 입력합니다. (days 대신 사용)",
+        )
+        async def statistics(
+            interaction: discord.Interaction,
+            days: app_commands.Range[int, 1, 366] = 30,
+            month: str | None = None,
+        ) -> None:
+            if not await self._ensure_role(
+                interaction, required_role_id=self.config.log_role_id
+            ):
+                return
+
+            if month is not None:
+                period = _parse_month(month)
+                if period is None:
+                    await interaction.response.send_message(
+                        "달은 2024-05 처럼 YYYY-MM 형식으로 입력해 주세요.", ephemeral=True
+                    )
+                    return
+                start, end = period
+            else:
+                end = date.today()
+                start = end - timedelta(days=days - 1)
+
+            with _stage(interaction, "defer"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            with _stage(interaction, "render"):
+                summary = self.statistics.summary(start, end)
+                messages = stats_embeds(
+                    start=summary.start,
+                    end=summary.end,
+                    punishments=summary.punishments,
+                    releases=summary.releases,
+                    types=summary.types[:_STATS_TOP_COUNT],
+                    moderators=summary.moderators[:_STATS_TOP_COUNT],
+                    days=summary.days,
+                )
+            with _stage(interaction, "reply"):
+                for embeds in messages:
+                    await interaction.followup.send(embeds=embeds, ephemeral=True)
+
+        status_kwargs: dict[str, object] = {
+            "name": "상태",
+            "description": "봇의 처리 시간과 오류 현황을 확인합니다. (관리자 전용)",
+        }
+        if _supports_localizations(self.hanbyeol.command):
+            status_kwargs["name_localizations"] = {
+                "en-US": "status",
+                "en-GB": "status",
+            }
+            status_kwargs["description_localizations"] = {
+                "en-US": "Show command latencies and error counts (administrators only).",
+                "en-GB": "Show command latencies and error counts (administrators only).",
+            }
+
+        @self.hanbyeol.command(**status_kwargs)
+        async def status(interaction: discord.Interaction) -> None:
+            if not isinstance(interaction.user, discord.Member):
+                await _reply_guild_only(interaction)
+                return
+            if not interaction.user.guild_permissions.administrator:
+                await _reply_permission_denied(interaction)
+                return
+
+            commands_summary = [
+                (
+                    command,
+                    COMMAND_SECONDS.count(command, outcome),
+                    COMMAND_SECONDS.quantile(0.5, command, outcome),
+                    COMMAND_SECONDS.quantile(0.99, command, outcome),
+                )
+                for command, outcome in COMMAND_SECONDS.series()
+                if outcome == "ok"
+            ]
+            stages = sorted(
+                (
+                    (command, stage, STAGE_SECONDS.quantile(0.99, command, stage))
+                    for command, stage in STAGE_SECONDS.series()
+                ),
+                key=lambda item: item[2],
+                reverse=True,
+            )
+            embed = status_embed(
+                commands=commands_summary,
+                stages=stages[:_STATUS_STAGE_COUNT],
+                errors=sum(
+                    COMMAND_SECONDS.count(command, outcome)
+                    for command, outcome in COMMAND_SECONDS.series()
+                    if outcome == "error"
+                ),
+                dm_failures=int(DM_FAILURES.total()),
+                malformed_lines=int(MALFORMED_LINES.total()),
+                log_bytes=int(LOG_BYTES.value("active") + LOG_BYTES.value("sealed")),
+                outbox_pending=self.outbox.pending,
+                append_p99=STORAGE_SECONDS.quantile(0.99, "append"),
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def _punishment_log_messages(
+        self,
+        command: str,
+        limit: int,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[list[discord.Embed]]:
+        """Return the embeds answering a punishment log query.
+
+        Results are cached until the next entry is logged, and identical
+        requests that arrive while one is being read share its result, so a
+        burst of them costs a single read and render.
+        """
+
+        key = (limit, start, end, await self.database.current_version())
+        messages = self._log_renders.get(key)
+        if messages is not None:
+            LOG_RENDER_CACHE.inc(1, "hit")
+            return messages
+
+        task = self._pending_log_renders.get(key)
+        if task is None:
+            LOG_RENDER_CACHE.inc(1, "miss")
+            task = asyncio.create_task(
+                self._render_punishment_log(command, key, limit, start, end)
+            )
+            self._pending_log_renders[key] = task
+            task.add_done_callback(
+                lambda _: self._pending_log_renders.pop(key, None)
+            )
+        else:
+            LOG_RENDER_CACHE.inc(1, "shared")
+        # Shielded so that a cancelled request does not cancel the read for
+        # the others waiting on it.
+        return await asyncio.shield(task)
+
+    async def _render_punishment_log(
+        self,
+        command: str,
+        key: tuple,
+        limit: int,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[list[discord.Embed]]:
+        with STAGE_SECONDS.time(command, "database"):
+            entries = await self.database.get_recent_entries(
+                {"punishment": limit, "release": limit}, start=start, end=end
+            )
+
+        with STAGE_SECONDS.time(command, "render"):
+            messages = log_embeds(
+                punishments=format_entries(
+                    entries["punishment"], reason_limit=MAX_LOGGED_REASON_CHARS
+                ),
+                releases=format_entries(
+                    entries["release"], reason_limit=MAX_LOGGED_REASON_CHARS
+                ),
             )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        self._log_renders.put(key, messages)
+        return messages
+
+    async def _resolve_members(
+        self, guild: discord.Guild, user_ids: list[int]
+    ) -> tuple[list[discord.Member], list[int]]:
+        """Return the members for ``user_ids`` and the IDs that were not found.
+
+        Members missing from the gateway cache and the on-demand LRU are
+        requested in a single gateway query, or fetched over REST with bounded
+        concurrency when the members intent is disabled.
+        """
 
-    async def _resolve_channel(self) -> discord.TextChannel:
+        found: dict[int, discord.Member] = {}
+        for user_id in user_ids:
+            member = guild.get_member(user_id) or self._members.get((guild.id, user_id))
+            if member is not None:
+                found[user_id] = member
+
+        uncached = [user_id for user_id in user_ids if user_id not in found]
+        if uncached and self.intents.members:
+            fetched = await guild.query_members(user_ids=uncached, limit=len(uncached))
+        elif uncached:
+            slots = asyncio.Semaphore(_MEMBER_FETCH_CONCURRENCY)
+
+            async def fetch(user_id: int) -> discord.Member | None:
+                async with slots:
+                    try:
+                        return await guild.fetch_member(user_id)
+                    except discord.NotFound:
+                        return None
+                    except discord.HTTPException as exc:
+                        # Only this member is reported missing; the others
+                        # are still punished.
+                        log.warning("Could not fetch member %s: %s", user_id, exc)
+                        return None
+
+            results = await asyncio.gather(*(fetch(user_id) for user_id in uncached))
+            fetched = [member for member in results if member is not None]
+        else:
+            fetched = []
+        for member in fetched:
+            found[member.id] = member
+            self._members.put((guild.id, member.id), member)
+        members = [found[user_id] for user_id in user_ids if user_id in found]
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        return members, missing
+
+    async def _resolve_channel(
+        self, channel_id: int | None = None
+    ) -> discord.TextChannel:
         """Resolve the announcement channel, fetching it if necessary."""
 
-        channel = self.get_channel(self.config.announcement_channel_id)
+        channel_id = channel_id or self.config.announcement_channel_id
+        channel = self.get_channel(channel_id)
         if channel is None:
-            channel = await self.fetch_channel(self.config.announcement_channel_id)
+            channel = await self.fetch_channel(channel_id)
         if not isinstance(channel, discord.TextChannel):
             raise RuntimeError("처벌 공지 채널을 텍스트 채널로 찾을 수 없습니다.")
         return channel
 
+    async def on_app_command_completion(
+        self,
+        interaction: discord.Interaction,
+        command: app_commands.Command | app_commands.ContextMenu,
+    ) -> None:
+        _observe_command(interaction, "ok")
+
     async def setup_hook(self) -> None:
         await self.database.setup()
+        # Both views are built from a single pass over the log and then kept
+        # current from the entries this process logs.
+        async for entries in self.database.scan_entries():
+            self.active_punishments.apply_many(entries)
+            self.statistics.apply_many(entries)
+        # Punishments that ran out before the watermark, or before the first
+        # start that tracked expiries, are dropped silently instead of being
+        # lifted and announced all at once.
+        watermark = await asyncio.to_thread(self._load_expiry_watermark)
+        if watermark is None:
+            watermark = datetime.now()
+            await self._store_expiry_watermark(watermark)
+        dropped = self.active_punishments.discard_expired(watermark)
+        if dropped:
+            log.info(
+                "Skipped %d punishments that expired before %s", dropped, watermark
+            )
+        self.database.add_listener(self._on_entries_stored)
+        self.database.add_listener(self.statistics.apply_many)
+        await self.outbox.start(self._send_outbox_item)
+        self._expiry_task = asyncio.create_task(self._run_expiry())
+        if self.config.metrics_port is not None:
+            self._metrics_server = await serve_metrics(
+                _METRICS_HOST, self.config.metrics_port
+            )
         await super().setup_hook()
-        if self.config.guild_id:
-            guild = discord.Object(id=self.config.guild_id)
+        await self._sync_commands()
+
+    async def _sync_commands(self) -> None:
+        """Sync the command tree only when its payload or target changed.
+
+        ``tree.sync`` is a slow, heavily rate limited call, so the hash of the
+        payload that was last synced is stored next to the database and the
+        call is skipped on restarts that did not change any command.
+        """
+
+        guild = discord.Object(id=self.config.guild_id) if self.config.guild_id else None
+        state = {
+            "guild_id": self.config.guild_id,
+            "signature": await self._command_signature(guild),
+        }
+        if not self.force_sync:
+            try:
+                stored = json.loads(self._sync_state_path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                stored = None
+            if stored == state:
+                return
+
+        if guild is not None:
             await self.tree.sync(guild=guild)
         else:
             await self.tree.sync()
+        await asyncio.to_thread(
+            self._sync_state_path.write_text, json.dumps(state), encoding="utf-8"
+        )
+
+    async def _command_signature(self, guild: discord.abc.Snowflake | None) -> str:
+        """Return a stable hash of the payload ``tree.sync`` would upload."""
+
+        payload = [
+            await _command_payload(command, self.tree)
+            for command in self.tree.get_commands(guild=guild)
+        ]
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    async def close(self) -> None:
+        if self._metrics_server is not None:
+            self._metrics_server.close()
+            await self._metrics_server.wait_closed()
+            self._metrics_server = None
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            try:
+                await self._expiry_task
+            except asyncio.CancelledError:
+                pass
+            self._expiry_task = None
+        await self.outbox.close()
+        await super().close()
+        await self.database.close()
 
     async def on_ready(self) -> None:
         await self.change_presence(activity=discord.Game(name="한별 서버 관리"))
@@ -318,9 +1482,17 @@ def load_environment() -> None:
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="한별 서버 관리 봇을 실행합니다.")
+    parser.add_argument(
+        "--force-sync",
+        action="store_true",
+        help="명령어 변경 여부와 관계없이 시작할 때 슬래시 명령어를 동기화합니다.",
+    )
+    args = parser.parse_args()
+
     load_environment()
     config = BotConfig.from_env()
-    bot = HanbyeolBot(config=config)
+    bot = HanbyeolBot(config=config, force_sync=args.force_sync)
     bot.run(config.token)
 
 
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from adminbot import database
+from adminbot.database import Database
+
+
+def _entry(index, kind="punishment"):
+    return {
+        "kind": kind,
+        "user_id": index % 3,
+        "user_name": f"user{index % 3}",
+        "punishment": "mute",
+        "reason": f"reason {index}",
+        "moderator_id": 1,
+        "moderator_name": "mod",
+        "created_at": f"2024-05-01T00:{index // 60:02d}:{index % 60:02d}",
+    }
+
+
+def _line(entry):
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _append_externally(path, data):
+    with open(path, "ab") as fp:
+        fp.write(data)
+
+
+def _no_reload():
+    raise AssertionError("the cache was reloaded from scratch")
+
+
+async def _recent(storage, limit=100):
+    found = await storage.get_recent_entries({"punishment": limit})
+    return [dict(entry) for entry in found["punishment"]]
+
+
+def test_own_appends_extend_the_cache_without_reloading(tmp_path, monkeypatch):
+    path = tmp_path / "log.jsonl"
+    path.write_bytes(b"".join(_line(_entry(index)) for index in range(5)))
+
+    async def run():
+        storage = Database(str(path))
+        await storage.setup()
+        monkeypatch.setattr(storage, "_reload_cache_locked", _no_reload)
+        try:
+            for index in range(5, 10):
+                await storage._store([_entry(index)])
+            expected = [_entry(index) for index in reversed(range(10))]
+            assert await _recent(storage) == expected
+        finally:
+            await storage.close()
+
+    asyncio.run(run())
+
+
+def test_external_growth_is_ingested_incrementally(tmp_path, monkeypatch):
+    path = tmp_path / "log.jsonl"
+    path.write_bytes(b"".join(_line(_entry(index)) for index in range(5)))
+
+    async def run():
+        storage = Database(str(path))
+        await storage.setup()
+        monkeypatch.setattr(storage, "_reload_cache_locked", _no_reload)
+        try:
+            version = await storage.current_version()
+
+            # A second writer appends one line and half of the next.
+            second = _line(_entry(6))
+            _append_externally(path, _line(_entry(5)) + second[:10])
+            assert await _recent(storage, 1) == [_entry(5)]
+            assert await storage.current_version() > version
+
+            _append_externally(path, second[10:])
+            assert await _recent(storage, 2) == [_entry(6), _entry(5)]
+
+            await storage._store([_entry(7)])
+            expected = [_entry(index) for index in reversed(range(8))]
+            assert await _recent(storage) == expected
+        finally:
+            await storage.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("change", ["truncate", "replace"])
+def test_rewritten_file_is_reloaded(tmp_path, change):
+    path = tmp_path / "log.jsonl"
+    path.write_bytes(b"".join(_line(_entry(index)) for index in range(5)))
+
+    async def run():
+        storage = Database(str(path))
+        await storage.setup()
+        try:
+            version = await storage.current_version()
+            data = b"".join(_line(_entry(index, "release")) for index in range(2))
+            if change == "truncate":
+                path.write_bytes(data)
+            else:
+                temporary = tmp_path / "log.jsonl.new"
+                temporary.write_bytes(data)
+                os.replace(temporary, path)
+
+            assert await _recent(storage) == []
+            found = await storage.get_recent_entries({"release": 10})
+            assert [dict(entry) for entry in found["release"]] == [
+                _entry(1, "release"),
+                _entry(0, "release"),
+            ]
+            assert await storage.current_version() > version
+        finally:
+            await storage.close()
+
+    asyncio.run(run())
+
+
+
+def _history(entries, user_id, limit=None):
+    history = {"punishment": [], "release": []}
+    for entry in reversed(entries):
+        bucket = history[entry["kind"]]
+        if entry["user_id"] == user_id and (limit is None or len(bucket) < limit):
+            bucket.append(entry)
+    return history
+
+
+def _mixed_entries(count):
+    return [
+        _entry(index, "release" if index % 4 == 0 else "punishment")
+        for index in range(count)
+    ]
+
+
+async def _histories(path, limit=None):
+    storage = Database(str(path))
+    await storage.setup()
+    try:
+        return [await storage.get_user_history(user_id, limit) for user_id in range(3)]
+    finally:
+        await storage.close()
+
+
+def test_user_history_follows_appends_and_persists(tmp_path, monkeypatch):
+    path = tmp_path / "log.jsonl"
+    entries = _mixed_entries(20)
+    path.write_bytes(b"".join(_line(entry) for entry in entries[:10]))
+
+    async def append():
+        storage = Database(str(path))
+        await storage.setup()
+        try:
+            for entry in entries[10:]:
+                await storage._store([entry])
+        finally:
+            await storage.close()
+
+    asyncio.run(append())
+    assert (tmp_path / "log.jsonl.users").exists()
+
+    # A fresh process loads the sidecar instead of indexing the log again.
+    monkeypatch.setattr(database._UserIndex, "rebuild", lambda index: _no_reload())
+    assert asyncio.run(_histories(path)) == [
+        _history(entries, user_id) for user_id in range(3)
+    ]
+    assert asyncio.run(_histories(path, 2)) == [
+        _history(entries, user_id, 2) for user_id in range(3)
+    ]
+
+
+def test_user_history_survives_a_rewritten_log(tmp_path):
+    path = tmp_path / "log.jsonl"
+    entries = _mixed_entries(12)
+    path.write_bytes(b"".join(_line(entry) for entry in entries))
+    assert asyncio.run(_histories(path)) == [
+        _history(entries, user_id) for user_id in range(3)
+    ]
+
+    # Rewrite the log in place with the users shuffled around, keeping the
+    # file the same size so only the stale offsets give it away.
+    rewritten = [dict(entry, user_id=(entry["user_id"] + 1) % 3) for entry in entries]
+    with open(path, "r+b") as fp:
+        fp.write(b"".join(_line(entry) for entry in rewritten))
+    assert asyncio.run(_histories(path)) == [
+        _history(rewritten, user_id) for user_id in range(3)
+    ]
@@ -0,0 +1,27 @@
+import asyncio
+
+from adminbot import outbox
+from adminbot.outbox import Outbox
+
+
+def test_delivered_items_do_not_return_after_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox, "_COMPACT_AFTER", 3)
+    path = tmp_path / "outbox.jsonl"
+
+    async def deliver(item):
+        await asyncio.sleep(0)
+
+    async def run():
+        box = Outbox(str(path))
+        await box.start(deliver)
+        futures = []
+        for index in range(7):
+            futures.append(
+                await box.enqueue(target="user", target_id=index, content="x")
+            )
+        assert all(await asyncio.gather(*futures))
+        assert box.pending == 0
+        await box.close()
+
+    asyncio.run(run())
+    assert Outbox(str(path))._load() == []
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+import bot as bot_module
+from adminbot.punishments import ActivePunishments, parse_duration
+from benchmarks.load import FakeDiscord, FakeMember, _build_bot
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("7일", timedelta(days=7)),
+        ("1시간 30분", timedelta(hours=1, minutes=30)),
+        ("3일간", timedelta(days=3)),
+        ("2 days", timedelta(days=2)),
+        ("1h30m", timedelta(hours=1, minutes=30)),
+        ("10 min", timedelta(minutes=10)),
+        ("1주 및 2일", timedelta(days=9)),
+        ("1.5d", timedelta(hours=36)),
+        ("영구", None),
+        ("permanent", None),
+        ("", None),
+        (None, None),
+        ("0일", None),
+        ("다음 공지까지", None),
+        ("7일 또는 그 이상", None),
+    ],
+)
+def test_parse_duration(text, expected):
+    assert parse_duration(text) == expected
+
+
+def _punishment(user_id, punishment, created_at, duration=None, **fields):
+    entry = {
+        "kind": "punishment",
+        "user_id": user_id,
+        "user_name": f"user{user_id}",
+        "punishment": punishment,
+        "reason": "test",
+        "moderator_id": 1,
+        "moderator_name": "mod",
+        "created_at": created_at.isoformat(timespec="seconds"),
+    }
+    if duration is not None:
+        entry["duration"] = duration
+    entry.update(fields)
+    return entry
+
+
+def _release(user_id, punishment):
+    return {"kind": "release", "user_id": user_id, "punishment": punishment}
+
+
+_NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def test_expiries_come_out_once_and_soonest_first():
+    active = ActivePunishments()
+    active.apply_many(
+        [
+            _punishment(1, "mute", _NOW, "3시간"),
+            _punishment(2, "mute", _NOW, "1시간"),
+            _punishment(3, "ban", _NOW, "영구"),
+            _punishment(4, "mute", _NOW, "2시간"),
+            # Punishing again replaces the earlier expiry.
+            _punishment(4, "mute", _NOW, "5시간"),
+            _release(1, "mute"),
+        ]
+    )
+    assert len(active) == 3
+    assert active.next_expiry() == _NOW + timedelta(hours=1)
+
+    expired = active.pop_expired(_NOW + timedelta(hours=4))
+    assert [item.user_id for item in expired] == [2]
+    assert active.pop_expired(_NOW + timedelta(hours=4)) == []
+    # Still active until its release is applied.
+    assert len(active) == 3
+    active.apply(_release(2, "mute"))
+
+    assert [item.user_id for item in active.active()] == [4, 3]
+    assert active.next_expiry() == _NOW + timedelta(hours=5)
+
+
+def test_reschedule_only_affects_current_punishments():
+    active = ActivePunishments()
+    active.apply(_punishment(1, "mute", _NOW, "1분"))
+    (item,) = active.pop_expired(_NOW + timedelta(minutes=1))
+
+    active.reschedule(item, _NOW + timedelta(minutes=5))
+    assert active.next_expiry() == _NOW + timedelta(minutes=5)
+    assert active.pop_expired(_NOW + timedelta(minutes=5)) == [item]
+
+    active.apply(_release(1, "mute"))
+    active.reschedule(item, _NOW + timedelta(minutes=10))
+    assert active.next_expiry() is None
+
+
+def test_discard_expired_drops_without_returning():
+    active = ActivePunishments()
+    active.apply_many(
+        [
+            _punishment(1, "mute", _NOW - timedelta(days=3), "1일"),
+            _punishment(2, "mute", _NOW - timedelta(days=3), "1일"),
+            _punishment(3, "mute", _NOW, "1일"),
+        ]
+    )
+    assert active.discard_expired(_NOW) == 2
+    assert [item.user_id for item in active.active()] == [3]
+    assert active.pop_expired(_NOW) == []
+
+
+def test_release_falls_back_to_the_only_active_punishment():
+    active = ActivePunishments()
+    active.apply(_punishment(1, "타임아웃", _NOW))
+    active.apply(_release(1, "타임아웃 해제"))
+    assert len(active) == 0
+
+    active.apply(_punishment(2, "mute", _NOW))
+    active.apply(_punishment(2, "ban", _NOW))
+    active.apply(_release(2, "unmute"))
+    assert len(active) == 2
+
+
+def test_malformed_entries_are_skipped(caplog):
+    active = ActivePunishments()
+    with caplog.at_level(logging.WARNING, logger="adminbot.punishments"):
+        active.apply_many(
+            [
+                _punishment(None, "mute", _NOW, "1일"),
+                _punishment("abc", "mute", _NOW, "1일"),
+                _punishment(1, "mute", _NOW, "1일", moderator_id="x"),
+                {"kind": "release"},
+                dict(_punishment(2, "mute", _NOW, "1일"), created_at="not a date"),
+                _punishment(3, "mute", _NOW, "1일"),
+            ]
+        )
+    assert len(caplog.records) == 4
+    assert [item.user_id for item in active.active()] == [3, 2]
+    assert active.active()[1].expires_at is None
+
+
+_MODERATOR_ID = 900
+
+
+def _start_bot(directory, entries):
+    fake = FakeDiscord(latency=0, jitter=0, rate_limit_ratio=0, retry_after=0, seed=1)
+    members = {
+        user_id: FakeMember(user_id, f"user{user_id}", fake)
+        for user_id in (1, 2, 3, _MODERATOR_ID)
+    }
+    path = directory / "hanbyeol_logs.txt"
+    path.write_text(
+        "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries),
+        encoding="utf-8",
+    )
+    bot = _build_bot(directory, fake, members, lean=True)
+    bot._connection.user = members[_MODERATOR_ID]
+
+    async def no_sync():
+        pass
+
+    bot._sync_commands = no_sync
+    return bot, fake
+
+
+async def _stop_bot(bot):
+    bot._expiry_task.cancel()
+    await asyncio.gather(bot._expiry_task, return_exceptions=True)
+    await bot.outbox.close()
+    await bot.database.close()
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.05)
+
+
+def test_scheduler_lifts_due_punishments_and_skips_old_ones(tmp_path):
+    now = datetime.now()
+    bot, fake = _start_bot(
+        tmp_path,
+        [
+            # Ran out before expiries were tracked: dropped silently.
+            _punishment(1, "mute", now - timedelta(days=3), "1일"),
+            # Runs out about a second after the start.
+            _punishment(2, "mute", now - timedelta(days=1, seconds=-2), "1일"),
+            _punishment(3, "ban", now, "영구"),
+        ],
+    )
+
+    async def run():
+        await bot.setup_hook()
+        try:
+            assert [item.user_id for item in bot.active_punishments.active()] == [2, 3]
+            await _wait_for(lambda: len(bot.active_punishments) == 1)
+            await _wait_for(lambda: fake.messages["channel"] == 1)
+            releases = await bot.database.get_recent_entries({"release": 10})
+            assert [entry["user_id"] for entry in releases["release"]] == [2]
+            assert releases["release"][0]["reason"] == bot_module._EXPIRY_REASON
+            assert not bot._expiry_task.done()
+        finally:
+            await _stop_bot(bot)
+
+    asyncio.run(run())
+    state = json.loads((tmp_path / "hanbyeol_logs.txt.expiry.json").read_text())
+    assert datetime.fromisoformat(state["watermark"]) >= now.replace(microsecond=0)
+
+
+def test_scheduler_survives_a_failed_release(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_module, "_EXPIRY_RETRY_DELAY", 0.2)
+    now = datetime.now()
+    bot, _ = _start_bot(
+        tmp_path, [_punishment(2, "mute", now - timedelta(days=1, seconds=-2), "1일")]
+    )
+    log_release = bot.database.log_release
+    calls = []
+
+    async def flaky_log_release(**fields):
+        calls.append(fields)
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        await log_release(**fields)
+
+    async def run():
+        await bot.setup_hook()
+        bot.database.log_release = flaky_log_release
+        try:
+            await _wait_for(lambda: len(bot.active_punishments) == 0)
+            assert len(calls) == 2
+            assert not bot._expiry_task.done()
+        finally:
+            await _stop_bot(bot)
+
+    asyncio.run(run())
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+from adminbot.cache import LRUCache
+from benchmarks.load import FakeDiscord, FakeMember, _build_bot
+
+
+def test_lru_cache_evicts_the_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def _bot(directory):
+    fake = FakeDiscord(latency=0, jitter=0, rate_limit_ratio=0, retry_after=0, seed=1)
+    bot = _build_bot(directory, fake, {1: FakeMember(1, "user1", fake)}, lean=True)
+    reads = []
+    get_recent_entries = bot.database.get_recent_entries
+
+    async def counted(*args, **kwargs):
+        reads.append(args)
+        # Give identical requests the chance to pile up behind this read.
+        await asyncio.sleep(0.05)
+        return await get_recent_entries(*args, **kwargs)
+
+    bot.database.get_recent_entries = counted
+    return bot, reads
+
+
+async def _log(bot, reason):
+    await bot.database.log_punishment(
+        user_id=1,
+        user_name="user1",
+        punishment="타임아웃",
+        reason=reason,
+        duration=None,
+        moderator_id=2,
+        moderator_name="mod",
+    )
+
+
+def _text(messages):
+    return json.dumps(
+        [[embed.to_dict() for embed in embeds] for embeds in messages],
+        ensure_ascii=False,
+    )
+
+
+def test_identical_requests_share_one_read_and_render(tmp_path):
+    bot, reads = _bot(tmp_path)
+
+    async def run():
+        await bot.database.setup()
+        try:
+            await _log(bot, "첫 번째")
+            burst = await asyncio.gather(
+                *(bot._punishment_log_messages("log", 10, None, None) for _ in range(5))
+            )
+            assert len(reads) == 1
+            assert all(messages is burst[0] for messages in burst)
+
+            assert await bot._punishment_log_messages("log", 10, None, None) is burst[0]
+            assert len(reads) == 1
+
+            await bot._punishment_log_messages("log", 5, None, None)
+            assert len(reads) == 2
+        finally:
+            await bot.database.close()
+
+    asyncio.run(run())
+
+
+def test_new_entries_invalidate_cached_renders(tmp_path):
+    bot, reads = _bot(tmp_path)
+
+    async def run():
+        await bot.database.setup()
+        try:
+            await _log(bot, "첫 번째")
+            first = await bot._punishment_log_messages("log", 10, None, None)
+
+            await _log(bot, "두 번째")
+            second = await bot._punishment_log_messages("log", 10, None, None)
+            assert len(reads) == 2
+            assert "두 번째" in _text(second) and "두 번째" not in _text(first)
+
+            # Another process appends to the log behind the bot's back.
+            entry = {
+                "kind": "punishment",
+                "user_id": 1,
+                "user_name": "user1",
+                "punishment": "타임아웃",
+                "reason": "세 번째",
+                "moderator_id": 2,
+                "moderator_name": "mod",
+                "created_at": "2024-01-01T00:00:00",
+            }
+            with open(tmp_path / "hanbyeol_logs.txt", "a", encoding="utf-8") as fp:
+                fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            third = await bot._punishment_log_messages("log", 10, None, None)
+            assert len(reads) == 3
+            assert "세 번째" in _text(third)
+        finally:
+            await bot.database.close()
+
+    asyncio.run(run())
+
+
+def test_cancelled_request_does_not_cancel_the_shared_read(tmp_path):
+    bot, reads = _bot(tmp_path)
+
+    async def run():
+        await bot.database.setup()
+        try:
+            await _log(bot, "첫 번째")
+            first = asyncio.create_task(
+                bot._punishment_log_messages("log", 10, None, None)
+            )
+            second = asyncio.create_task(
+                bot._punishment_log_messages("log", 10, None, None)
+            )
+            await asyncio.sleep(0.01)
+            first.cancel()
+            messages = await second
+            assert "첫 번째" in _text(messages)
+            assert len(reads) == 1
+        finally:
+            await bot.database.close()
+
+    asyncio.run(run())
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from adminbot.database import Database
+from adminbot.search import SearchIndex, bigrams
+
+
+def _entry(reason, punishment="mute"):
+    return {"kind": "punishment", "punishment": punishment, "reason": reason}
+
+
+def test_bigrams_stay_inside_words():
+    assert bigrams("사기 링크") == {"사기", "링크"}
+    assert bigrams("Scam.LINK 가") == {"sc", "ca", "am", "m.", ".l", "li", "in", "nk"}
+    assert bigrams("가 나 다") == set()
+
+
+def test_rare_grams_rank_first_and_ties_favour_newer_entries(tmp_path):
+    entries = [
+        _entry("스팸 도배"),
+        _entry("스팸 링크 hxxp.evil"),
+        _entry("스팸 도배"),
+        _entry("욕설"),
+        _entry("스팸 hxxp.evil"),
+    ]
+    index = SearchIndex(tmp_path / "log.search")
+    index.sync(entries)
+
+    assert index.search("hxxp.evil", 10) == [4, 1]
+    assert index.search("스팸", 10) == [4, 2, 1, 0]
+    assert index.search("스팸", 2) == [4, 2]
+    assert index.search("스팸 링크", 10) == [1, 4, 2, 0]
+    # The rarer gram outweighs the more common one.
+    assert index.search("도배 욕설", 10) == [3, 2, 0]
+    # At least half of the query grams must match.
+    assert index.search("도배 욕설 사기 링크", 10) == []
+    assert index.search("가", 10) == []
+
+
+def test_sidecar_is_reused_and_repaired(tmp_path):
+    path = tmp_path / "log.search"
+    entries = [_entry(f"사유 {index}번 링크") for index in range(10)]
+    index = SearchIndex(path)
+    index.sync(entries)
+    expected = index.search("링크", 20)
+
+    reopened = SearchIndex(path)
+    reopened.sync(entries)
+    assert len(reopened) == len(entries)
+    assert reopened.search("링크", 20) == expected
+
+    # A line cut short by a crash: the sidecar is rebuilt from the entries.
+    path.write_text(path.read_text(encoding="utf-8")[:-3], encoding="utf-8")
+    damaged = SearchIndex(path)
+    damaged.sync(entries)
+    assert damaged.search("링크", 20) == expected
+    restored = SearchIndex(path)
+    restored.sync(entries)
+    assert restored.search("링크", 20) == expected
+
+    # Entries that no longer match the sidecar start it over.
+    rewritten = [_entry("도배") for _ in range(10)]
+    stale = SearchIndex(path)
+    stale.sync(rewritten)
+    assert stale.search("링크", 20) == []
+    assert stale.search("도배", 20) == list(reversed(range(10)))
+
+
+def test_database_search_includes_external_appends(tmp_path):
+    path = tmp_path / "log.jsonl"
+
+    async def run():
+        storage = Database(str(path))
+        await storage.setup()
+        try:
+            await storage.log_punishment(
+                user_id=1,
+                user_name="a",
+                punishment="차단",
+                reason="사기 링크 배포",
+                duration=None,
+                moderator_id=2,
+                moderator_name="mod",
+            )
+            with open(path, "a", encoding="utf-8") as fp:
+                entry = dict(_entry("사기 링크 재배포", "차단"), user_id=3)
+                fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            found = await storage.search_entries("사기 링크", 10)
+            assert [entry["user_id"] for entry in found] == [3, 1]
+            assert await storage.search_entries("사기 링크", 1) == found[:1]
+        finally:
+            await storage.close()
+
+    asyncio.run(run())
+    assert (tmp_path / "log.jsonl.search").exists()
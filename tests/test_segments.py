@@ -0,0 +1,160 @@
+import asyncio
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+from adminbot import database
+from adminbot.database import Database
+
+
+def _entry(index, created_at):
+    return {
+        "kind": "punishment" if index % 4 else "release",
+        "user_id": index % 5,
+        "user_name": f"user{index % 5}",
+        "punishment": "mute",
+        "reason": f"reason {index}",
+        "moderator_id": 1,
+        "moderator_name": "mod",
+        "created_at": created_at.isoformat(timespec="seconds"),
+    }
+
+
+def _entries(count, first=datetime(2024, 1, 20), step=timedelta(hours=12)):
+    return [_entry(index, first + step * index) for index in range(count)]
+
+
+async def _write(path, entries, **options):
+    storage = Database(str(path), **options)
+    await storage.setup()
+    # One entry per write, so the log may roll between any two entries.
+    for entry in entries:
+        await storage._store([entry])
+    await storage.close()
+
+
+async def _read_all(path):
+    storage = Database(str(path))
+    await storage.setup()
+    try:
+        found = []
+        async for batch in storage.scan_entries():
+            found.extend(dict(entry) for entry in batch)
+        return found
+    finally:
+        await storage.close()
+
+
+def _manifest(path):
+    manifest_path = path.with_name(path.name + ".manifest.json")
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def test_new_month_seals_the_active_segment(tmp_path):
+    path = tmp_path / "log.jsonl"
+    entries = _entries(40)
+
+    asyncio.run(_write(path, entries, segment_max_bytes=0))
+
+    manifest = _manifest(path)
+    months = sorted({entry["created_at"][:7] for entry in entries})
+    # Every month but the last one was sealed.
+    assert [segment["first_at"][:7] for segment in manifest["segments"]] == months[:-1]
+    for segment in manifest["segments"]:
+        assert segment["first_at"][:7] == segment["last_at"][:7]
+        assert (tmp_path / segment["file"]).exists()
+    assert manifest["active_seq"] == len(manifest["segments"]) + 1
+    assert sum(segment["count"] for segment in manifest["segments"]) == sum(
+        entry["created_at"][:7] != months[-1] for entry in entries
+    )
+    assert asyncio.run(_read_all(path)) == entries
+
+
+def test_full_segment_is_sealed_with_members(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "_CHECKPOINT_BYTES", 1024)
+    path = tmp_path / "log.jsonl"
+    entries = _entries(120, step=timedelta(minutes=1))
+
+    asyncio.run(_write(path, entries, segment_max_bytes=4096))
+
+    manifest = _manifest(path)
+    assert len(manifest["segments"]) > 2
+    for segment in manifest["segments"]:
+        assert segment["bytes"] <= 4096
+        sealed = tmp_path / segment["file"]
+        data = gzip.decompress(sealed.read_bytes())
+        assert len(data) == segment["bytes"]
+        assert len(data.splitlines()) == segment["count"]
+        assert len(segment["members"]) > 1
+        # Each member decompresses on its own from its recorded offset.
+        raw = sealed.read_bytes()
+        for (start, offset), following in zip(
+            segment["members"], segment["members"][1:] + [[len(data), len(raw)]]
+        ):
+            member = gzip.decompress(raw[offset : following[1]])
+            assert member == data[start : following[0]]
+    assert os.path.getsize(path) <= 4096
+    assert not list(tmp_path.glob("log.jsonl.[0-9]*[0-9]"))
+    assert asyncio.run(_read_all(path)) == entries
+
+
+def test_roll_interrupted_before_sealing_is_finished_on_setup(tmp_path):
+    path = tmp_path / "log.jsonl"
+    entries = _entries(30, step=timedelta(minutes=1))
+    asyncio.run(_write(path, entries[:20], segment_max_bytes=2048))
+    sealed = len(_manifest(path)["segments"])
+
+    # The active segment was moved aside but the process died before it was
+    # compressed and listed in the manifest.
+    active_seq = _manifest(path)["active_seq"]
+    os.replace(path, tmp_path / f"log.jsonl.{active_seq:05d}")
+
+    asyncio.run(_write(path, entries[20:], segment_max_bytes=2048))
+
+    manifest = _manifest(path)
+    assert len(manifest["segments"]) > sealed
+    assert [segment["seq"] for segment in manifest["segments"]] == list(
+        range(1, len(manifest["segments"]) + 1)
+    )
+    assert not (tmp_path / f"log.jsonl.{active_seq:05d}").exists()
+    assert asyncio.run(_read_all(path)) == entries
+
+
+def test_roll_interrupted_after_sealing_drops_the_leftover(tmp_path):
+    path = tmp_path / "log.jsonl"
+    entries = _entries(30, step=timedelta(minutes=1))
+    asyncio.run(_write(path, entries, segment_max_bytes=2048))
+
+    # The segment was sealed and recorded but its plain copy not deleted.
+    segment = _manifest(path)["segments"][0]
+    leftover = tmp_path / f"log.jsonl.{segment['seq']:05d}"
+    leftover.write_bytes(gzip.decompress((tmp_path / segment["file"]).read_bytes()))
+
+    assert asyncio.run(_read_all(path)) == entries
+    assert not leftover.exists()
+
+
+def test_user_history_spans_sealed_segments(tmp_path):
+    path = tmp_path / "log.jsonl"
+    entries = _entries(60, step=timedelta(minutes=1))
+    asyncio.run(_write(path, entries, segment_max_bytes=2048))
+    assert len(_manifest(path)["segments"]) > 2
+
+    async def run():
+        storage = Database(str(path))
+        await storage.setup()
+        try:
+            return {
+                user_id: await storage.get_user_history(user_id)
+                for user_id in range(5)
+            }
+        finally:
+            await storage.close()
+
+    for user_id, history in asyncio.run(run()).items():
+        own = [entry for entry in reversed(entries) if entry["user_id"] == user_id]
+        assert history == {
+            "punishment": [entry for entry in own if entry["kind"] == "punishment"],
+            "release": [entry for entry in own if entry["kind"] == "release"],
+        }
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from adminbot.database import Database, SQLiteDatabase, open_database
+from adminbot.migrate import import_text_log, main
+
+
+def _entries(count):
+    first = datetime(2024, 1, 25)
+    entries = []
+    for index in range(count):
+        entry = {
+            "kind": "release" if index % 3 == 0 else "punishment",
+            "user_id": index % 4,
+            "user_name": f"user{index % 4}",
+            "punishment": "mute",
+            "reason": f"사유 {index}" + (" 사기 링크" if index % 5 == 0 else ""),
+            "moderator_id": 10 + index % 2,
+            "moderator_name": "mod",
+            "created_at": (first + timedelta(hours=8 * index)).isoformat(
+                timespec="seconds"
+            ),
+        }
+        if index % 2:
+            entry["duration"] = "7일"
+        entries.append(entry)
+    return entries
+
+
+async def _fill(storage, entries):
+    await storage.setup()
+    for entry in entries:
+        await storage._store([entry])
+
+
+def _newest(entries, kind, limit, user_id=None):
+    found = [
+        entry
+        for entry in reversed(entries)
+        if entry["kind"] == kind and user_id in (None, entry["user_id"])
+    ]
+    return found[:limit]
+
+
+def _plain(found):
+    # SQLite rows carry every column; compare them as the log would store them.
+    return [
+        {key: value for key, value in dict(entry).items() if value is not None}
+        for entry in found
+    ]
+
+
+@pytest.mark.parametrize(
+    ("location", "backend"),
+    [
+        ("sqlite:///{dir}/logs", SQLiteDatabase),
+        ("sqlite:{dir}/logs.txt", SQLiteDatabase),
+        ("{dir}/logs.db", SQLiteDatabase),
+        ("{dir}/logs.SQLITE3", SQLiteDatabase),
+        ("{dir}/hanbyeol_logs.txt", Database),
+    ],
+)
+def test_backend_is_chosen_by_scheme_or_extension(tmp_path, location, backend):
+    assert type(open_database(location.format(dir=tmp_path))) is backend
+
+
+def test_sqlite_answers_like_the_text_log(tmp_path):
+    entries = _entries(50)
+
+    async def run():
+        text = Database(str(tmp_path / "log.jsonl"), segment_max_bytes=0)
+        sqlite = SQLiteDatabase(str(tmp_path / "log.db"))
+        await _fill(text, entries)
+        await _fill(sqlite, entries)
+        try:
+            for storage in (text, sqlite):
+                limits = {"punishment": 4, "release": 2}
+                recent = await storage.get_recent_entries(limits)
+                assert {kind: _plain(found) for kind, found in recent.items()} == {
+                    kind: _newest(entries, kind, limit)
+                    for kind, limit in limits.items()
+                }
+
+                history = await storage.get_user_history(2, 3)
+                assert {kind: _plain(found) for kind, found in history.items()} == {
+                    kind: _newest(entries, kind, 3, user_id=2)
+                    for kind in ("punishment", "release")
+                }
+
+                pages = []
+                cursor = None
+                while True:
+                    page, cursor = await storage.get_entries_before(cursor, 15)
+                    pages.extend(page)
+                    if cursor is None:
+                        break
+                assert _plain(pages) == entries[::-1]
+
+                scanned = []
+                async for batch in storage.scan_entries(batch_size=7):
+                    scanned.extend(batch)
+                assert _plain(scanned) == entries
+
+                found = await storage.search_entries("사기 링크", 100)
+                assert sorted(entry["reason"] for entry in found) == sorted(
+                    reason
+                    for reason in (entry["reason"] for entry in entries)
+                    if "사기 링크" in reason
+                )
+        finally:
+            await text.close()
+            await sqlite.close()
+
+    asyncio.run(run())
+
+
+def test_sqlite_uses_wal_and_indexes(tmp_path):
+    path = tmp_path / "log.db"
+
+    async def run():
+        storage = SQLiteDatabase(str(path))
+        await _fill(storage, _entries(3))
+        await storage.close()
+
+    asyncio.run(run())
+    connection = sqlite3.connect(path)
+    try:
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        indexes = {
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        assert {
+            "entries_kind_created_at",
+            "entries_user_id",
+            "entries_moderator_id",
+        } <= indexes
+    finally:
+        connection.close()
+
+
+def _snapshot(directory):
+    return {path.name: path.read_bytes() for path in sorted(directory.iterdir())}
+
+
+def test_import_reads_segments_without_touching_the_source(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    source = source_dir / "hanbyeol_logs.txt"
+    entries = _entries(60)
+
+    async def write():
+        storage = Database(str(source), segment_max_bytes=2048)
+        await _fill(storage, entries)
+        await storage.close()
+
+    asyncio.run(write())
+    manifest = json.loads((source_dir / "hanbyeol_logs.txt.manifest.json").read_text())
+    assert len(manifest["segments"]) > 1
+
+    # A roll that was interrupted before sealing, and a malformed line.
+    active_seq = manifest["active_seq"]
+    os.replace(source, source_dir / f"hanbyeol_logs.txt.{active_seq:05d}")
+    with open(source_dir / f"hanbyeol_logs.txt.{active_seq:05d}", "a") as fp:
+        fp.write("{not json\n")
+    source.write_text("", encoding="utf-8")
+    before = _snapshot(source_dir)
+
+    destination = tmp_path / "logs.db"
+    assert import_text_log(source, destination, batch_size=7) == len(entries)
+    assert _snapshot(source_dir) == before
+
+    async def read():
+        storage = SQLiteDatabase(str(destination))
+        await storage.setup()
+        try:
+            found = []
+            async for batch in storage.scan_entries():
+                found.extend(batch)
+            return found
+        finally:
+            await storage.close()
+
+    assert _plain(asyncio.run(read())) == entries
+
+    with pytest.raises(RuntimeError):
+        import_text_log(source, destination)
+
+
+def test_import_command_reports_the_count(tmp_path, capsys):
+    source = tmp_path / "hanbyeol_logs.txt"
+    source.write_text(
+        "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in _entries(5)),
+        encoding="utf-8",
+    )
+    main([str(source), str(tmp_path / "logs.db")])
+    assert "5개의 기록" in capsys.readouterr().out
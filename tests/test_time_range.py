@@ -0,0 +1,167 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from adminbot import database
+from adminbot.database import Database, SQLiteDatabase
+
+_FIRST = datetime(2024, 1, 30)
+
+
+def _entries():
+    entries = []
+    for index in range(60):
+        created_at = _FIRST + timedelta(hours=6 * index)
+        entries.append(
+            {
+                "kind": "punishment" if index % 3 else "release",
+                "user_id": index % 7,
+                "user_name": f"user{index % 7}",
+                "punishment": "mute",
+                "reason": f"reason {index}",
+                "moderator_id": 1,
+                "moderator_name": "mod",
+                "created_at": created_at.isoformat(timespec="seconds"),
+            }
+        )
+        if index % 10 == 5:
+            # Lines without a timestamp are never part of a range.
+            entries.append(
+                {
+                    "kind": "punishment",
+                    "user_id": 99,
+                    "user_name": "undated",
+                    "punishment": "mute",
+                    "reason": "undated",
+                    "moderator_id": 1,
+                    "moderator_name": "mod",
+                }
+            )
+    return entries
+
+
+def _in_range(entries, start, end):
+    found = []
+    for entry in entries:
+        if "created_at" not in entry:
+            continue
+        created_at = datetime.fromisoformat(entry["created_at"])
+        if start is not None and created_at < start:
+            continue
+        if end is not None and created_at >= end:
+            continue
+        found.append(entry)
+    return found
+
+
+def _expected(entries, limits, start, end):
+    expected = {kind: [] for kind in limits}
+    for entry in reversed(_in_range(entries, start, end)):
+        bucket = expected.get(entry["kind"])
+        if bucket is not None and len(bucket) < limits[entry["kind"]]:
+            bucket.append(entry)
+    return expected
+
+
+async def _open(tmp_path, layout):
+    if layout == "sqlite":
+        storage = SQLiteDatabase(str(tmp_path / "log.db"))
+    else:
+        storage = Database(
+            str(tmp_path / "log.jsonl"),
+            segment_max_bytes=0 if layout == "active" else 2048,
+        )
+    await storage.setup()
+    return storage
+
+
+async def _fill(tmp_path, layout, entries):
+    storage = await _open(tmp_path, layout)
+    # One entry per write, so the text log rolls between entries.
+    for entry in entries:
+        await storage._store([entry])
+    await storage.close()
+
+    if layout == "legacy":
+        manifest_path = tmp_path / "log.jsonl.manifest.json"
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        for segment in manifest["segments"]:
+            segment.pop("checkpoints", None)
+            segment.pop("members", None)
+        manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    return await _open(tmp_path, layout)
+
+
+_RANGES = [
+    (_FIRST + timedelta(hours=30), _FIRST + timedelta(hours=90)),
+    (_FIRST + timedelta(hours=31), _FIRST + timedelta(hours=89)),
+    (_FIRST + timedelta(days=2), None),
+    (None, _FIRST + timedelta(days=5)),
+    (datetime(2024, 2, 1), datetime(2024, 3, 1)),
+    (datetime(2023, 1, 1), datetime(2023, 2, 1)),
+    (datetime(2025, 1, 1), None),
+]
+
+
+@pytest.mark.parametrize("layout", ["active", "checkpointed", "legacy", "sqlite"])
+def test_range_queries_match_a_full_scan(tmp_path, monkeypatch, layout):
+    # Several gzip members per sealed segment.
+    monkeypatch.setattr(database, "_CHECKPOINT_BYTES", 512)
+    entries = _entries()
+    limits = {"punishment": 5, "release": 100}
+
+    async def run():
+        storage = await _fill(tmp_path, layout, entries)
+        try:
+            for start, end in _RANGES:
+                recent = await storage.get_recent_entries(limits, start=start, end=end)
+                recent = {
+                    kind: [dict(entry) for entry in found]
+                    for kind, found in recent.items()
+                }
+                assert recent == _expected(entries, limits, start, end), (start, end)
+
+                between = []
+                batches = storage.iter_entries_between(start, end, batch_size=7)
+                async for batch in batches:
+                    between.extend(dict(entry) for entry in batch)
+                assert between == _in_range(entries, start, end), (start, end)
+        finally:
+            await storage.close()
+
+    asyncio.run(run())
+
+    if layout in ("checkpointed", "legacy"):
+        manifest = json.loads(
+            (tmp_path / "log.jsonl.manifest.json").read_text(encoding="utf-8")
+        )
+        assert len(manifest["segments"]) > 1
+        checkpoints = [segment.get("checkpoints") for segment in manifest["segments"]]
+        if layout == "checkpointed":
+            assert any(len(found) > 1 for found in checkpoints)
+        else:
+            assert not any(checkpoints)
+
+
+def test_range_is_half_open(tmp_path):
+    entries = _entries()
+    start = datetime.fromisoformat(entries[3]["created_at"])
+    end = datetime.fromisoformat(entries[9]["created_at"])
+
+    async def run():
+        storage = await _fill(tmp_path, "active", entries)
+        try:
+            recent = await storage.get_recent_entries(
+                {"punishment": 100, "release": 100}, start=start, end=end
+            )
+        finally:
+            await storage.close()
+        found = [entry for kind in recent.values() for entry in kind]
+        times = {entry["created_at"] for entry in found}
+        assert entries[3]["created_at"] in times
+        assert entries[9]["created_at"] not in times
+        assert all("created_at" in entry for entry in found)
+
+    asyncio.run(run())